@@ -0,0 +1,69 @@
+"""Synthetic DICOM files for benchmarks."""
+
+import struct
+from collections.abc import Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+EXPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2.1"
+
+
+def _element(tag: int, vr: str, value: str) -> bytes:
+    raw = value.encode()
+    if len(raw) % 2:
+        raw += b"\0" if vr == "UI" else b" "
+    return (
+        struct.pack("<HH", tag >> 16, tag & 0xFFFF)
+        + vr.encode()
+        + struct.pack("<H", len(raw))
+        + raw
+    )
+
+
+def dicom_header(index: int = 0, *, series: int | None = None) -> bytes:
+    """Build preamble, file meta and dataset of a synthetic instance.
+
+    Args:
+        index (int): instance number, used to derive unique UIDs.
+        series (int | None): series number, defaults to ``index``.
+
+    Returns:
+        bytes: every byte of the file before the pixel data element.
+    """
+    series = index if series is None else series
+    meta = _element(0x00020010, "UI", EXPLICIT_VR_LITTLE_ENDIAN)
+    dataset = b"".join(
+        [
+            _element(0x00080018, "UI", f"1.2.826.0.1.3680043.2.{series}.{index}"),
+            _element(0x00080060, "CS", "CT"),
+            _element(0x00100010, "PN", "Doe^John"),
+            _element(0x00100020, "LO", f"PAT-{series % 1000:04d}"),
+            _element(0x00180015, "CS", "CHEST"),
+            _element(0x0020000D, "UI", f"1.2.826.0.1.3680043.1.{series // 10}"),
+            _element(0x0020000E, "UI", f"1.2.826.0.1.3680043.2.{series}"),
+            _element(0x00280010, "US", "  "),
+        ]
+    )
+    return b"\0" * 128 + b"DICM" + meta + dataset
+
+
+def dicom_file(
+    pixel_data_size: int, index: int = 0, *, series: int | None = None
+) -> Iterator[bytes]:
+    """Stream a synthetic instance in chunks without materializing it.
+
+    Args:
+        pixel_data_size (int): size of the pixel data element value.
+        index (int): instance number.
+        series (int | None): series number, defaults to ``index``.
+
+    Yields:
+        Iterator[bytes]: file content.
+    """
+    yield dicom_header(index, series=series) + struct.pack(
+        "<HH2sHI", 0x7FE0, 0x0010, b"OW", 0, pixel_data_size
+    )
+    chunk = bytes(CHUNK_SIZE)
+    for _ in range(pixel_data_size // CHUNK_SIZE):
+        yield chunk
+    yield bytes(pixel_data_size % CHUNK_SIZE)
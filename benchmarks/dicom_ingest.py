@@ -0,0 +1,103 @@
+"""Throughput benchmark of the bulk DICOM ingest.
+
+Run from the repository root::
+
+    python -m benchmarks.dicom_ingest --instances 5000 --workers 0 2 4
+
+A zip archive of synthetic instances (ten per series) is built once, then
+streamed to ``POST /dicom/series/bulk`` for every worker count. Reported rate is
+instances per second end-to-end, including the upsert of ``dicom_series``.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import tempfile
+import time
+import zipfile
+from collections.abc import AsyncIterator
+
+from benchmarks._dicom import CHUNK_SIZE, dicom_file
+
+
+def build_archive(instances: int, pixel_data_size: int) -> bytes:
+    """Zip synthetic instances, ten per series."""
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for index in range(instances):
+            data = b"".join(dicom_file(pixel_data_size, index, series=index // 10))
+            zf.writestr(f"study/{index:06d}.dcm", data)
+    return out.getvalue()
+
+
+async def _stream(data: bytes) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), CHUNK_SIZE):
+        yield data[start : start + CHUNK_SIZE]
+
+
+async def bench_ingest(archive: bytes) -> tuple[float, dict[str, int]]:
+    """Upload archive to the bulk ingest endpoint."""
+    import httpx
+
+    from fastapi_user_management.app import app
+    from fastapi_user_management.routes import auth
+
+    app.dependency_overrides[auth.get_current_active_user] = lambda: None
+    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        start = time.perf_counter()
+        response = await c.post(
+            "/dicom/series/bulk",
+            content=_stream(archive),
+            headers={"content-type": "application/zip"},
+            timeout=None,
+        )
+        elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed, response.json()
+
+
+def main() -> None:
+    """Run benchmark for every requested worker count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instances", type=int, default=5000)
+    parser.add_argument(
+        "--pixel-data", type=int, default=16 * 1024, help="bytes per instance"
+    )
+    parser.add_argument("--workers", nargs="+", type=int, default=[0, 2, 4])
+    args = parser.parse_args()
+
+    archive = build_archive(args.instances, args.pixel_data)
+    print(f"archive: {args.instances} instances, {len(archive) / 2**20:.1f} MiB")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URI"] = f"sqlite+pysqlite:///{tmp}/bench.sqlite3"
+        from fastapi_user_management.app import create_db_and_tables
+        from fastapi_user_management.config import SETTINGS
+        from fastapi_user_management.tools.dicom_ingest import (
+            extract_headers,
+            get_executor,
+            shutdown_executor,
+        )
+
+        create_db_and_tables()
+        print(f"{'workers':>8}{'seconds':>10}{'instances/s':>14}{'series':>8}")
+        for workers in args.workers:
+            SETTINGS.DICOM_INGEST_WORKERS = workers
+            executor = get_executor(workers)
+            if executor is not None:  # exclude process start-up from the timing
+                for future in [
+                    executor.submit(extract_headers, []) for _ in range(workers)
+                ]:
+                    future.result()
+            elapsed, result = asyncio.run(bench_ingest(archive))
+            shutdown_executor()
+            assert not result["errors"], result["errors"][:3]
+            print(
+                f"{workers:>8}{elapsed:>10.2f}"
+                f"{result['instances'] / elapsed:>14.0f}{result['series']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
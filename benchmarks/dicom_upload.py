@@ -0,0 +1,109 @@
+"""Memory and latency benchmark of the streaming DICOM upload.
+
+Run from the repository root::
+
+    python -m benchmarks.dicom_upload --sizes 64 512 2048
+
+Each synthetic file is generated lazily, so neither the benchmark nor the code
+under test ever holds a whole file. For every size it reports the time to extract
+the header, the number of bytes read and the peak memory allocated, first for the
+bare parser and then end-to-end through ``POST /dicom/series``.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from collections.abc import AsyncIterator, Iterator
+
+from benchmarks._dicom import dicom_file
+
+MIB = 1024 * 1024
+
+
+class _Counter:
+    """Count bytes pulled from a chunk iterator."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self.chunks = chunks
+        self.bytes_read = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self.chunks:
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
+async def _stream(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+def bench_parser(size: int) -> dict[str, float]:
+    """Parse header of a synthetic file of ``size`` bytes of pixel data."""
+    from fastapi_user_management.tools.dicom import parse_dicom_header
+
+    counter = _Counter(dicom_file(size))
+    tracemalloc.start()
+    start = time.perf_counter()
+    parse_dicom_header(counter)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "bytes_read": counter.bytes_read, "peak": peak}
+
+
+async def bench_upload(size: int) -> dict[str, float]:
+    """Upload a synthetic file of ``size`` bytes of pixel data to the app."""
+    import httpx
+
+    from fastapi_user_management.app import app
+    from fastapi_user_management.routes import auth
+
+    app.dependency_overrides[auth.get_current_active_user] = lambda: None
+    counter = _Counter(dicom_file(size))
+    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = await c.post(
+            "/dicom/series",
+            content=_stream(counter),
+            headers={"content-type": "application/dicom"},
+        )
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    response.raise_for_status()
+    return {"seconds": elapsed, "bytes_read": counter.bytes_read, "peak": peak}
+
+
+def main() -> None:
+    """Run benchmark for every requested file size."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[64, 512], help="pixel data in MiB"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URI"] = f"sqlite+pysqlite:///{tmp}/bench.sqlite3"
+        from fastapi_user_management.app import create_db_and_tables
+
+        create_db_and_tables()
+        print(f"{'mode':<8}{'size MiB':>10}{'ms':>10}{'read KiB':>12}{'peak KiB':>12}")
+        for size in args.sizes:
+            for mode, result in (
+                ("parser", bench_parser(size * MIB)),
+                ("upload", asyncio.run(bench_upload(size * MIB))),
+            ):
+                print(
+                    f"{mode:<8}{size:>10}{result['seconds'] * 1000:>10.2f}"
+                    f"{result['bytes_read'] / 1024:>12.1f}{result['peak'] / 1024:>12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
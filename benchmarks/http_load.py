@@ -0,0 +1,321 @@
+"""In-process HTTP load benchmark of the user management endpoints.
+
+Run from the repository root::
+
+    python -m benchmarks.http_load --users 1000 100000 1000000 --concurrency 8
+
+The ASGI ``app`` is driven in process through ``httpx.ASGITransport`` against
+SQLite databases seeded with the requested numbers of users (cached in
+``benchmarks/.data``, every run works on a fresh copy). Each database size runs in
+its own interpreter, so the app binds its engine to that database.
+
+Sessions check out a connection only while they query and release it before
+hashing passwords, so ``--concurrency`` may exceed the size of the connection
+pool (5 + 10 overflow by default).
+
+Throughput and latency percentiles of every scenario are written as JSON and
+compared with the committed baseline: the run fails when a scenario's p95 latency
+grows or its throughput drops by more than ``--threshold``. Refresh the baseline
+with ``--update-baseline`` after an intended change, on the reference machine.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from benchmarks.seed import seed_users, username
+
+BENCHMARKS_DIR = Path(__file__).parent
+DATA_DIR = BENCHMARKS_DIR / ".data"
+BASELINE = BENCHMARKS_DIR / "baselines" / "http_load.json"
+
+PAGE_SIZE = 50
+
+RequestFactory = Callable[[int], tuple[str, str, dict[str, Any]]]
+
+
+@dataclass
+class Scenario:
+    """Requests of one endpoint, ``build(i)`` returns the i-th request."""
+
+    name: str
+    requests: int
+    build: RequestFactory
+
+
+def scenarios(users: int, scale: float) -> list[Scenario]:
+    """Scenarios for a database of ``users`` seeded users.
+
+    Args:
+        users (int): number of seeded users.
+        scale (float): multiplier of the number of requests.
+
+    Returns:
+        list[Scenario]: scenarios in run order, writes last.
+    """
+
+    def count(requests: int) -> int:
+        return max(1, int(requests * scale))
+
+    form = {"username": username(0), "password": "bench-password"}
+    result = [
+        Scenario(
+            "auth_token", count(20), lambda i: ("POST", "/auth/token", {"data": form})
+        ),
+        Scenario(
+            "user_profile",
+            count(500),
+            lambda i: (
+                "GET",
+                "/admin/user-profile",
+                {"params": {"username": username(i * 7919 % users)}},
+            ),
+        ),
+    ]
+    for depth in sorted({0, users // 2, max(users - PAGE_SIZE, 0)}):
+        result.append(
+            Scenario(
+                f"list_users_skip_{depth}",
+                count(200),
+                lambda i, depth=depth: (
+                    "GET",
+                    "/admin/user",
+                    {"params": {"skip": depth, "limit": PAGE_SIZE}},
+                ),
+            )
+        )
+    result += [
+        Scenario(
+            "create_user",
+            count(20),
+            lambda i: (
+                "POST",
+                "/admin/user",
+                {
+                    "json": {
+                        "fullname": f"Created {i}",
+                        "username": f"created{i}@bench-users.com",
+                        "status": "active",
+                        "roles": [{"name": "user"}],
+                    }
+                },
+            ),
+        ),
+        Scenario(
+            "update_user",
+            count(20),
+            lambda i: (
+                "PATCH",
+                "/admin/user",
+                {
+                    "params": {"username": username(1 + i)},
+                    "json": {"new_password": "pass", "new_password_confirm": "pass"},
+                },
+            ),
+        ),
+        Scenario(
+            "delete_user",
+            count(200),
+            lambda i: (
+                "DELETE",
+                "/admin/user",
+                {"params": {"username": username(users - 1 - i)}},
+            ),
+        ),
+    ]
+    return result
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict[str, float]:
+    """Throughput and latency percentiles in milliseconds."""
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+async def run_scenarios(users: int, concurrency: int, scale: float) -> dict:
+    """Run every scenario against the app, database is set by the environment."""
+    import httpx
+
+    from fastapi_user_management.app import app
+    from fastapi_user_management.config import SETTINGS
+
+    results: dict[str, dict[str, float]] = {}
+    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        response = await client.post(
+            "/auth/token",
+            data={
+                "username": SETTINGS.ADMIN_EMAIL,
+                "password": SETTINGS.ADMIN_PASSWORD,
+            },
+        )
+        response.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        for scenario in scenarios(users, scale):
+            latencies: list[float] = []
+
+            async def worker(
+                scenario: Scenario, queue: Iterator[int], latencies: list[float]
+            ) -> None:
+                for i in queue:
+                    method, url, kwargs = scenario.build(i)
+                    start = time.perf_counter()
+                    response = await client.request(method, url, **kwargs)
+                    latencies.append(time.perf_counter() - start)
+                    if response.status_code >= 400:
+                        raise RuntimeError(
+                            f"{scenario.name}: {response.status_code} {response.text}"
+                        )
+
+            start = time.perf_counter()
+            queue = iter(range(scenario.requests))
+            await asyncio.gather(
+                *(worker(scenario, queue, latencies) for _ in range(concurrency))
+            )
+            results[scenario.name] = summarize(latencies, time.perf_counter() - start)
+    return results
+
+
+def database(users: int) -> Path:
+    """Cached seeded database of ``users`` users."""
+    path = DATA_DIR / f"users_{users}.sqlite3"
+    if not path.exists():
+        DATA_DIR.mkdir(exist_ok=True)
+        partial = path.with_suffix(".partial")
+        partial.unlink(missing_ok=True)
+        seed_users(partial, users)
+        partial.rename(path)
+    return path
+
+
+def run_size(users: int, concurrency: int, scale: float) -> dict:
+    """Run scenarios in a child interpreter on a copy of the seeded database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / "bench.sqlite3"
+        shutil.copyfile(database(users), copy)
+        env = {**os.environ, "DATABASE_URI": f"sqlite+pysqlite:///{copy}"}
+        child = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.http_load",
+                "--child",
+                f"--users={users}",
+                f"--concurrency={concurrency}",
+                f"--scale={scale}",
+            ],
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+        )
+    return json.loads(child.stdout)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """List scenarios that regressed compared to the baseline."""
+    regressions = []
+    for size, scenarios_results in results.items():
+        for name, result in scenarios_results.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                continue
+            if result["p95_ms"] > reference["p95_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{size} users, {name}: p95 {result['p95_ms']:.1f}ms"
+                    f" > baseline {reference['p95_ms']:.1f}ms"
+                )
+            if result["throughput_rps"] < reference["throughput_rps"] * (1 - threshold):
+                regressions.append(
+                    f"{size} users, {name}: {result['throughput_rps']:.1f} req/s"
+                    f" < baseline {reference['throughput_rps']:.1f} req/s"
+                )
+    return regressions
+
+
+def main() -> None:
+    """Run benchmark for every database size and compare with the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", nargs="+", type=int, default=[1000, 100_000])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiplier of requests per scenario"
+    )
+    parser.add_argument("--output", type=Path, default=Path("http_load_results.json"))
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed relative regression"
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        results = asyncio.run(
+            run_scenarios(args.users[0], args.concurrency, args.scale)
+        )
+        json.dump(results, sys.stdout)
+        return
+
+    results = {
+        str(users): run_size(users, args.concurrency, args.scale)
+        for users in args.users
+    }
+    print(f"{'users':>9} {'scenario':<28}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for size, scenario_results in results.items():
+        for name, result in scenario_results.items():
+            print(
+                f"{size:>9} {name:<28}{result['throughput_rps']:>10.1f}"
+                f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+                f"{result['p99_ms']:>9.1f}"
+            )
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "concurrency": args.concurrency,
+        "scale": args.scale,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline written to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}, run with --update-baseline")
+        return
+    regressions = compare(
+        results, json.loads(args.baseline.read_text())["results"], args.threshold
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
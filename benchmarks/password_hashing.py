@@ -0,0 +1,92 @@
+"""Cost of hashing and verifying a password by bcrypt work factor.
+
+Run from the repository root::
+
+    python -m benchmarks.password_hashing --rounds 10 11 12 13
+
+Each work factor hashes and verifies a password ``--repeat`` times, the best
+times are reported. Hashing is paid by user creations and password changes,
+verifying by every login. The work factor ``password_hashing`` settings pick
+at startup on this machine is reported with them, see
+``tools.encryption.calibrate``.
+"""
+
+import argparse
+import json
+import platform
+import time
+from pathlib import Path
+
+from passlib.hash import bcrypt
+
+PASSWORD = "correct horse battery staple"
+
+
+def best_seconds(function, repeat: int) -> float:
+    """Best time of ``repeat`` calls of a function."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure(rounds: int, repeat: int) -> dict[str, float]:
+    """Best hash and verify times of a work factor, in milliseconds."""
+    handler = bcrypt.using(rounds=rounds)
+    password_hash = handler.hash(PASSWORD)
+    return {
+        "hash_ms": best_seconds(lambda: handler.hash(PASSWORD), repeat) * 1000,
+        "verify_ms": best_seconds(
+            lambda: handler.verify(PASSWORD, password_hash), repeat
+        )
+        * 1000,
+    }
+
+
+def main() -> None:
+    """Time every requested work factor and print a comparison."""
+    from fastapi_user_management.config import SETTINGS
+    from fastapi_user_management.tools.encryption import calibrate
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--output", type=Path, default=Path("password_hashing_results.json")
+    )
+    args = parser.parse_args()
+
+    results = {rounds: measure(rounds, args.repeat) for rounds in args.rounds}
+    calibrated = calibrate(
+        SETTINGS.PASSWORD_HASHING_TARGET_SECONDS,
+        SETTINGS.PASSWORD_HASHING_MIN_ROUNDS,
+        SETTINGS.PASSWORD_HASHING_MAX_ROUNDS,
+    )
+    print(f"{'rounds':<8}{'hash ms':>10}{'verify ms':>11}")
+    for rounds, result in results.items():
+        marker = "  <- calibrated" if rounds == calibrated else ""
+        print(
+            f"{rounds:<8}{result['hash_ms']:>10.1f}{result['verify_ms']:>11.1f}"
+            f"{marker}"
+        )
+    print(
+        f"calibrated: {calibrated} rounds for a budget of"
+        f" {SETTINGS.PASSWORD_HASHING_TARGET_SECONDS * 1000:.0f} ms"
+    )
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "repeat": args.repeat,
+        "target_seconds": SETTINGS.PASSWORD_HASHING_TARGET_SECONDS,
+        "calibrated_rounds": calibrated,
+        "results": {str(rounds): result for rounds, result in results.items()},
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Seed SQLite databases with millions of synthetic users.
+
+Run from the repository root::
+
+    python -m benchmarks.seed db.sqlite3 --users 1000000
+
+Creating users through ``crud.user.create`` costs a bcrypt hash and a commit per
+row. The seeder instead shares one precomputed hash between all users, builds
+rows in batches from small pools of mimesis values and inserts them with
+``executemany`` while journaling and syncing are off. Named indexes of the seeded
+tables are dropped during the load and rebuilt once at the end.
+
+Usernames are derived from the row number (:func:`username`), so benchmarks can
+address any seeded user without querying for it.
+"""
+
+import argparse
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+BATCH_SIZE = 50_000
+PASSWORD = "bench-password"
+SEEDED_TABLES = ("user_account", "user_role")
+
+# Prime pool sizes, so combined pools repeat only after their product.
+FIRST_NAMES = 211
+LAST_NAMES = 223
+TIMESTAMPS = 10_007
+
+
+def username(index: int) -> str:
+    """Username of the ``index``-th seeded user."""
+    return f"user{index:07d}@bench-users.com"
+
+
+def phone_number(index: int) -> str:
+    """Phone number of the ``index``-th seeded user, unique below 10M users."""
+    return f"+1555{index:07d}"
+
+
+def _pools(seed: int) -> tuple[list[str], list[str], list[str]]:
+    """Pools of first names, last names and timestamps of the last 3 years."""
+    from mimesis import Locale, Person
+
+    person = Person(Locale.EN, seed=seed)
+    first_names = [person.first_name() for _ in range(FIRST_NAMES)]
+    last_names = [person.last_name() for _ in range(LAST_NAMES)]
+    now = datetime.utcnow()
+    timestamps = [
+        (now - timedelta(seconds=person.random.randint(0, 3 * 365 * 86_400))).isoformat(
+            sep=" "
+        )
+        for _ in range(TIMESTAMPS)
+    ]
+    return first_names, last_names, timestamps
+
+
+def _status(index: int) -> str:
+    """Status of the ``index``-th user, 1 in 50 pending and 1 in 20 deactivated."""
+    if index % 50 == 1:
+        return "PENDING"
+    if index % 20 == 3:
+        return "DEACTIVATE"
+    return "ACTIVE"
+
+
+def seed_users(
+    path: Path,
+    users: int,
+    *,
+    admin_every: int = 1000,
+    batch_size: int = BATCH_SIZE,
+    seed: int = 0,
+) -> None:
+    """Create a database with ``users`` synthetic users sharing one password hash.
+
+    Users are appended to an existing database, numbering continues after the
+    users that are already there.
+
+    Args:
+        path (Path): database file, created if missing.
+        users (int): number of users to add.
+        admin_every (int, optional): every n-th user is also an admin.
+            Defaults to 1000.
+        batch_size (int, optional): rows per ``executemany``. Defaults to 50000.
+        seed (int, optional): seed of generated values. Defaults to 0.
+    """
+    from sqlalchemy import create_engine
+
+    from fastapi_user_management.models.base import Base
+    from fastapi_user_management.models.role import RoleNames
+    from fastapi_user_management.models.user import UserModel  # noqa: F401
+    from fastapi_user_management.tools.encryption import get_password_hash
+
+    engine = create_engine(f"sqlite+pysqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    password = get_password_hash(PASSWORD)
+    user_mask, admin_mask = 1 << RoleNames.USER.bit, 1 << RoleNames.ADMIN.bit
+    first_names, last_names, timestamps = _pools(seed)
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("PRAGMA cache_size = -262144")
+        connection.execute("PRAGMA temp_store = MEMORY")
+        connection.execute("BEGIN")
+        indexes = connection.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index'"
+            f" AND sql IS NOT NULL AND tbl_name IN {SEEDED_TABLES}"
+        ).fetchall()
+        for name, _ in indexes:
+            connection.execute(f'DROP INDEX "{name}"')
+
+        connection.execute(
+            "INSERT OR IGNORE INTO role (name) VALUES ('ADMIN'), ('USER')"
+        )
+        role_ids = dict(connection.execute("SELECT name, id FROM role"))
+        (first,) = connection.execute(
+            "SELECT count(*) FROM user_account WHERE username LIKE 'user%@bench-users.com'"
+        ).fetchone()
+        for start in range(first, first + users, batch_size):
+            indices = range(start, min(start + batch_size, first + users))
+            (first_id,) = connection.execute(
+                "SELECT coalesce(max(id), 0) + 1 FROM user_account"
+            ).fetchone()
+            statuses = [_status(i) for i in indices]
+            created = [timestamps[i % TIMESTAMPS] for i in indices]
+            connection.executemany(
+                "INSERT INTO user_account (id, fullname, username, password,"
+                " phone_number, last_login, created_at, status, role_mask)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                zip(
+                    range(first_id, first_id + len(indices)),
+                    [
+                        f"{first_names[i % FIRST_NAMES]}"
+                        f" {last_names[i // FIRST_NAMES % LAST_NAMES]}"
+                        for i in indices
+                    ],
+                    [username(i) for i in indices],
+                    [password] * len(indices),
+                    [phone_number(i) for i in indices],
+                    [
+                        (
+                            None
+                            if status == "PENDING"
+                            else max(created_at, timestamps[i * 7 % TIMESTAMPS])
+                        )
+                        for i, created_at, status in zip(indices, created, statuses)
+                    ],
+                    created,
+                    statuses,
+                    [
+                        user_mask | admin_mask if i % admin_every == 0 else user_mask
+                        for i in indices
+                    ],
+                ),
+            )
+            user_ids = range(first_id, first_id + len(indices))
+            connection.executemany(
+                "INSERT INTO user_role (user_id, role_id) VALUES (?, ?)",
+                zip(user_ids, [role_ids["USER"]] * len(indices)),
+            )
+            connection.executemany(
+                "INSERT INTO user_role (user_id, role_id) VALUES (?, ?)",
+                (
+                    (user_id, role_ids["ADMIN"])
+                    for user_id in islice(
+                        user_ids, -start % admin_every, None, admin_every
+                    )
+                ),
+            )
+
+        for _, sql in indexes:
+            connection.execute(sql)
+        connection.execute("COMMIT")
+        connection.execute("REINDEX")
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+
+def main() -> None:
+    """Seed the database given on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("database", type=Path, help="SQLite database file")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument(
+        "--admin-every", type=int, default=1000, help="every n-th user is an admin"
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    seed_users(
+        args.database,
+        args.users,
+        admin_every=args.admin_every,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"seeded {args.users} users in {elapsed:.1f}s ({args.users / elapsed:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Serialization cost of user listings by JSON pipeline.
+
+Run from the repository root::
+
+    python -m benchmarks.serialization --users 10000
+
+``--users`` users (ORM rows, not persisted) are serialized ``--repeat`` times by
+each pipeline, the best time is reported:
+
+* ``encoder``: one model per row, ``jsonable_encoder`` and ``json``, like
+  ``CRUDBase`` and pydantic v1 era responses.
+* ``json_response``: what a route returning the rows does with the default
+  ``JSONResponse``, validate and dump the ``response_model`` in JSON mode, then
+  ``json.dumps``.
+* ``orjson_response``: the same with ``ORJSONResponse``, the app default.
+* ``adapter_json``: ``USER_LIST`` validates and writes JSON bytes directly.
+* ``from_row``: ``UserBase.from_row`` skips validating stored values (mostly
+  the email check of every username), ``USER_LIST`` writes JSON bytes. This is
+  the path of the admin listings.
+"""
+
+import argparse
+import json
+import platform
+import time
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+
+def users(count: int) -> list[Any]:
+    """Transient user rows with both roles every tenth user."""
+    from fastapi_user_management.models.user import UserModel, UserStatusValues
+
+    return [
+        UserModel(
+            fullname=f"Bench User {i}",
+            username=f"user{i:07d}@bench-users.com",
+            password="x",
+            status=UserStatusValues.ACTIVE,
+            role_mask=0b11 if i % 10 == 0 else 0b10,
+            created_at=datetime.utcnow(),
+        )
+        for i in range(count)
+    ]
+
+
+def pipelines() -> dict[str, Callable[[list[Any]], bytes]]:
+    """Serializers of a list of rows to JSON bytes."""
+    from fastapi_user_management.schemas.user import USER_LIST, UserBase
+
+    def encoder(rows: list[Any]) -> bytes:
+        content = jsonable_encoder([UserBase.model_validate(row) for row in rows])
+        return json.dumps(content).encode()
+
+    def json_response(rows: list[Any]) -> bytes:
+        content = USER_LIST.dump_python(USER_LIST.validate_python(rows), mode="json")
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode()
+
+    def orjson_response(rows: list[Any]) -> bytes:
+        content = USER_LIST.dump_python(USER_LIST.validate_python(rows), mode="json")
+        return orjson.dumps(content)
+
+    def adapter_json(rows: list[Any]) -> bytes:
+        return USER_LIST.dump_json(USER_LIST.validate_python(rows))
+
+    def from_row(rows: list[Any]) -> bytes:
+        return USER_LIST.dump_json([UserBase.from_row(row) for row in rows])
+
+    return {
+        "encoder": encoder,
+        "json_response": json_response,
+        "orjson_response": orjson_response,
+        "adapter_json": adapter_json,
+        "from_row": from_row,
+    }
+
+
+def main() -> None:
+    """Time every pipeline and print a comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--output", type=Path, default=Path("serialization_results.json")
+    )
+    args = parser.parse_args()
+
+    rows = users(args.users)
+    results = {}
+    for name, serialize in pipelines().items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            body = serialize(rows)
+            timings.append(time.perf_counter() - start)
+        assert len(orjson.loads(body)) == args.users
+        results[name] = {"best_ms": min(timings) * 1000, "bytes": len(body)}
+
+    baseline = results["encoder"]["best_ms"]
+    print(f"{'pipeline':<17}{'best ms':>10}{'speedup':>9}{'bytes':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<17}{result['best_ms']:>10.1f}"
+            f"{baseline / result['best_ms']:>8.1f}x{result['bytes']:>10}"
+        )
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "users": args.users,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Write throughput of hash-sharded user storage by shard count.
+
+Run from the repository root::
+
+    python -m benchmarks.sharding --shards 1 2 4 --threads 8
+
+For every shard count, ``--threads`` threads create users for ``--seconds``
+through :class:`~fastapi_user_management.core.sharding.UserShardedSession`, one
+user with its role per transaction, on fresh SQLite shards using a storage
+profile of ``settings.yaml``. A SQLite database has a single writer, so with one
+shard the threads queue for its lock; more shards let them commit in parallel.
+Passwords are a precomputed hash, the benchmark measures storage only.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+
+def run_shards(shards: int, threads: int, seconds: float, profile_name: str) -> dict:
+    """Create users on ``shards`` fresh shards for ``seconds``."""
+    from fastapi_user_management import crud
+    from fastapi_user_management.core.database import (
+        create_database_engine,
+        storage_profile,
+    )
+    from fastapi_user_management.core.permissions import DEFAULT_ROLE_PERMISSIONS
+    from fastapi_user_management.core.sharding import UserShardedSession, pin_shard
+    from fastapi_user_management.models.base import Base
+    from fastapi_user_management.models.role import RoleModel, RoleNames
+    from fastapi_user_management.models.user import UserModel
+    from fastapi_user_management.tools.encryption import get_password_hash
+
+    profile = storage_profile(profile_name)
+    password = get_password_hash("bench-password")
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = {
+            str(i): create_database_engine(
+                f"sqlite+pysqlite:///{Path(tmp) / f'shard{i}.sqlite3'}", profile
+            )
+            for i in range(shards)
+        }
+        for engine in engines.values():
+            Base.metadata.create_all(engine)
+            with Session(engine) as session:
+                crud.permission.sync(session, grants=DEFAULT_ROLE_PERMISSIONS)
+        sessions = sessionmaker(
+            class_=UserShardedSession, shards=engines, expire_on_commit=False
+        )
+        counter = itertools.count()
+        stop = threading.Event()
+        created = [0] * threads
+        errors = [0] * threads
+
+        def worker(index: int) -> None:
+            with sessions() as db:
+                while not stop.is_set():
+                    username = f"user{next(counter):07d}@bench-users.com"
+                    pin_shard(db, username)
+                    role = db.scalars(
+                        select(RoleModel).where(RoleModel.name == RoleNames.USER)
+                    ).one()
+                    db.add(
+                        UserModel(
+                            fullname="Bench User",
+                            username=username,
+                            password=password,
+                            created_at=datetime.utcnow(),
+                            roles=[role],
+                        )
+                    )
+                    try:
+                        db.commit()
+                        created[index] += 1
+                    except OperationalError:
+                        db.rollback()
+                        errors[index] += 1
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        for engine in engines.values():
+            engine.dispose()
+    return {"users_per_s": sum(created) / elapsed, "errors": sum(errors)}
+
+
+def main() -> None:
+    """Run every requested shard count and print a comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument(
+        "--profile", default="durable", help="storage profile of settings.yaml"
+    )
+    parser.add_argument("--output", type=Path, default=Path("sharding_results.json"))
+    args = parser.parse_args()
+
+    results = {
+        str(shards): run_shards(shards, args.threads, args.seconds, args.profile)
+        for shards in args.shards
+    }
+    print(f"{'shards':>7}{'users/s':>12}{'errors':>8}")
+    for shards, result in results.items():
+        print(f"{shards:>7}{result['users_per_s']:>12.1f}{result['errors']:>8}")
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "threads": args.threads,
+        "seconds": args.seconds,
+        "profile": args.profile,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Read/write throughput of the SQLite storage profiles of ``settings.yaml``.
+
+Run from the repository root::
+
+    python -m benchmarks.storage_profiles --users 100000 --threads 8
+
+Every profile runs on its own copy of a seeded database (cached in
+``benchmarks/.data``). Threads use engines built by
+:func:`~fastapi_user_management.core.database.create_database_engine` and run
+three workloads for ``--seconds`` each:
+
+* ``read``: every thread looks users up by username.
+* ``write``: every thread updates one user per transaction.
+* ``mixed``: one writer thread, the other threads read.
+
+Operations that fail with ``database is locked`` are counted as errors.
+"""
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.http_load import database
+from benchmarks.seed import username
+
+Operation = Callable[[Connection, random.Random], None]
+
+
+def read(connection: Connection, rng: random.Random, users: int) -> None:
+    """Look up a random user."""
+    connection.exec_driver_sql(
+        "SELECT id, fullname, status FROM user_account WHERE username = ?",
+        (username(rng.randrange(users)),),
+    ).all()
+
+
+def write(connection: Connection, rng: random.Random, users: int) -> None:
+    """Rename a random user in its own transaction."""
+    with connection.begin():
+        connection.exec_driver_sql(
+            "UPDATE user_account SET fullname = ? WHERE username = ?",
+            (f"Renamed {rng.random()}", username(rng.randrange(users))),
+        )
+
+
+def run_threads(
+    engine: Engine, operations: list[Operation], seconds: float
+) -> list[dict[str, float]]:
+    """Run one thread per operation for ``seconds``, count operations and errors."""
+    stop = threading.Event()
+    counts = [{"ops": 0, "errors": 0} for _ in operations]
+
+    def worker(index: int, operation: Operation) -> None:
+        rng = random.Random(index)
+        with engine.connect() as connection:
+            while not stop.is_set():
+                try:
+                    operation(connection, rng)
+                    counts[index]["ops"] += 1
+                except OperationalError:
+                    connection.rollback()
+                    counts[index]["errors"] += 1
+
+    threads = [
+        threading.Thread(target=worker, args=(i, operation))
+        for i, operation in enumerate(operations)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return [
+        {"ops_per_s": count["ops"] / seconds, "errors": count["errors"]}
+        for count in counts
+    ]
+
+
+def total(results: list[dict[str, float]]) -> dict[str, float]:
+    """Sum of the results of several threads."""
+    return {
+        "ops_per_s": sum(result["ops_per_s"] for result in results),
+        "errors": sum(result["errors"] for result in results),
+    }
+
+
+def run_profile(
+    name: str, users: int, threads: int, seconds: float
+) -> dict[str, dict[str, float]]:
+    """Run the workloads with a storage profile on a copy of the seeded database."""
+    from fastapi_user_management.core.database import (
+        create_database_engine,
+        storage_profile,
+    )
+
+    profile = storage_profile(name)
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / "bench.sqlite3"
+        shutil.copyfile(database(users), copy)
+        engine = create_database_engine(f"sqlite+pysqlite:///{copy}", profile)
+        try:
+
+            def reader(connection: Connection, rng: random.Random) -> None:
+                read(connection, rng, users)
+
+            def writer(connection: Connection, rng: random.Random) -> None:
+                write(connection, rng, users)
+
+            mixed = run_threads(engine, [writer] + [reader] * (threads - 1), seconds)
+            return {
+                "read": total(run_threads(engine, [reader] * threads, seconds)),
+                "write": total(run_threads(engine, [writer] * threads, seconds)),
+                "mixed_write": mixed[0],
+                "mixed_read": total(mixed[1:]),
+            }
+        finally:
+            engine.dispose()
+
+
+def main() -> None:
+    """Run every requested storage profile and print a comparison."""
+    from fastapi_user_management.config import SETTINGS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--profiles", nargs="+", default=list(SETTINGS.DATABASE_STORAGE_PROFILES)
+    )
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument(
+        "--output", type=Path, default=Path("storage_profiles_results.json")
+    )
+    args = parser.parse_args()
+    if args.threads < 2:
+        parser.error("--threads must be at least 2, mixed runs a writer and readers")
+
+    results = {
+        name: run_profile(name, args.users, args.threads, args.seconds)
+        for name in args.profiles
+    }
+    print(f"{'profile':<12}{'workload':<14}{'ops/s':>10}{'errors':>8}")
+    for name, workloads in results.items():
+        for workload, result in workloads.items():
+            print(
+                f"{name:<12}{workload:<14}{result['ops_per_s']:>10.1f}"
+                f"{result['errors']:>8}"
+            )
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "users": args.users,
+        "threads": args.threads,
+        "seconds": args.seconds,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
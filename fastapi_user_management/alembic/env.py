@@ -15,8 +15,16 @@ if config.config_file_name is not None:
 # add your model's MetaData object here
 # for 'autogenerate' support
 from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.dicom_series import DicomSeriesModel  # noqa: F401
+from fastapi_user_management.models.idempotency_key import IdempotencyKeyModel  # noqa: F401
+from fastapi_user_management.models.job import JobModel  # noqa: F401
+from fastapi_user_management.models.permission import PermissionModel  # noqa: F401
+from fastapi_user_management.models.revoked_token import RevokedTokenModel  # noqa: F401
 from fastapi_user_management.models.role import RoleModel  # noqa: F401
+from fastapi_user_management.models.role_permission import RolePermissionModel  # noqa: F401
+from fastapi_user_management.models.table_version import TableVersionModel  # noqa: F401
 from fastapi_user_management.models.user import UserModel  # noqa: F401
+from fastapi_user_management.models.user_archive import ArchivedUserModel  # noqa: F401
 from fastapi_user_management.models.user_role import UserRoleModel  # noqa: F401
 
 target_metadata = Base.metadata
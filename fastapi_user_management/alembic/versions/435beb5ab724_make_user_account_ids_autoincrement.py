@@ -0,0 +1,36 @@
+"""Make user_account ids AUTOINCREMENT, SQLite never reuses them.
+
+Revision ID: 435beb5ab724
+Revises: db04ecdee6dd
+Create Date: 2026-10-19 12:18:18.794769
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "435beb5ab724"
+down_revision: str | None = "db04ecdee6dd"
+branch_labels: str | (Sequence[str] | None) = None
+depends_on: str | (Sequence[str] | None) = None
+
+
+def upgrade() -> None:
+    # SQLite can't alter a primary key, the table is copied
+    with op.batch_alter_table(
+        "user_account",
+        recreate="always",
+        table_kwargs={"sqlite_autoincrement": True},
+    ):
+        pass
+
+
+def downgrade() -> None:
+    with op.batch_alter_table(
+        "user_account",
+        recreate="always",
+        table_kwargs={"sqlite_autoincrement": False},
+    ):
+        pass
@@ -4,19 +4,86 @@ Authors: pejmans21
 Date: July 6, 2023
 """
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from fastapi_user_management import crud
 from fastapi_user_management.config import SETTINGS
-from fastapi_user_management.core.database import engine
+from fastapi_user_management.core.database import SessionLocal, shard_engines
+from fastapi_user_management.core.idempotency import (
+    IdempotencyMiddleware,
+    idempotency_store,
+)
 from fastapi_user_management.core.init_db import init_db
+from fastapi_user_management.core.jobs import job_queue
+from fastapi_user_management.core.loop_monitor import (
+    LoopMonitorMiddleware,
+    loop_monitor,
+)
+from fastapi_user_management.core.permissions import DEFAULT_ROLE_PERMISSIONS
+from fastapi_user_management.core.profiling import ProfilingMiddleware
+from fastapi_user_management.core.response_cache import response_cache
+from fastapi_user_management.core.revocation import token_revocations
+from fastapi_user_management.core.user_directory import snapshot_builder
+from fastapi_user_management.core.username_filter import username_filter
 from fastapi_user_management.models.base import Base
-from fastapi_user_management.routes import admin, auth
+from fastapi_user_management.routes import admin, auth, diagnostics, dicom, jobs
+from fastapi_user_management.tools.dicom_ingest import shutdown_executor
+from fastapi_user_management.tools.encryption import configure_from_settings
 
 
 def create_db_and_tables() -> None:
-    """Create db and tables."""
-    Base.metadata.create_all(engine)
+    """Create db and tables, on every shard when users are sharded."""
+    for shard_engine in shard_engines.values():
+        Base.metadata.create_all(shard_engine)
+
+
+def on_startup() -> None:
+    """Initiate database on startup."""
+    # before the admin user is created, its password is hashed with it
+    configure_from_settings()
+    create_db_and_tables()
+    # roles and permissions are reference data every shard has a copy of
+    for shard_engine in shard_engines.values():
+        with Session(bind=shard_engine) as session:
+            crud.permission.sync(session, grants=DEFAULT_ROLE_PERMISSIONS)
+    with SessionLocal() as session:
+        init_db(db=session)
+        if username_filter is not None:
+            username_filter.rebuild(session)
+        token_revocations.rebuild(session)
+    # entries of shared backends may predate writes made while the app was down
+    response_cache.backend.clear()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Initiate database and start background work, stop it on shutdown.
+
+    Args:
+        app (FastAPI): application.
+    """
+    on_startup()
+    if SETTINGS.LOOP_MONITOR_ENABLED:
+        await loop_monitor.start()
+    if SETTINGS.USER_DIRECTORY_ENABLED and SETTINGS.USER_DIRECTORY_BUILD_INTERVAL:
+        await snapshot_builder.start()
+    # jobs queued before a restart are resumed by the workers
+    job_queue.start()
+    try:
+        yield
+    finally:
+        # waits for running jobs to reach their next report
+        await run_in_threadpool(job_queue.stop)
+        await snapshot_builder.stop()
+        await loop_monitor.stop()
+        # stop worker processes
+        shutdown_executor()
 
 
 app = FastAPI(
@@ -24,15 +91,27 @@ app = FastAPI(
     description=SETTINGS.DESCRIPTION,
     docs_url=SETTINGS.DOCS_URL,
     redoc_url=SETTINGS.REDOC_URL,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
-
-@app.on_event("startup")
-def on_startup() -> None:
-    """Initiate database on startup."""
-    create_db_and_tables()
-    with Session(bind=engine) as session:
-        init_db(db=session)
+if SETTINGS.LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopMonitorMiddleware, monitor=loop_monitor)
+if SETTINGS.IDEMPOTENCY_ENABLED:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=idempotency_store,
+        paths=SETTINGS.IDEMPOTENCY_PATHS,
+        max_body_bytes=SETTINGS.IDEMPOTENCY_MAX_BODY_BYTES,
+    )
+if SETTINGS.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        mode=SETTINGS.PROFILING_MODE,
+        interval=SETTINGS.PROFILING_INTERVAL,
+        sample_rate=SETTINGS.PROFILING_SAMPLE_RATE,
+        output_dir=SETTINGS.PROFILING_OUTPUT_DIR,
+    )
 
 
 @app.get("/")
@@ -47,3 +126,6 @@ def main() -> dict[str, str]:
 
 app.include_router(admin.router)
 app.include_router(auth.router)
+app.include_router(diagnostics.router)
+app.include_router(dicom.router)
+app.include_router(jobs.router)
@@ -1,7 +1,9 @@
 """Fastapi application config."""
 
+from typing import Any
+
 from omegaconf import OmegaConf
-from pydantic import EmailStr
+from pydantic import EmailStr, Field
 from pydantic_settings import BaseSettings
 
 from fastapi_user_management import __version__
@@ -26,8 +28,95 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = (
         APP_CUSTOM_CONFIG.fastapi.access_token_expire_minutes
     )
+    REVOCATION_REBUILD_INTERVAL: float = (
+        APP_CUSTOM_CONFIG.fastapi.revocation_rebuild_interval
+    )
+    REVOCATION_ERROR_RATE: float = APP_CUSTOM_CONFIG.fastapi.revocation_error_rate
+    PRINCIPAL_CACHE_TTL: float = APP_CUSTOM_CONFIG.fastapi.principal_cache_ttl
+    BATCH_MAX_OPERATIONS: int = APP_CUSTOM_CONFIG.fastapi.batch_max_operations
 
     DATABASE_URI: str = APP_CUSTOM_CONFIG.database.uri
+    DATABASE_READ_ROUTING: bool = APP_CUSTOM_CONFIG.database.read_routing
+    DATABASE_READ_REPLICAS: list[str] = list(APP_CUSTOM_CONFIG.database.read_replicas)
+    DATABASE_SHARDS: list[str] = list(APP_CUSTOM_CONFIG.database.shards)
+    DATABASE_STORAGE_PROFILE: str = APP_CUSTOM_CONFIG.database.storage_profile
+    DATABASE_STORAGE_PROFILES: dict[str, dict[str, Any]] = OmegaConf.to_container(
+        APP_CUSTOM_CONFIG.storage_profiles
+    )
+
+    DICOM_INGEST_WORKERS: int = APP_CUSTOM_CONFIG.dicom.ingest_workers
+    DICOM_INGEST_BATCH_SIZE: int = APP_CUSTOM_CONFIG.dicom.ingest_batch_size
+    DICOM_INGEST_HEAD_BYTES: int = APP_CUSTOM_CONFIG.dicom.ingest_head_bytes
+    DICOM_UPSERT_CHUNK_SIZE: int = APP_CUSTOM_CONFIG.dicom.upsert_chunk_size
+
+    RESPONSE_CACHE_BACKEND: str = APP_CUSTOM_CONFIG.response_cache.backend
+    RESPONSE_CACHE_MAX_ENTRIES: int = APP_CUSTOM_CONFIG.response_cache.max_entries
+    RESPONSE_CACHE_MAX_BYTES: int = APP_CUSTOM_CONFIG.response_cache.max_bytes
+    RESPONSE_CACHE_TTL: float = APP_CUSTOM_CONFIG.response_cache.ttl
+    RESPONSE_CACHE_PATH: str = APP_CUSTOM_CONFIG.response_cache.path
+    RESPONSE_CACHE_MMAP_PATH: str = APP_CUSTOM_CONFIG.response_cache.mmap_path
+
+    USERNAME_FILTER_ENABLED: bool = APP_CUSTOM_CONFIG.username_filter.enabled
+    USERNAME_FILTER_ERROR_RATE: float = APP_CUSTOM_CONFIG.username_filter.error_rate
+    USERNAME_FILTER_SYNC_INTERVAL: float = (
+        APP_CUSTOM_CONFIG.username_filter.sync_interval
+    )
+    USERNAME_FILTER_REBUILD_INTERVAL: float = (
+        APP_CUSTOM_CONFIG.username_filter.rebuild_interval
+    )
+
+    USER_DIRECTORY_ENABLED: bool = APP_CUSTOM_CONFIG.user_directory.enabled
+    USER_DIRECTORY_PATH: str = APP_CUSTOM_CONFIG.user_directory.path
+    USER_DIRECTORY_REFRESH_INTERVAL: float = (
+        APP_CUSTOM_CONFIG.user_directory.refresh_interval
+    )
+    USER_DIRECTORY_MAX_AGE: float = APP_CUSTOM_CONFIG.user_directory.max_age
+    USER_DIRECTORY_BUILD_INTERVAL: float = (
+        APP_CUSTOM_CONFIG.user_directory.build_interval
+    )
+
+    JOBS_WORKERS: int = APP_CUSTOM_CONFIG.jobs.workers
+    JOBS_POLL_INTERVAL: float = APP_CUSTOM_CONFIG.jobs.poll_interval
+    JOBS_STALE_AFTER: float = APP_CUSTOM_CONFIG.jobs.stale_after
+    JOBS_MAX_OPERATIONS: int = APP_CUSTOM_CONFIG.jobs.max_operations
+    JOBS_CHUNK_SIZE: int = APP_CUSTOM_CONFIG.jobs.chunk_size
+    JOBS_CHUNK_SECONDS: float = APP_CUSTOM_CONFIG.jobs.chunk_seconds
+
+    ARCHIVE_AFTER_DAYS: float = APP_CUSTOM_CONFIG.archive.after_days
+    ARCHIVE_BATCH_SIZE: int = APP_CUSTOM_CONFIG.archive.batch_size
+    ARCHIVE_DUTY_CYCLE: float = Field(
+        APP_CUSTOM_CONFIG.archive.duty_cycle, gt=0, le=1
+    )
+
+    PASSWORD_HASHING_ROUNDS: int = APP_CUSTOM_CONFIG.password_hashing.rounds
+    PASSWORD_HASHING_CALIBRATE: bool = APP_CUSTOM_CONFIG.password_hashing.calibrate
+    PASSWORD_HASHING_TARGET_SECONDS: float = (
+        APP_CUSTOM_CONFIG.password_hashing.target_seconds
+    )
+    PASSWORD_HASHING_MIN_ROUNDS: int = APP_CUSTOM_CONFIG.password_hashing.min_rounds
+    PASSWORD_HASHING_MAX_ROUNDS: int = APP_CUSTOM_CONFIG.password_hashing.max_rounds
+    PASSWORD_HASHING_REHASH_ON_LOGIN: bool = (
+        APP_CUSTOM_CONFIG.password_hashing.rehash_on_login
+    )
+
+    IDEMPOTENCY_ENABLED: bool = APP_CUSTOM_CONFIG.idempotency.enabled
+    IDEMPOTENCY_PATHS: list[str] = list(APP_CUSTOM_CONFIG.idempotency.paths)
+    IDEMPOTENCY_TTL: float = APP_CUSTOM_CONFIG.idempotency.ttl
+    IDEMPOTENCY_MAX_ENTRIES: int = APP_CUSTOM_CONFIG.idempotency.max_entries
+    IDEMPOTENCY_LOCK_TIMEOUT: float = APP_CUSTOM_CONFIG.idempotency.lock_timeout
+    IDEMPOTENCY_MAX_BODY_BYTES: int = APP_CUSTOM_CONFIG.idempotency.max_body_bytes
+
+    PROFILING_ENABLED: bool = APP_CUSTOM_CONFIG.profiling.enabled
+    PROFILING_MODE: str = APP_CUSTOM_CONFIG.profiling.mode
+    PROFILING_INTERVAL: float = APP_CUSTOM_CONFIG.profiling.interval
+    PROFILING_SAMPLE_RATE: float = APP_CUSTOM_CONFIG.profiling.sample_rate
+    PROFILING_OUTPUT_DIR: str = APP_CUSTOM_CONFIG.profiling.output_dir
+
+    LOOP_MONITOR_ENABLED: bool = APP_CUSTOM_CONFIG.monitoring.loop_monitor_enabled
+    LOOP_LAG_INTERVAL: float = APP_CUSTOM_CONFIG.monitoring.loop_lag_interval
+    LOOP_STALL_THRESHOLD: float = APP_CUSTOM_CONFIG.monitoring.loop_stall_threshold
+    LOOP_LAG_WINDOW: int = APP_CUSTOM_CONFIG.monitoring.loop_lag_window
+    LOOP_MAX_STALLS: int = APP_CUSTOM_CONFIG.monitoring.loop_max_stalls
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,70 @@
+"""Archival of long-deactivated users to cold tables.
+
+Deactivated users pile up in ``user_account`` and make its indexes, scanned by
+logins, lookups and listings, larger than the active users need. Users
+deactivated, and unchanged since, for ``archive.after_days`` days are moved with
+their ``user_role`` rows to ``user_account_archive`` and ``user_role_archive``
+on the same database (shard), ``GET /admin/archived-users`` lists them.
+
+* Archival runs as a background job (``POST /admin/jobs/archive-users``) or from
+  ``python -m fastapi_user_management.tools.archive_users``.
+* Users are moved in batches of ``archive.batch_size``, each batch is one short
+  transaction. After each batch the archiver sleeps so that it holds the
+  database for at most ``archive.duty_cycle`` of the time, requests writing
+  meanwhile don't wait for it long.
+* Archived users are restored transparently: admin endpoints updating or
+  deleting a user restore it first (``crud.user.get_or_restore``), reading its
+  profile answers 404 without restoring it. Their usernames stay taken,
+  creating a user with one fails with 409.
+"""
+
+import time
+from collections.abc import Callable
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from fastapi_user_management import crud
+from fastapi_user_management.core.sharding import shard_bind_arguments
+
+
+def archive_deactivated(
+    db: Session,
+    *,
+    deactivated_before: datetime,
+    batch_size: int,
+    duty_cycle: float,
+    report: Callable[[int], None] | None = None,
+) -> int:
+    """Archive every user deactivated before a time, batch by batch.
+
+    Args:
+        db (Session): database session.
+        deactivated_before (datetime): users deactivated, and unchanged since,
+            before this time are archived.
+        batch_size (int): users moved per transaction.
+        duty_cycle (float): largest fraction of the time spent in batches,
+            above 0, 1 never sleeps.
+        report (Callable[[int], None] | None, optional): called with the number
+            of users archived so far after every batch. Defaults to None.
+
+    Returns:
+        int: number of archived users.
+    """
+    archived = 0
+    for bind in shard_bind_arguments(db).values():
+        while True:
+            started = time.monotonic()
+            moved = crud.user_archive.archive(
+                db,
+                deactivated_before=deactivated_before,
+                limit=batch_size,
+                bind_arguments=bind,
+            )
+            archived += moved
+            if moved and report is not None:
+                report(archived)
+            if moved < batch_size:
+                break
+            time.sleep((time.monotonic() - started) * (1 - duty_cycle) / duty_cycle)
+    return archived
@@ -1,27 +1,321 @@
-"""DataBase Session maker."""
-from collections.abc import Generator
+"""DataBase Session maker.
+
+Sessions check a connection out of the pool on their first query and give it
+back when the transaction ends. Objects are not expired on commit, so a unit of
+work can commit (or :func:`release` a read-only transaction) early and keep using
+what it loaded without checking a connection out again, e.g. while hashing
+passwords or serializing the response.
+"""
+import random
+from collections.abc import AsyncGenerator, Sequence
+from dataclasses import dataclass
 from typing import Any
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import (
+    Connection,
+    Engine,
+    Select,
+    TextClause,
+    UpdateBase,
+    create_engine,
+    event,
+    make_url,
+)
+from sqlalchemy.orm import Session, sessionmaker
 
 from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.sharding import HOME_SHARD, UserShardedSession
 
-engine = create_engine(
-    SETTINGS.DATABASE_URI, pool_pre_ping=True, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+SYNCHRONOUS_LEVELS = ("off", "normal", "full", "extra")
+# statements run without beginning a transaction on SQLite
+READ_STATEMENTS = ("SELECT", "PRAGMA", "EXPLAIN")
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """SQLite PRAGMAs set on every connection and connection pool sizing.
+
+    Presets live in the ``storage_profiles`` section of ``settings.yaml``.
+    """
+
+    journal_mode: str = "delete"
+    synchronous: str = "full"
+    mmap_size: int = 0
+    cache_size: int = -2000
+    busy_timeout: int = 5000
+    pool_size: int = 5
+    max_overflow: int = 10
+
+    def __post_init__(self) -> None:
+        """Reject values that aren't valid PRAGMA arguments."""
+        if self.journal_mode.lower() not in JOURNAL_MODES:
+            raise ValueError(f"unknown journal_mode {self.journal_mode!r}")
+        if self.synchronous.lower() not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"unknown synchronous level {self.synchronous!r}")
+
+    def pragmas(self, *, read_only: bool = False) -> list[str]:
+        """PRAGMA statements of the profile.
+
+        Args:
+            read_only (bool, optional): connection can't write, the journal mode
+                (stored in the database file) is left as the writer set it.
+                Defaults to False.
+
+        Returns:
+            list[str]: statements to run on a new connection.
+        """
+        pragmas = [] if read_only else [f"PRAGMA journal_mode = {self.journal_mode}"]
+        return pragmas + [
+            f"PRAGMA synchronous = {self.synchronous}",
+            f"PRAGMA mmap_size = {int(self.mmap_size)}",
+            f"PRAGMA cache_size = {int(self.cache_size)}",
+            f"PRAGMA busy_timeout = {int(self.busy_timeout)}",
+        ]
+
+
+def storage_profile(name: str) -> StorageProfile:
+    """Storage profile preset of ``settings.yaml``.
+
+    Args:
+        name (str): preset name.
+
+    Raises:
+        ValueError: no preset with that name.
+
+    Returns:
+        StorageProfile: preset values, missing keys use SQLite defaults.
+    """
+    try:
+        return StorageProfile(**SETTINGS.DATABASE_STORAGE_PROFILES[name])
+    except KeyError as e:
+        raise ValueError(f"unknown storage profile {name!r}") from e
+
+
+def create_database_engine(
+    uri: str, profile: StorageProfile, *, read_only: bool = False
+) -> Engine:
+    """Engine applying a storage profile to every SQLite connection it opens.
+
+    Args:
+        uri (str): database URI.
+        profile (StorageProfile): PRAGMAs and pool sizing.
+        read_only (bool, optional): engine of a read-only database.
+            Defaults to False.
+
+    Returns:
+        Engine: configured engine.
+    """
+    url = make_url(uri)
+    sqlite = url.get_backend_name() == "sqlite"
+    options: dict[str, Any] = {"pool_pre_ping": True}
+    if sqlite:
+        options["connect_args"] = {"check_same_thread": False}
+    # in-memory SQLite databases live in a single connection, not a sized pool
+    if not sqlite or url.database not in (None, "", ":memory:"):
+        options.update(pool_size=profile.pool_size, max_overflow=profile.max_overflow)
+    engine = create_engine(url, **options)
+    if sqlite:
+        pragmas = profile.pragmas(read_only=read_only)
+
+        @event.listens_for(engine, "connect")
+        def set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+            # pysqlite only begins transactions before DML, a SAVEPOINT opened
+            # first would become the transaction and be committed by its RELEASE
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def begin_before_write(
+            connection: Connection,
+            cursor: Any,
+            statement: str,
+            parameters: Any,
+            context: Any,
+            executemany: bool,
+        ) -> None:
+            # reads run outside a transaction until the first write begins one
+            # IMMEDIATE: a deferred transaction reading first couldn't take the
+            # write lock once another connection committed (SQLITE_BUSY_SNAPSHOT
+            # in WAL mode, busy_timeout doesn't retry it), IMMEDIATE waits for it
+            if (
+                connection.in_transaction()
+                and not cursor.connection.in_transaction
+                and not statement.lstrip()[:7].upper().startswith(READ_STATEMENTS)
+            ):
+                cursor.connection.execute("BEGIN IMMEDIATE")
+
+    return engine
+
+
+def reader_uris(uri: str, replicas: Sequence[str]) -> list[str]:
+    """Database URIs of the read-only engines.
+
+    Configured replicas are used as they are. Without replicas a file SQLite
+    database is opened a second time in read-only mode, any other database has
+    no readers and all traffic goes to the writer.
+
+    Args:
+        uri (str): writer database URI.
+        replicas (Sequence[str]): read replica URIs.
+
+    Returns:
+        list[str]: reader URIs, empty when reads aren't routed.
+    """
+    if replicas:
+        return list(replicas)
+    url = make_url(uri)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return []
+    if url.query.get("uri") == "true":
+        database = url.database
+    else:
+        database = f"file:{url.database}"
+    read_only = url.set(
+        database=database, query={**url.query, "mode": "ro", "uri": "true"}
+    )
+    return [read_only.render_as_string(hide_password=False)]
+
+
+class RoutingSession(Session):
+    """Session sending reads to read-only engines and writes to the writer.
+
+    Flushes, DML, ``SELECT ... FOR UPDATE`` and textual SQL use the writer. Once
+    a session used the writer it stays pinned to it, so it reads its own writes;
+    :func:`use_writer` pins a session before its first write. Every session
+    sticks to one randomly chosen reader.
+    """
+
+    def __init__(self, *args: Any, readers: Sequence[Engine] = (), **kwargs: Any):
+        """Routing session.
+
+        Args:
+            *args (Any): arguments of :class:`Session`.
+            readers (Sequence[Engine], optional): read-only engines. Defaults to
+                no readers, everything runs on the writer.
+            **kwargs (Any): keyword arguments of :class:`Session`, ``bind`` is
+                the writer.
+        """
+        super().__init__(*args, **kwargs)
+        self.reader = random.choice(readers) if readers else None
+
+    def get_bind(self, mapper: Any = None, *, clause: Any = None, **kw: Any) -> Any:
+        """Engine of the next statement.
+
+        Args:
+            mapper (Any, optional): mapped class of the statement.
+            clause (Any, optional): statement to execute.
+            **kw (Any): other arguments of :meth:`Session.get_bind`.
+
+        Returns:
+            Any: reader engine or the writer.
+        """
+        if self.reader is None or self.info.get("use_writer"):
+            return super().get_bind(mapper, clause=clause, **kw)
+        if (
+            self._flushing
+            or isinstance(clause, UpdateBase | TextClause)
+            or (isinstance(clause, Select) and clause._for_update_arg is not None)
+        ):
+            self.info["use_writer"] = True
+            return super().get_bind(mapper, clause=clause, **kw)
+        return self.reader
+
+
+def use_writer(db: Session) -> None:
+    """Pin a session to the writer, for reads that must see the latest writes.
+
+    Args:
+        db (Session): database session.
+    """
+    db.info["use_writer"] = True
+
+
+profile = storage_profile(SETTINGS.DATABASE_STORAGE_PROFILE)
+if SETTINGS.DATABASE_SHARDS:
+    shard_engines = {
+        str(i): create_database_engine(uri, profile)
+        for i, uri in enumerate(SETTINGS.DATABASE_SHARDS)
+    }
+    engine = shard_engines[HOME_SHARD]
+    reader_engines = []
+    SessionLocal = sessionmaker(
+        class_=UserShardedSession,
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        shards=shard_engines,
+    )
+else:
+    engine = create_database_engine(SETTINGS.DATABASE_URI, profile)
+    shard_engines = {HOME_SHARD: engine}
+    reader_engines = [
+        create_database_engine(uri, profile, read_only=True)
+        for uri in (
+            reader_uris(SETTINGS.DATABASE_URI, SETTINGS.DATABASE_READ_REPLICAS)
+            if SETTINGS.DATABASE_READ_ROUTING
+            else []
+        )
+    ]
+    SessionLocal = sessionmaker(
+        class_=RoutingSession,
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        bind=engine,
+        readers=reader_engines,
+    )
+
+
+def release(db: Session) -> None:
+    """Return the connection of a read-only transaction to the pool.
+
+    Loaded objects stay usable, the next query checks a connection out again.
+    Sessions with pending changes are left alone, they're released when the
+    unit of work commits.
+
+    Args:
+        db (Session): database session.
+    """
+    if db.in_transaction() and not (db.new or db.dirty or db.deleted):
+        db.commit()
+
+
+def pool_status() -> dict[str, Any]:
+    """Connection pool usage of the engine.
+
+    Returns:
+        dict[str, Any]: pool class, size, checked in/out and overflow
+            connections, counters the pool doesn't have are None.
+    """
+    pool = engine.pool
+    counters = {
+        key: getattr(pool, method)() if hasattr(pool, method) else None
+        for key, method in (
+            ("size", "size"),
+            ("checked_in", "checkedin"),
+            ("checked_out", "checkedout"),
+            ("overflow", "overflow"),
+        )
+    }
+    return {"pool": type(pool).__name__, **counters, "status": pool.status()}
 
 
 # Dependency
-def get_db() -> Generator[Any, Any, None]:
+async def get_db() -> AsyncGenerator[Any, None]:
     """Function to inject database as dependency via fastapi functionalities.
 
+    No connection is used until the first query. The dependency is async, so
+    opening and closing the session doesn't cost threadpool round trips.
+
     Yields:
-        Generator[Any, Any, None]: database session.
+        AsyncGenerator[Any, None]: database session.
     """
+    db = SessionLocal()
     try:
-        db = SessionLocal()
         yield db
     finally:
         db.close()
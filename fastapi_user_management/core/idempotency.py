@@ -0,0 +1,365 @@
+"""Replay of POST requests retried with the same ``Idempotency-Key`` header.
+
+The first request sent with a key claims it in the ``idempotency_key`` table
+and runs, its final response is stored with a fingerprint of the request (query
+string and body). A retry with the same key, from the same caller, to the same
+endpoint and with the same fingerprint gets the stored response back without
+running the endpoint again, so it doesn't hash the password again or fail with
+409 because the first attempt created the user.
+
+* A retry while the first attempt is still running gets 409.
+* Reusing a key for a different request gets 422.
+* Responses with status 5xx, interrupted requests and responses larger than
+  ``max_body_bytes`` aren't stored, their keys can be retried.
+
+Keys expire after ``ttl`` seconds, the table keeps at most ``max_entries`` rows
+(oldest dropped first). Claims of requests that never finished are given up
+after ``lock_timeout`` seconds.
+"""
+
+import hashlib
+import itertools
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Engine, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.database import engine
+from fastapi_user_management.models.idempotency_key import IdempotencyKeyModel
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = "idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+
+@dataclass(slots=True)
+class StoredResponse:
+    """Record of a claimed key.
+
+    Attributes:
+        fingerprint (str | None): fingerprint of the request, None while running.
+        status_code (int | None): status of the response, None while running.
+        content_type (str | None): ``Content-Type`` of the response.
+        body (bytes | None): body of the response.
+    """
+
+    fingerprint: str | None
+    status_code: int | None
+    content_type: str | None
+    body: bytes | None
+
+    @property
+    def running(self) -> bool:
+        """Whether the request claiming the key hasn't finished."""
+        return self.status_code is None
+
+
+class IdempotencyStore:
+    """Claims and responses of idempotency keys in the ``idempotency_key`` table."""
+
+    def __init__(
+        self,
+        bind: Engine,
+        *,
+        ttl: float,
+        max_entries: int,
+        lock_timeout: float,
+        prune_every: int = 64,
+    ) -> None:
+        """Store in a database.
+
+        Args:
+            bind (Engine): engine of the database holding the table.
+            ttl (float): seconds a key is remembered.
+            max_entries (int): keys kept.
+            lock_timeout (float): seconds after which the claim of a request
+                that never finished is given up.
+            prune_every (int, optional): claims between two prunings.
+                Defaults to 64.
+        """
+        self.bind = bind
+        self.ttl = timedelta(seconds=ttl)
+        self.max_entries = max_entries
+        self.lock_timeout = timedelta(seconds=lock_timeout)
+        self.prune_every = prune_every
+        self._claims = itertools.count(1)
+
+    def claim(self, scope: str, key: str) -> StoredResponse | None:
+        """Claim a key for a new request.
+
+        Args:
+            scope (str): caller and endpoint.
+            key (str): ``Idempotency-Key`` header.
+
+        Returns:
+            StoredResponse | None: None if the key was claimed, the record of
+                the request holding the key otherwise.
+        """
+        table = IdempotencyKeyModel.__table__
+        this_key = (table.c.scope == scope) & (table.c.key == key)
+        while True:
+            now = datetime.utcnow()
+            try:
+                with self.bind.begin() as connection:
+                    connection.execute(
+                        delete(table).where(
+                            this_key,
+                            or_(
+                                table.c.created_at < now - self.ttl,
+                                table.c.status_code.is_(None)
+                                & (table.c.created_at < now - self.lock_timeout),
+                            ),
+                        )
+                    )
+                    connection.execute(
+                        insert(table).values(scope=scope, key=key, created_at=now)
+                    )
+            except IntegrityError:
+                with self.bind.connect() as connection:
+                    row = connection.execute(
+                        select(
+                            table.c.fingerprint,
+                            table.c.status_code,
+                            table.c.content_type,
+                            table.c.body,
+                        ).where(this_key)
+                    ).one_or_none()
+                if row is not None:
+                    return StoredResponse(*row)
+                # released in between, claim again
+                continue
+            if next(self._claims) % self.prune_every == 0:
+                self.prune()
+            return None
+
+    def complete(
+        self,
+        scope: str,
+        key: str,
+        *,
+        fingerprint: str,
+        status_code: int,
+        content_type: str | None,
+        body: bytes,
+    ) -> None:
+        """Store the final response of a claimed key.
+
+        Args:
+            scope (str): caller and endpoint.
+            key (str): ``Idempotency-Key`` header.
+            fingerprint (str): fingerprint of the request.
+            status_code (int): status of the response.
+            content_type (str | None): ``Content-Type`` of the response.
+            body (bytes): body of the response.
+        """
+        table = IdempotencyKeyModel.__table__
+        with self.bind.begin() as connection:
+            connection.execute(
+                update(table)
+                .where(table.c.scope == scope, table.c.key == key)
+                .values(
+                    fingerprint=fingerprint,
+                    status_code=status_code,
+                    content_type=content_type,
+                    body=body,
+                )
+            )
+
+    def release(self, scope: str, key: str) -> None:
+        """Forget a claimed key, so it can be retried.
+
+        Args:
+            scope (str): caller and endpoint.
+            key (str): ``Idempotency-Key`` header.
+        """
+        table = IdempotencyKeyModel.__table__
+        with self.bind.begin() as connection:
+            connection.execute(
+                delete(table).where(table.c.scope == scope, table.c.key == key)
+            )
+
+    def prune(self) -> int:
+        """Drop expired keys and the oldest keys beyond ``max_entries``.
+
+        Returns:
+            int: number of dropped keys.
+        """
+        table = IdempotencyKeyModel.__table__
+        with self.bind.begin() as connection:
+            dropped = connection.execute(
+                delete(table).where(table.c.created_at < datetime.utcnow() - self.ttl)
+            ).rowcount
+            oldest_kept = connection.scalar(
+                select(table.c.created_at)
+                .order_by(table.c.created_at.desc())
+                .offset(self.max_entries - 1)
+                .limit(1)
+            )
+            if oldest_kept is not None:
+                dropped += connection.execute(
+                    delete(table).where(table.c.created_at < oldest_kept)
+                ).rowcount
+        return dropped
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware storing and replaying responses of idempotent POSTs."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        store: IdempotencyStore,
+        paths: Iterable[str],
+        max_body_bytes: int,
+    ) -> None:
+        """Initiate middleware.
+
+        Args:
+            app (ASGIApp): wrapped application.
+            store (IdempotencyStore): claims and responses of keys.
+            paths (Iterable[str]): paths of the endpoints honouring the header.
+            max_body_bytes (int): largest response body stored.
+        """
+        self.app = app
+        self.store = store
+        self.paths = frozenset(paths)
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run request, or replay the response of its first attempt."""
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await JSONResponse(
+                {"detail": f"Idempotency-Key must have 1 to {MAX_KEY_LENGTH} chars!"},
+                status_code=400,
+            )(scope, receive, send)
+            return
+
+        # bearer tokens aren't stored, only a digest telling callers apart
+        caller = hashlib.blake2b(
+            headers.get("authorization", "").encode(), digest_size=16
+        ).hexdigest()
+        claim_scope = f"{caller} {scope['path']}"
+        hasher = hashlib.blake2b(scope["query_string"], digest_size=32)
+
+        stored = await run_in_threadpool(self.store.claim, claim_scope, key)
+        if stored is not None:
+            await self._answer_retry(stored, hasher, scope, receive, send)
+            return
+
+        more_body = True
+
+        async def receive_hashed() -> Message:
+            nonlocal more_body
+            message = await receive()
+            if message["type"] == "http.request":
+                hasher.update(message.get("body", b""))
+                more_body = message.get("more_body", False)
+            return message
+
+        status_code = 500
+        content_type = None
+        body: bytearray | None = bytearray()
+
+        async def send_captured(message: Message) -> None:
+            nonlocal status_code, content_type, body
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body" and body is not None:
+                body += message.get("body", b"")
+                if len(body) > self.max_body_bytes:
+                    body = None
+            await send(message)
+
+        try:
+            await self.app(scope, receive_hashed, send_captured)
+            # endpoints failing early don't read the whole request
+            while more_body:
+                if (await receive_hashed())["type"] != "http.request":
+                    break
+        except BaseException:
+            await run_in_threadpool(self.store.release, claim_scope, key)
+            raise
+        if status_code >= 500 or body is None or more_body:
+            await run_in_threadpool(self.store.release, claim_scope, key)
+            return
+        await run_in_threadpool(
+            self.store.complete,
+            claim_scope,
+            key,
+            fingerprint=hasher.hexdigest(),
+            status_code=status_code,
+            content_type=content_type,
+            body=bytes(body),
+        )
+
+    async def _answer_retry(
+        self,
+        stored: StoredResponse,
+        hasher: Any,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Replay the stored response, or refuse the retry."""
+        if stored.running:
+            await JSONResponse(
+                {"detail": "A request with this Idempotency-Key is in progress!"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )(scope, receive, send)
+            return
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            hasher.update(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        if hasher.hexdigest() != stored.fingerprint:
+            await JSONResponse(
+                {"detail": "Idempotency-Key was used for another request!"},
+                status_code=422,
+            )(scope, receive, send)
+            return
+        start: Message = {
+            "type": "http.response.start",
+            "status": stored.status_code,
+            "headers": [],
+        }
+        response_headers = MutableHeaders(scope=start)
+        if stored.content_type is not None:
+            response_headers["content-type"] = stored.content_type
+        response_headers["content-length"] = str(len(stored.body or b""))
+        response_headers[REPLAYED_HEADER] = "true"
+        await send(start)
+        await send({"type": "http.response.body", "body": stored.body or b""})
+
+
+idempotency_store = IdempotencyStore(
+    engine,
+    ttl=SETTINGS.IDEMPOTENCY_TTL,
+    max_entries=SETTINGS.IDEMPOTENCY_MAX_ENTRIES,
+    lock_timeout=SETTINGS.IDEMPOTENCY_LOCK_TIMEOUT,
+)
@@ -5,6 +5,10 @@ from sqlalchemy.orm import Session
 
 from fastapi_user_management import crud
 from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.permissions import (
+    DEFAULT_ROLE_PERMISSIONS,
+    permission_registry,
+)
 from fastapi_user_management.models.role import RoleNames
 from fastapi_user_management.models.user import UserModel, UserStatusValues
 from fastapi_user_management.schemas.role import RoleBase
@@ -14,9 +18,13 @@ from fastapi_user_management.schemas.user import UserCreate
 def init_db(db: Session) -> None:
     """Initiate database, create admin user if not exists.
 
+    Permissions are stored and compiled into the permission registry first.
+
     Args:
         db (Session): database session.
     """
+    crud.permission.sync(db, grants=DEFAULT_ROLE_PERMISSIONS)
+    permission_registry.load(db)
     user: UserModel | Any = crud.user.get_by_username(db, username=SETTINGS.ADMIN_EMAIL)
     if not user:
         user_in = UserCreate(
@@ -0,0 +1,454 @@
+"""Background jobs run by worker threads, persisted in the ``job`` table.
+
+Long admin operations don't run in the request: the endpoint submits a job,
+which only inserts its row, and answers with its id. Worker threads of every
+process claim queued jobs and run the handler registered for their kind, the
+client polls ``GET /admin/jobs/{id}`` for status and progress. Workers are
+threads of their own, so jobs never hold a thread serving requests.
+
+* Handlers call :meth:`JobContext.report` as they make progress, it saves the
+  progress and the partial result, and raises when the job must stop.
+* Cancelling a queued job cancels it at once, a running job stops at its next
+  report.
+* On shutdown running jobs stop at their next report and are queued again, a
+  restarted process resumes them from their last report. While a process runs
+  jobs it refreshes their ``heartbeat_at``, jobs of a process that died are
+  queued again once their heartbeat is ``stale_after`` seconds old.
+
+Work done after the last report of an interrupted job is done again when it
+resumes, handlers report right after each commit to keep that window small.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Engine, select, update
+from sqlalchemy.orm import Session
+
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.database import engine
+from fastapi_user_management.errors.exceptions import (
+    JobCancelledError,
+    JobInterruptedError,
+)
+from fastapi_user_management.models.job import JobModel, JobStatusValues
+
+logger = logging.getLogger(__name__)
+
+# handler(context, **params) returning the result of the job
+JobHandler = Callable[..., dict[str, Any] | None]
+
+FINISHED = (
+    JobStatusValues.SUCCEEDED,
+    JobStatusValues.FAILED,
+    JobStatusValues.CANCELLED,
+)
+
+
+class JobContext:
+    """Progress of a running job, given to its handler."""
+
+    def __init__(
+        self,
+        queue: "JobQueue",
+        job_id: str,
+        *,
+        done: int,
+        result: dict[str, Any] | None,
+    ) -> None:
+        """Context of a claimed job.
+
+        Args:
+            queue (JobQueue): queue running the job.
+            job_id (str): id of the job.
+            done (int): progress of the last report, 0 for a new job.
+            result (dict[str, Any] | None): result of the last report.
+        """
+        self.queue = queue
+        self.job_id = job_id
+        self.done = done
+        self.result = result
+
+    def report(
+        self, done: int, total: int | None = None, *, result: dict[str, Any] | None
+    ) -> None:
+        """Save the progress of the job, a resumed job restarts from it.
+
+        Args:
+            done (int): units of work done.
+            total (int | None, optional): units of work of the job.
+                Defaults to None.
+            result (dict[str, Any] | None): partial result.
+
+        Raises:
+            JobCancelledError: the job was cancelled.
+            JobInterruptedError: the queue is shutting down.
+        """
+        self.done = done
+        self.result = result
+        cancel_requested = self.queue.save_progress(
+            self.job_id, done=done, total=total, result=result
+        )
+        if cancel_requested:
+            raise JobCancelledError
+        if self.queue.stopping:
+            raise JobInterruptedError
+
+
+class JobQueue:
+    """Jobs of the ``job`` table and the worker threads running them."""
+
+    def __init__(
+        self,
+        bind: Engine,
+        *,
+        workers: int,
+        poll_interval: float,
+        stale_after: float,
+    ) -> None:
+        """Queue in a database, without running workers.
+
+        Args:
+            bind (Engine): engine of the database holding the table.
+            workers (int): worker threads started by ``start``.
+            poll_interval (float): seconds between checks for queued jobs of
+                other processes.
+            stale_after (float): seconds after which a running job without
+                heartbeat is queued again.
+        """
+        self.bind = bind
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = timedelta(seconds=stale_after)
+        self.handlers: dict[str, JobHandler] = {}
+        self._running: set[str] = set()
+        self._claim_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def stopping(self) -> bool:
+        """Whether the workers are shutting down."""
+        return self._stop.is_set()
+
+    def register(self, kind: str) -> Callable[[JobHandler], JobHandler]:
+        """Register the handler of a kind of job, used as a decorator.
+
+        Args:
+            kind (str): kind of job.
+
+        Returns:
+            Callable[[JobHandler], JobHandler]: decorator.
+        """
+
+        def decorator(handler: JobHandler) -> JobHandler:
+            self.handlers[kind] = handler
+            return handler
+
+        return decorator
+
+    def submit(
+        self,
+        kind: str,
+        params: dict[str, Any],
+        *,
+        created_by: str,
+        permission_mask: int,
+    ) -> JobModel:
+        """Queue a job.
+
+        Args:
+            kind (str): kind of job, with a registered handler.
+            params (dict[str, Any]): JSON keyword arguments of the handler.
+            created_by (str): username of the submitter.
+            permission_mask (int): permissions needed to read or cancel the job.
+
+        Raises:
+            KeyError: no handler is registered for the kind.
+
+        Returns:
+            JobModel: queued job.
+        """
+        if kind not in self.handlers:
+            raise KeyError(kind)
+        job = JobModel(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            params=params,
+            status=JobStatusValues.QUEUED,
+            permission_mask=permission_mask,
+            created_by=created_by,
+            done=0,
+            cancel_requested=False,
+            attempts=0,
+            created_at=datetime.utcnow(),
+        )
+        with Session(self.bind, expire_on_commit=False) as session:
+            session.add(job)
+            session.commit()
+        self._wake.set()
+        return job
+
+    def get(self, job_id: str) -> JobModel | None:
+        """Read a job.
+
+        Args:
+            job_id (str): id of the job.
+
+        Returns:
+            JobModel | None: job, None if it doesn't exist.
+        """
+        with Session(self.bind) as session:
+            return session.get(JobModel, job_id)
+
+    def cancel(self, job_id: str) -> JobModel | None:
+        """Cancel a queued job, or ask a running job to stop.
+
+        Args:
+            job_id (str): id of the job.
+
+        Returns:
+            JobModel | None: job, None if it doesn't exist.
+        """
+        table = JobModel.__table__
+        with self.bind.begin() as connection:
+            connection.execute(
+                update(table)
+                .where(table.c.id == job_id, table.c.status == JobStatusValues.QUEUED)
+                .values(
+                    status=JobStatusValues.CANCELLED,
+                    params=None,
+                    finished_at=datetime.utcnow(),
+                )
+            )
+            connection.execute(
+                update(table)
+                .where(table.c.id == job_id, table.c.status == JobStatusValues.RUNNING)
+                .values(cancel_requested=True)
+            )
+        return self.get(job_id)
+
+    def save_progress(
+        self,
+        job_id: str,
+        *,
+        done: int,
+        total: int | None,
+        result: dict[str, Any] | None,
+    ) -> bool:
+        """Save the progress of a running job.
+
+        Args:
+            job_id (str): id of the job.
+            done (int): units of work done.
+            total (int | None): units of work of the job.
+            result (dict[str, Any] | None): partial result.
+
+        Returns:
+            bool: whether the job was cancelled.
+        """
+        table = JobModel.__table__
+        with self.bind.begin() as connection:
+            connection.execute(
+                update(table)
+                .where(table.c.id == job_id)
+                .values(
+                    done=done,
+                    total=total,
+                    result=result,
+                    heartbeat_at=datetime.utcnow(),
+                )
+            )
+            return bool(
+                connection.scalar(
+                    select(table.c.cancel_requested).where(table.c.id == job_id)
+                )
+            )
+
+    def requeue_stale(self) -> int:
+        """Queue again the running jobs whose heartbeat stopped.
+
+        Returns:
+            int: number of queued jobs.
+        """
+        table = JobModel.__table__
+        with self.bind.begin() as connection:
+            return connection.execute(
+                update(table)
+                .where(
+                    table.c.status == JobStatusValues.RUNNING,
+                    table.c.heartbeat_at < datetime.utcnow() - self.stale_after,
+                )
+                .values(status=JobStatusValues.QUEUED, heartbeat_at=None)
+            ).rowcount
+
+    def run_next(self) -> bool:
+        """Claim the oldest queued job and run it.
+
+        Returns:
+            bool: whether a job was run.
+        """
+        job = self._claim()
+        if job is None:
+            return False
+        self._running.add(job.id)
+        try:
+            self._run(job)
+        finally:
+            self._running.discard(job.id)
+        return True
+
+    def start(self) -> None:
+        """Start the worker threads and the heartbeat thread."""
+        if self._threads or not self.workers:
+            return
+        self._stop.clear()
+        self.requeue_stale()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        self._threads.append(
+            threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+        )
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop the threads, running jobs are queued again at their next report.
+
+        Threads still running a job after ``stale_after`` seconds are left to
+        die with the process, their jobs are queued again as stale.
+        """
+        self._stop.set()
+        self._wake.set()
+        deadline = time.monotonic() + self.stale_after.total_seconds()
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        self._threads = []
+
+    def _claim(self) -> JobModel | None:
+        """Mark the oldest queued job as running by this process."""
+        table = JobModel.__table__
+        # threads of this process don't race each other for the same job
+        with self._claim_lock:
+            while True:
+                with Session(self.bind) as session:
+                    job = session.scalars(
+                        select(JobModel)
+                        .where(JobModel.status == JobStatusValues.QUEUED)
+                        .order_by(JobModel.created_at, JobModel.id)
+                        .limit(1)
+                    ).first()
+                if job is None:
+                    return None
+                now = datetime.utcnow()
+                # the status check makes claims of other processes exclusive
+                with self.bind.begin() as connection:
+                    claimed = connection.execute(
+                        update(table)
+                        .where(
+                            table.c.id == job.id,
+                            table.c.status == JobStatusValues.QUEUED,
+                        )
+                        .values(
+                            status=JobStatusValues.RUNNING,
+                            started_at=job.started_at or now,
+                            heartbeat_at=now,
+                            attempts=table.c.attempts + 1,
+                        )
+                    ).rowcount
+                if claimed:
+                    return job
+
+    def _run(self, job: JobModel) -> None:
+        """Run the handler of a claimed job and record how it ended."""
+        context = JobContext(self, job.id, done=job.done, result=job.result)
+        try:
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                raise LookupError(f"No handler for {job.kind} jobs!")
+            result = handler(context, **(job.params or {}))
+        except JobInterruptedError:
+            self._finish(job.id, JobStatusValues.QUEUED)
+        except JobCancelledError:
+            self._finish(job.id, JobStatusValues.CANCELLED, result=context.result)
+        except Exception as e:
+            self._finish(
+                job.id,
+                JobStatusValues.FAILED,
+                result=context.result,
+                error=f"{type(e).__name__}: {e}",
+            )
+        else:
+            self._finish(job.id, JobStatusValues.SUCCEEDED, result=result)
+
+    def _finish(
+        self,
+        job_id: str,
+        status: JobStatusValues,
+        *,
+        result: dict[str, Any] | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Record the end of a run, a queued job keeps its progress."""
+        table = JobModel.__table__
+        values: dict[str, Any] = {"status": status, "heartbeat_at": None}
+        if status in FINISHED:
+            values.update(
+                params=None,
+                result=result,
+                error=error,
+                finished_at=datetime.utcnow(),
+            )
+        with self.bind.begin() as connection:
+            connection.execute(update(table).where(table.c.id == job_id).values(values))
+
+    def _work(self) -> None:
+        """Run queued jobs until the queue stops."""
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                ran = self.run_next()
+            except Exception:
+                # the database is unavailable, try again at the next poll
+                logger.exception("Claiming or finishing a job failed")
+                ran = False
+            if not ran:
+                self._wake.wait(self.poll_interval)
+
+    def _beat(self) -> None:
+        """Refresh the heartbeat of running jobs and queue stale jobs again."""
+        table = JobModel.__table__
+        interval = self.stale_after.total_seconds() / 3
+        while not self._stop.wait(interval):
+            try:
+                running = list(self._running)
+                if running:
+                    with self.bind.begin() as connection:
+                        connection.execute(
+                            update(table)
+                            .where(
+                                table.c.id.in_(running),
+                                table.c.status == JobStatusValues.RUNNING,
+                            )
+                            .values(heartbeat_at=datetime.utcnow())
+                        )
+                if self.requeue_stale():
+                    self._wake.set()
+            except Exception:
+                logger.exception("Refreshing job heartbeats failed")
+
+
+job_queue = JobQueue(
+    engine,
+    workers=SETTINGS.JOBS_WORKERS,
+    poll_interval=SETTINGS.JOBS_POLL_INTERVAL,
+    stale_after=SETTINGS.JOBS_STALE_AFTER,
+)
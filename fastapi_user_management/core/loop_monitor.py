@@ -0,0 +1,203 @@
+"""Event loop lag monitor.
+
+A heartbeat task sleeps for ``interval`` in a loop and records how late it wakes
+up: that's the time the loop was busy running something else. A watchdog thread
+checks the heartbeat, once it's overdue by more than ``threshold`` the loop is
+blocked right now, so the watchdog captures the stack of the event loop thread and
+the route of the request whose task is running.
+"""
+
+import asyncio
+import statistics
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import datetime
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from fastapi_user_management.config import SETTINGS
+
+STACK_DEPTH = 40
+
+
+@dataclass(slots=True)
+class Stall:
+    """Event loop stall caught by the watchdog.
+
+    Attributes:
+        route (str | None): ``METHOD /path`` of the blocking request, None if no
+            request was running.
+        detected_at (datetime): UTC time the watchdog caught the stall.
+        lag (float): seconds the loop was blocked, at least the threshold while
+            the stall is still going on.
+        stack (list[str]): stack of the blocking frame, innermost call last.
+    """
+
+    route: str | None
+    detected_at: datetime
+    lag: float
+    stack: list[str]
+
+
+class LoopMonitor:
+    """Measure event loop lag and capture stalls.
+
+    Attributes:
+        lags (deque[float]): recent lag samples in seconds.
+        stalls (deque[Stall]): recent stalls, oldest first.
+        active (dict[asyncio.Task, Scope]): scope of every running request.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        window: int = 3000,
+        max_stalls: int = 50,
+    ) -> None:
+        """Initiate monitor.
+
+        Args:
+            interval (float, optional): seconds between heartbeats. Defaults to 0.1.
+            threshold (float, optional): lag in seconds reported as a stall.
+                Defaults to 0.1.
+            window (int, optional): lag samples kept for percentiles.
+                Defaults to 3000.
+            max_stalls (int, optional): stalls kept. Defaults to 50.
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: deque[float] = deque(maxlen=window)
+        self.stalls: deque[Stall] = deque(maxlen=max_stalls)
+        self.active: dict[asyncio.Task, Scope] = {}
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._pending: Stall | None = None
+        self._heartbeat: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the monitor has been started."""
+        return self._heartbeat is not None
+
+    async def start(self) -> None:
+        """Start heartbeat on the running loop and the watchdog thread."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped = threading.Event()
+        self._heartbeat = self._loop.create_task(self._run())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop heartbeat and watchdog."""
+        if self._heartbeat is None:
+            return
+        self._stopped.set()
+        self._heartbeat.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._heartbeat
+        self._heartbeat = None
+        self._watchdog.join()
+
+    async def _run(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - start - self.interval, 0.0)
+            self.lags.append(lag)
+            with self._lock:
+                self._beat = now
+                stall, self._pending = self._pending, None
+            if stall is not None:
+                stall.lag = lag
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.threshold / 2):
+            with self._lock:
+                overdue = time.monotonic() - self._beat - self.interval
+                if overdue < self.threshold or self._pending is not None:
+                    continue
+                stall = self._pending = self._capture(overdue)
+            self.stalls.append(stall)
+
+    def _capture(self, overdue: float) -> Stall:
+        """Capture the stall going on in the event loop thread."""
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = (
+            [
+                f"{entry.filename}:{entry.lineno} in {entry.name}"
+                for entry in traceback.extract_stack(frame)[-STACK_DEPTH:]
+            ]
+            if frame is not None
+            else []
+        )
+        route = None
+        scope = self.active.get(asyncio.current_task(self._loop))  # type: ignore[arg-type]
+        if scope is not None:
+            path = getattr(scope.get("route"), "path", scope["path"])
+            route = f"{scope['method']} {path}"
+        return Stall(
+            route=route,
+            detected_at=datetime.utcnow(),
+            lag=self.interval + overdue,
+            stack=stack,
+        )
+
+    def percentiles(self) -> dict[str, float]:
+        """Lag percentiles of the recent samples in milliseconds."""
+        lags = list(self.lags)
+        if len(lags) < 2:
+            lags = (lags or [0.0]) * 2
+        cuts = statistics.quantiles(lags, n=100, method="inclusive")
+        return {
+            "samples": len(self.lags),
+            "p50_ms": cuts[49] * 1000,
+            "p95_ms": cuts[94] * 1000,
+            "p99_ms": cuts[98] * 1000,
+            "max_ms": max(lags) * 1000,
+        }
+
+
+class LoopMonitorMiddleware:
+    """ASGI middleware registering running requests, so stalls name their route."""
+
+    def __init__(self, app: ASGIApp, *, monitor: LoopMonitor) -> None:
+        """Initiate middleware.
+
+        Args:
+            app (ASGIApp): wrapped application.
+            monitor (LoopMonitor): monitor attributing stalls.
+        """
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run request, registered as the scope of the current task."""
+        task = asyncio.current_task()
+        if scope["type"] != "http" or task is None:
+            await self.app(scope, receive, send)
+            return
+        self.monitor.active[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            del self.monitor.active[task]
+
+
+loop_monitor = LoopMonitor(
+    interval=SETTINGS.LOOP_LAG_INTERVAL,
+    threshold=SETTINGS.LOOP_STALL_THRESHOLD,
+    window=SETTINGS.LOOP_LAG_WINDOW,
+    max_stalls=SETTINGS.LOOP_MAX_STALLS,
+)
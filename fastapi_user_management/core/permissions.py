@@ -0,0 +1,89 @@
+"""Role based permissions compiled into bitmasks.
+
+Grants of roles are read from ``role_permission`` once at startup and compiled
+into one integer per role. A user's permissions are the union of the masks of
+the roles in their ``role_mask``, so checking a permission is a dict lookup and a
+bit test without any query.
+"""
+
+from sqlalchemy.orm import Session
+
+from fastapi_user_management import crud
+from fastapi_user_management.models.permission import PermissionNames
+from fastapi_user_management.models.role import RoleNames
+from fastapi_user_management.models.user import UserModel
+
+DEFAULT_ROLE_PERMISSIONS: dict[RoleNames, tuple[PermissionNames, ...]] = {
+    RoleNames.ADMIN: tuple(PermissionNames),
+    RoleNames.USER: (),
+}
+
+
+def permission_mask(*permissions: PermissionNames) -> int:
+    """Bitmask of permissions.
+
+    Args:
+        *permissions (PermissionNames): permissions.
+
+    Returns:
+        int: mask with the bit of every permission set.
+    """
+    mask = 0
+    for permission in permissions:
+        mask |= 1 << permission.bit
+    return mask
+
+
+class PermissionRegistry:
+    """Compiled permission masks of roles.
+
+    Attributes:
+        role_masks (dict[RoleNames, int]): permission mask by role.
+    """
+
+    def __init__(self) -> None:
+        """Initiate empty registry, nothing is permitted before :meth:`load`."""
+        self.role_masks: dict[RoleNames, int] = {}
+        self._by_role_mask: dict[int, int] = {}
+
+    def load(self, db: Session) -> None:
+        """Compile grants stored in the database, call again after they change.
+
+        Args:
+            db (Session): database session.
+        """
+        self.role_masks = crud.permission.get_role_masks(db)
+        self._by_role_mask = {}
+
+    def user_mask(self, user: UserModel) -> int:
+        """Permissions of a user.
+
+        Args:
+            user (UserModel): user.
+
+        Returns:
+            int: union of the masks of the roles in the user's ``role_mask``.
+        """
+        try:
+            return self._by_role_mask[user.role_mask]
+        except KeyError:
+            mask = 0
+            for role in user.role_names:
+                mask |= self.role_masks.get(role, 0)
+            self._by_role_mask[user.role_mask] = mask
+            return mask
+
+    def has_permissions(self, user: UserModel, mask: int) -> bool:
+        """Check whether a user has every permission of a mask.
+
+        Args:
+            user (UserModel): user.
+            mask (int): required permissions, see :func:`permission_mask`.
+
+        Returns:
+            bool: True if all permissions are granted.
+        """
+        return self.user_mask(user) & mask == mask
+
+
+permission_registry = PermissionRegistry()
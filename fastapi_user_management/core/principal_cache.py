@@ -0,0 +1,92 @@
+"""Users of access tokens cached on the response cache backend.
+
+Every authenticated request looks the token's user up. The fields the auth
+dependencies and handlers need are cached on the backend of
+:data:`.response_cache.response_cache`, keyed by the generation of the user's
+tag, so any write to the user through the ORM (status, roles, revoked sessions,
+deletion) makes the next request look it up again. With the ``sqlite`` and
+``mmap`` backends the workers of a host share entries and invalidations.
+
+Entries also expire after ``ttl`` seconds, which bounds how long writes around
+the ORM, or writes of other workers with the ``memory`` backend, go unnoticed.
+"""
+
+import time
+
+import orjson
+
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.response_cache import (
+    ResponseCache,
+    response_cache,
+    user_tag,
+)
+from fastapi_user_management.models.user import UserModel, UserStatusValues
+
+FIELDS = ("id", "username", "fullname", "status", "role_mask", "token_version")
+
+
+class PrincipalCache:
+    """Token users cached on a response cache."""
+
+    def __init__(self, cache: ResponseCache, *, ttl: float) -> None:
+        """Cache over a response cache.
+
+        Args:
+            cache (ResponseCache): cache whose backend stores the users.
+            ttl (float): seconds an entry is used, 0 disables the cache.
+        """
+        self.cache = cache
+        self.ttl = ttl
+
+    def key(self, username: str) -> str:
+        """Key of a user, build it before looking the user up.
+
+        Args:
+            username (str): username.
+
+        Returns:
+            str: cache key, changes when the user is written.
+        """
+        return self.cache.key(
+            "principal",
+            tags=(user_tag(username),),
+            scope=0,
+            params={"username": username},
+        )
+
+    def get(self, key: str) -> UserModel | None:
+        """Cached user, detached from any session.
+
+        Args:
+            key (str): key from :meth:`key`.
+
+        Returns:
+            UserModel | None: user with the cached fields, None on a miss.
+        """
+        if not self.ttl:
+            return None
+        value = self.cache.backend.get(key)
+        if value is None:
+            return None
+        fields = orjson.loads(value)
+        if fields.pop("expires_at") < time.time():
+            return None
+        fields["status"] = UserStatusValues(fields["status"])
+        return UserModel(**fields)
+
+    def set(self, key: str, user: UserModel) -> None:
+        """Cache a user.
+
+        Args:
+            key (str): key from :meth:`key`, built before the lookup.
+            user (UserModel): looked up user.
+        """
+        if not self.ttl:
+            return
+        fields = {field: getattr(user, field) for field in FIELDS}
+        fields["expires_at"] = time.time() + self.ttl
+        self.cache.backend.set(key, orjson.dumps(fields))
+
+
+principal_cache = PrincipalCache(response_cache, ttl=SETTINGS.PRINCIPAL_CACHE_TTL)
@@ -0,0 +1,315 @@
+"""On-demand per-request profiling middleware.
+
+A request is profiled when an admin asks for it with the ``X-Profile`` header or
+the ``profile`` query parameter, or when it's picked by the sampling rate:
+
+- ``summary`` (default value): hottest functions are returned in the
+  ``X-Profile-Summary`` response header.
+- ``file``: profile is written to the output directory and its name is returned
+  in the ``X-Profile-File`` response header. Sampled requests are always written
+  to files.
+
+The ``sampling`` profiler records stacks of every busy thread (event loop and
+threadpool) and writes collapsed stacks, the input format of ``flamegraph.pl``
+and speedscope. The ``deterministic`` profiler runs ``cProfile`` on the event loop
+thread and writes ``.pstats`` files (snakeviz, flameprof).
+
+Profiling stops when the response starts, streamed bodies are not covered. The
+middleware is only installed when profiling is enabled in settings.
+"""
+
+import cProfile
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from datetime import datetime
+from enum import StrEnum, auto
+from pathlib import Path
+from types import FrameType
+from urllib.parse import parse_qs
+
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from fastapi_user_management import crud
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.database import SessionLocal
+from fastapi_user_management.core.revocation import token_revocations
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY = "profile"
+SUMMARY_HEADER = "X-Profile-Summary"
+FILE_HEADER = "X-Profile-File"
+SUMMARY_SIZE = 5
+
+# Leaf frames of threads blocked on a lock, a queue or the event loop selector.
+IDLE_FRAMES = frozenset(
+    {("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select")}
+)
+
+
+class ProfilerModes(StrEnum):
+    """Profilers available to the middleware.
+
+    Values:
+        SAMPLING: sampling
+        DETERMINISTIC: deterministic
+    """
+
+    SAMPLING = auto()
+    DETERMINISTIC = auto()
+
+
+def _frame_name(frame: FrameType) -> str:
+    """Flamegraph label of a frame, e.g. ``CRUDUser.get_by_username (crud_users.py:24)``."""
+    code = frame.f_code
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Wall clock stack sampler running in a background thread.
+
+    Attributes:
+        stacks (Counter[str]): samples per collapsed stack, root frame first.
+        samples (int): number of sampling rounds.
+        elapsed (float): seconds between start and stop.
+    """
+
+    def __init__(self, interval: float) -> None:
+        """Initiate sampler.
+
+        Args:
+            interval (float): seconds between samples.
+        """
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="profiling-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._start = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._start
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (Path(code.co_filename).name, code.co_name) in IDLE_FRAMES:
+                    continue
+                stack: list[str] = []
+                current: FrameType | None = frame
+                while current is not None:
+                    stack.append(_frame_name(current))
+                    current = current.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def summary(self) -> str:
+        """Hottest leaf frames with their share of the busy samples."""
+        leaves: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        busy = sum(leaves.values()) or 1
+        top = ", ".join(
+            f"{name} {count / busy:.0%}"
+            for name, count in leaves.most_common(SUMMARY_SIZE)
+        )
+        return f"wall={self.elapsed * 1000:.1f}ms samples={self.samples} self={top}"
+
+    def write(self, path: Path) -> Path:
+        """Write collapsed stacks, one ``frame;frame;... count`` line per stack."""
+        path = path.with_suffix(".folded")
+        path.write_text("".join(f"{s} {c}\n" for s, c in self.stacks.items()))
+        return path
+
+
+class DeterministicProfiler:
+    """``cProfile`` of the thread running the event loop."""
+
+    def __init__(self) -> None:
+        """Initiate profiler."""
+        self._profile = cProfile.Profile()
+        self.elapsed = 0.0
+
+    def start(self) -> None:
+        """Start profiling the current thread."""
+        self._start = time.perf_counter()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        """Stop profiling."""
+        self._profile.disable()
+        self.elapsed = time.perf_counter() - self._start
+
+    def summary(self) -> str:
+        """Functions with the highest own time."""
+        stats = pstats.Stats(self._profile).stats  # type: ignore[attr-defined]
+        ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+        top = ", ".join(
+            f"{function} ({Path(filename).name}:{line}) {own * 1000:.1f}ms"
+            for (filename, line, function), (_, _, own, _, _) in ranked[:SUMMARY_SIZE]
+        )
+        return f"wall={self.elapsed * 1000:.1f}ms self={top}"
+
+    def write(self, path: Path) -> Path:
+        """Write ``pstats`` file."""
+        path = path.with_suffix(".pstats")
+        self._profile.dump_stats(path)
+        return path
+
+
+def is_admin_token(authorization: str | None) -> bool:
+    """Check whether an ``Authorization`` header carries an admin's token.
+
+    Tokens are checked like ``auth.get_current_user`` does: revoked tokens, and
+    tokens issued before the user's sessions were revoked, are refused. It
+    queries the database, the middleware runs it in the threadpool.
+
+    Args:
+        authorization (str | None): header value.
+
+    Returns:
+        bool: True if the bearer token is valid and its user is an active admin.
+    """
+    if authorization is None or not authorization.startswith("Bearer "):
+        return False
+    try:
+        payload = jwt.decode(
+            authorization[len("Bearer ") :],
+            SETTINGS.SECRET_KEY,
+            algorithms=[SETTINGS.ALGORITHM],
+        )
+    except JWTError:
+        return False
+    jti: str | None = payload.get("jti")
+    with SessionLocal() as db:
+        if jti is not None and token_revocations.is_revoked(db, jti=jti):
+            return False
+        user = crud.user.get_by_username(db=db, username=payload.get("sub"))
+        return (
+            user is not None
+            and payload.get("ver", 0) == user.token_version
+            and crud.user.is_active(user)
+            and crud.user.is_admin(db=db, db_obj=user)
+        )
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requested or sampled requests."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        mode: ProfilerModes = ProfilerModes.SAMPLING,
+        interval: float = 0.001,
+        sample_rate: float = 0.0,
+        output_dir: Path | str = "profiles",
+        authorize: Callable[[str | None], bool] = is_admin_token,
+    ) -> None:
+        """Initiate middleware.
+
+        Args:
+            app (ASGIApp): wrapped application.
+            mode (ProfilerModes, optional): profiler. Defaults to SAMPLING.
+            interval (float, optional): seconds between stack samples.
+                Defaults to 0.001.
+            sample_rate (float, optional): fraction of all requests profiled to
+                files. Defaults to 0.0.
+            output_dir (Path | str, optional): directory of profile files.
+                Defaults to "profiles".
+            authorize (Callable[[str | None], bool], optional): check of the
+                ``Authorization`` header of requests asking for a profile, run
+                in the threadpool. Defaults to is_admin_token.
+        """
+        self.app = app
+        self.mode = ProfilerModes(mode)
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.output_dir = Path(output_dir)
+        self.authorize = authorize
+
+    def _requested(self, scope: Scope) -> str | None:
+        """Output asked for by the request, None if it didn't ask for a profile."""
+        headers = Headers(scope=scope)
+        if PROFILE_HEADER in headers:
+            return headers[PROFILE_HEADER]
+        if PROFILE_QUERY.encode() in scope["query_string"]:
+            values = parse_qs(scope["query_string"].decode()).get(PROFILE_QUERY)
+            if values is not None:
+                return values[0]
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run request, under a profiler if it's requested or sampled."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        output = self._requested(scope)
+        # the check may query the database, it stays off the event loop
+        if output is not None and not await run_in_threadpool(
+            self.authorize, Headers(scope=scope).get("authorization")
+        ):
+            output = None
+        if output is None:
+            if not (self.sample_rate and random.random() < self.sample_rate):
+                await self.app(scope, receive, send)
+                return
+            output = "file"
+
+        profiler: StackSampler | DeterministicProfiler = (
+            StackSampler(self.interval)
+            if self.mode is ProfilerModes.SAMPLING
+            else DeterministicProfiler()
+        )
+        running = True
+
+        def finish() -> tuple[str, str]:
+            nonlocal running
+            running = False
+            profiler.stop()
+            if output != "file":
+                return SUMMARY_HEADER, profiler.summary()
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            slug = re.sub(r"[^\w]+", "_", scope["path"]).strip("_") or "root"
+            stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+            path = profiler.write(
+                self.output_dir / f"{stamp}-{scope['method'].lower()}-{slug}"
+            )
+            return FILE_HEADER, path.name
+
+        async def send_profiled(message: Message) -> None:
+            if message["type"] == "http.response.start" and running:
+                name, value = finish()
+                MutableHeaders(scope=message)[name] = value
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            if running:
+                finish()
@@ -0,0 +1,387 @@
+"""Cache of serialized admin read responses with write-driven invalidation.
+
+Entries are JSON bodies with their ETag, keyed by endpoint, normalized query
+parameters, the permission mask of the caller and the generation of every tag
+the response depends on. Writes don't delete entries: committing a session that
+wrote users or roles increments the generations of their tags, so keys built
+afterwards never reach older entries, which age out of the backend.
+
+Tags:
+
+* ``users``: every listing, bumped by any user write.
+* ``user:<username>``: profile of a user, bumped by writes to that user.
+* ``roles``: every response showing roles, bumped by role writes.
+
+Backends are ``memory`` (LRU of one process, its entries expire after a TTL),
+``sqlite`` and ``mmap`` (files shared by the workers of a host, see
+:mod:`.shared_cache` for the latter), ``none`` turns caching off.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from typing import Any, Protocol
+
+from sqlalchemy import event
+from sqlalchemy.orm import Mapper, Session, object_session
+
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.shared_cache import GENERATIONS, MmapCacheBackend
+from fastapi_user_management.models.role import RoleModel
+from fastapi_user_management.models.user import UserModel
+
+USERS_TAG = "users"
+ROLES_TAG = "roles"
+PENDING_TAGS = "response_cache_tags"
+
+
+def user_tag(username: str) -> str:
+    """Tag of the profile of a user."""
+    return f"user:{username}"
+
+
+class CacheBackend(Protocol):
+    """Storage of cache entries and tag generations."""
+
+    def get(self, key: str) -> bytes | None:
+        """Entry of a key, None on a miss."""
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store an entry, evicting others when the backend is full."""
+
+    def generations(self, tags: Iterable[str]) -> list[int]:
+        """Current generation of every tag, 0 for tags never bumped."""
+
+    def bump(self, tags: Iterable[str]) -> None:
+        """Increment generations of tags."""
+
+    def clear(self) -> None:
+        """Drop every entry, generations are kept."""
+
+
+class NullCacheBackend:
+    """Backend storing nothing, every lookup misses."""
+
+    def get(self, key: str) -> bytes | None:
+        """Miss."""
+        return None
+
+    def set(self, key: str, value: bytes) -> None:
+        """Drop the entry."""
+
+    def generations(self, tags: Iterable[str]) -> list[int]:
+        """Generation 0 for every tag."""
+        return [0 for _ in tags]
+
+    def bump(self, tags: Iterable[str]) -> None:
+        """Nothing to invalidate."""
+
+    def clear(self) -> None:
+        """Nothing to drop."""
+
+
+class MemoryCacheBackend:
+    """Least recently used entries of one process, bounded in count and bytes.
+
+    Writes of other workers don't reach the generations of this one, entries
+    expire after ``ttl`` seconds so their responses are at most that stale.
+    Tags are hashed onto a fixed array of generations like the mmap backend
+    does, tags sharing a generation only invalidate each other more often.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float) -> None:
+        """Empty LRU.
+
+        Args:
+            max_entries (int): entries kept.
+            max_bytes (int): total size of the kept values.
+            ttl (float): seconds an entry is served.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._generations = [0] * GENERATIONS
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        """Entry of a key, None on a miss or once it expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.size -= len(value)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store an entry, evicting the least recently used ones."""
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[1])
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self.size += len(value)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def generations(self, tags: Iterable[str]) -> list[int]:
+        """Current generation of every tag."""
+        return [self._generations[hash(tag) % GENERATIONS] for tag in tags]
+
+    def bump(self, tags: Iterable[str]) -> None:
+        """Increment generations of tags, once per generation."""
+        with self._lock:
+            for index in {hash(tag) % GENERATIONS for tag in tags}:
+                self._generations[index] += 1
+
+    def clear(self) -> None:
+        """Drop every entry, generations are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class SQLiteCacheBackend:
+    """Entries in a SQLite file shared by processes, oldest entries evicted first.
+
+    Generations live in the same file, a write in one worker invalidates the
+    entries of all of them.
+    """
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        """Open or create the cache file.
+
+        Args:
+            path (str): database file.
+            max_entries (int): entries kept.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entry"
+                " (key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS generation"
+                " (tag TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the calling thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode = wal")
+            connection.execute("PRAGMA synchronous = off")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> bytes | None:
+        """Entry of a key, None on a miss."""
+        row = (
+            self._connection()
+            .execute("SELECT value FROM entry WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return None if row is None else row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store an entry, evicting the oldest ones."""
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "INSERT OR REPLACE INTO entry (key, value) VALUES (?, ?)", (key, value)
+            )
+            connection.execute(
+                "DELETE FROM entry WHERE rowid <= ?",
+                (cursor.lastrowid - self.max_entries,),
+            )
+
+    def generations(self, tags: Iterable[str]) -> list[int]:
+        """Current generation of every tag."""
+        tags = list(tags)
+        rows = dict(
+            self._connection().execute(
+                "SELECT tag, value FROM generation"
+                f" WHERE tag IN ({', '.join('?' * len(tags))})",
+                tags,
+            )
+        )
+        return [rows.get(tag, 0) for tag in tags]
+
+    def bump(self, tags: Iterable[str]) -> None:
+        """Increment generations of tags."""
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT INTO generation (tag, value) VALUES (?, 1)"
+                " ON CONFLICT (tag) DO UPDATE SET value = value + 1",
+                [(tag,) for tag in tags],
+            )
+
+    def clear(self) -> None:
+        """Drop every entry, generations are kept."""
+        with self._connection() as connection:
+            connection.execute("DELETE FROM entry")
+
+
+class ResponseCache:
+    """Serialized responses with their ETags over a backend."""
+
+    def __init__(self, backend: CacheBackend) -> None:
+        """Cache over a backend.
+
+        Args:
+            backend (CacheBackend): entry storage.
+        """
+        self.backend = backend
+
+    def key(
+        self,
+        endpoint: str,
+        *,
+        tags: Iterable[str],
+        scope: int,
+        params: Mapping[str, Any],
+    ) -> str:
+        """Key of a response.
+
+        Args:
+            endpoint (str): endpoint name.
+            tags (Iterable[str]): tags the response depends on.
+            scope (int): permission mask of the caller.
+            params (Mapping[str, Any]): query parameters, order doesn't matter.
+
+        Returns:
+            str: cache key, changes when a tag is invalidated.
+        """
+        tags = sorted(tags)
+        generations = self.backend.generations(tags)
+        normalized = "&".join(f"{name}={params[name]}" for name in sorted(params))
+        versions = ",".join(f"{t}@{g}" for t, g in zip(tags, generations))
+        return f"{endpoint}?{normalized}|{scope}|{versions}"
+
+    def get(self, key: str) -> tuple[str, bytes] | None:
+        """Cached response.
+
+        Args:
+            key (str): key from :meth:`key`.
+
+        Returns:
+            tuple[str, bytes] | None: ETag and JSON body, None on a miss.
+        """
+        value = self.backend.get(key)
+        if value is None:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return etag.decode(), body
+
+    def set(self, key: str, etag: str, body: bytes) -> None:
+        """Cache a response.
+
+        Args:
+            key (str): key from :meth:`key`.
+            etag (str): ETag of the response.
+            body (bytes): JSON body.
+        """
+        self.backend.set(key, etag.encode() + b"\n" + body)
+
+    def invalidate(self, *tags: str) -> None:
+        """Invalidate every response depending on a tag.
+
+        Args:
+            *tags (str): tags.
+        """
+        self.backend.bump(tags)
+
+
+def create_backend(name: str) -> CacheBackend:
+    """Backend configured in ``settings.yaml``.
+
+    Args:
+        name (str): ``memory``, ``sqlite``, ``mmap`` or ``none``.
+
+    Raises:
+        ValueError: unknown backend.
+
+    Returns:
+        CacheBackend: backend.
+    """
+    if name == "memory":
+        return MemoryCacheBackend(
+            SETTINGS.RESPONSE_CACHE_MAX_ENTRIES,
+            SETTINGS.RESPONSE_CACHE_MAX_BYTES,
+            ttl=SETTINGS.RESPONSE_CACHE_TTL,
+        )
+    if name == "sqlite":
+        return SQLiteCacheBackend(
+            SETTINGS.RESPONSE_CACHE_PATH, SETTINGS.RESPONSE_CACHE_MAX_ENTRIES
+        )
+    if name == "mmap":
+        return MmapCacheBackend(
+            SETTINGS.RESPONSE_CACHE_MMAP_PATH,
+            slots=SETTINGS.RESPONSE_CACHE_MAX_ENTRIES,
+            slot_size=SETTINGS.RESPONSE_CACHE_MAX_BYTES
+            // SETTINGS.RESPONSE_CACHE_MAX_ENTRIES,
+        )
+    if name == "none":
+        return NullCacheBackend()
+    raise ValueError(f"unknown response cache backend {name!r}")
+
+
+response_cache = ResponseCache(create_backend(SETTINGS.RESPONSE_CACHE_BACKEND))
+
+
+def invalidate_on_commit(db: Session, *tags: str) -> None:
+    """Invalidate tags once the session commits, writes around the ORM use it.
+
+    Args:
+        db (Session): database session.
+        *tags (str): tags.
+    """
+    db.info.setdefault(PENDING_TAGS, set()).update(tags)
+
+
+@event.listens_for(UserModel, "after_insert")
+@event.listens_for(UserModel, "after_update")
+@event.listens_for(UserModel, "after_delete")
+def _user_written(mapper: Mapper, connection: Any, target: UserModel) -> None:
+    """Invalidate listings and the user's profile when the write commits."""
+    session = object_session(target)
+    if session is not None:
+        invalidate_on_commit(session, USERS_TAG, user_tag(target.username))
+
+
+@event.listens_for(RoleModel, "after_insert")
+@event.listens_for(RoleModel, "after_update")
+@event.listens_for(RoleModel, "after_delete")
+def _role_written(mapper: Mapper, connection: Any, target: RoleModel) -> None:
+    """Invalidate responses showing roles when the write commits."""
+    session = object_session(target)
+    if session is not None:
+        invalidate_on_commit(session, ROLES_TAG)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    """Bump tags of writes once they are visible to other sessions."""
+    tags = session.info.pop(PENDING_TAGS, None)
+    if tags:
+        response_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    """Rolled back writes changed nothing."""
+    session.info.pop(PENDING_TAGS, None)
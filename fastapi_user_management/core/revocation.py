@@ -0,0 +1,185 @@
+"""Revoked access tokens with a Bloom filter in front of the table.
+
+Every authenticated request checks its token's ``jti`` against the
+``revoked_token`` table. Most tokens aren't revoked, so the check first asks an
+in-memory Bloom filter of the revoked ids: a miss means the token is certainly
+not revoked and no query runs, only filter hits (revoked tokens and rare false
+positives) look the table up.
+
+The filter is rebuilt from the table every ``rebuild_interval`` seconds, which
+also prunes expired rows. Tokens revoked by this process are added to the filter
+right away; tokens revoked by other workers are seen after their next rebuild.
+
+Rebuilds after startup run in a background thread with a session of their own,
+checks keep answering from the previous filter until the new one replaces it.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from fastapi_user_management import crud
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.database import SessionLocal
+from fastapi_user_management.schemas.auth import RevokedTokenCreate
+from fastapi_user_management.tools.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+# spare room of a rebuilt filter for tokens revoked until the next rebuild
+MIN_CAPACITY = 1024
+
+
+@dataclass(slots=True)
+class RevocationStats:
+    """Counters of revocation checks since startup.
+
+    Attributes:
+        checks (int): tokens checked.
+        table_lookups (int): checks the filter couldn't answer.
+        false_positives (int): lookups that found the token not revoked.
+    """
+
+    checks: int = 0
+    table_lookups: int = 0
+    false_positives: int = 0
+
+
+class TokenRevocations:
+    """Revoked token ids, answered from a Bloom filter when possible."""
+
+    def __init__(
+        self,
+        *,
+        rebuild_interval: float,
+        error_rate: float,
+        session_factory: Callable[[], Session] | None = None,
+    ) -> None:
+        """Revocations without a filter, it's built by the first check.
+
+        Args:
+            rebuild_interval (float): seconds between two rebuilds of the filter.
+            error_rate (float): false positive rate of the filter.
+            session_factory (Callable[[], Session] | None, optional): sessions
+                of background rebuilds. Defaults to None, checks rebuild the
+                filter with their own session.
+        """
+        self.rebuild_interval = rebuild_interval
+        self.error_rate = error_rate
+        self.session_factory = session_factory
+        self.stats = RevocationStats()
+        self._filter: BloomFilter | None = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        # ids revoked while a rebuild scans, None when no rebuild runs
+        self._pending: list[str] | None = None
+        self._rebuilding: threading.Thread | None = None
+
+    @property
+    def filter(self) -> BloomFilter | None:
+        """Current filter, None before the first check."""
+        return self._filter
+
+    def rebuild(self, db: Session) -> None:
+        """Prune expired revocations and rebuild the filter from the table.
+
+        The scan doesn't hold the lock, tokens revoked meanwhile by this process
+        are added to the new filter too.
+
+        Args:
+            db (Session): database session.
+        """
+        with self._lock:
+            self._pending = []
+        try:
+            crud.revoked_token.prune(db)
+            jtis = crud.revoked_token.get_active_jtis(db)
+            bloom = BloomFilter.from_values(
+                jtis, capacity=2 * len(jtis) + MIN_CAPACITY, error_rate=self.error_rate
+            )
+            with self._lock:
+                for jti in self._pending:
+                    bloom.add(jti)
+                self._filter = bloom
+                self._built_at = time.monotonic()
+        finally:
+            self._pending = None
+
+    def rebuild_in_background(self) -> None:
+        """Start a rebuild in a thread, unless one is running."""
+        with self._lock:
+            if self._rebuilding is not None and self._rebuilding.is_alive():
+                return
+            self._rebuilding = threading.Thread(
+                target=self._rebuild_with_own_session,
+                name="revocation-filter-rebuild",
+                daemon=True,
+            )
+            self._rebuilding.start()
+
+    def _rebuild_with_own_session(self) -> None:
+        """Rebuild the filter with a session of the session factory."""
+        try:
+            with self.session_factory() as db:
+                self.rebuild(db)
+        except Exception:
+            # the previous filter stays, the next check tries again
+            logger.exception("Rebuild of the revocation filter failed")
+
+    def revoke(self, db: Session, *, jti: str, expires_at: datetime) -> None:
+        """Revoke a token.
+
+        Args:
+            db (Session): database session.
+            jti (str): ``jti`` claim of the token.
+            expires_at (datetime): ``exp`` claim of the token.
+        """
+        crud.revoked_token.revoke(
+            db, obj_in=RevokedTokenCreate(jti=jti, expires_at=expires_at)
+        )
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+            if self._pending is not None:
+                self._pending.append(jti)
+
+    def is_revoked(self, db: Session, *, jti: str) -> bool:
+        """Check whether a token was revoked.
+
+        Args:
+            db (Session): database session.
+            jti (str): ``jti`` claim of the token.
+
+        Returns:
+            bool: True if the token is revoked.
+        """
+        if (
+            self._filter is None
+            or time.monotonic() - self._built_at > self.rebuild_interval
+        ):
+            if self.session_factory is None:
+                self.rebuild(db)
+            else:
+                self.rebuild_in_background()
+        self.stats.checks += 1
+        bloom = self._filter
+        # built at startup, until then every token is looked up
+        if bloom is not None and jti not in bloom:
+            return False
+        self.stats.table_lookups += 1
+        revoked = crud.revoked_token.is_revoked(db, jti=jti)
+        if not revoked:
+            self.stats.false_positives += 1
+        return revoked
+
+
+token_revocations = TokenRevocations(
+    rebuild_interval=SETTINGS.REVOCATION_REBUILD_INTERVAL,
+    error_rate=SETTINGS.REVOCATION_ERROR_RATE,
+    session_factory=SessionLocal,
+)
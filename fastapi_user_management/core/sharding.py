@@ -0,0 +1,232 @@
+"""Hash-sharded user storage.
+
+Users are partitioned by a stable hash of their username (:func:`shard_for`)
+over the databases of ``database.shards`` in ``settings.yaml``:
+
+* ``user_account`` and ``user_role`` rows live on the shard of their user, so
+  do their archived copies, ``table_version`` counts the writes of every shard
+  on that shard.
+* ``role``, ``permission`` and ``role_permission`` are reference data copied to
+  every shard, so roles of a user are joined on its own shard.
+* Every other table lives on the home shard ``"0"``.
+
+Queries filtering users by username go to the user's shard, other user queries
+fan out to every shard and their results are concatenated. Ordered listings
+merge the per-shard pages themselves (see ``CRUDUser.get_page``).
+
+Flushing ``user_role`` rows doesn't tell which user they belong to, so writes
+run on the shard a session is pinned to with :func:`pin_shard`; CRUD methods
+writing a user pin its shard first.
+"""
+
+import hashlib
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import Column
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+
+HOME_SHARD = "0"
+SHARDED_TABLES = frozenset(
+    {
+        "user_account",
+        "user_role",
+        "table_version",
+        "user_account_archive",
+        "user_role_archive",
+    }
+)
+# tables whose username criteria tell the shard of a statement
+USERNAME_TABLES = frozenset({"user_account", "user_account_archive"})
+REPLICATED_TABLES = frozenset({"role", "permission", "role_permission"})
+
+
+def shard_for(username: str, shards: int) -> str:
+    """Shard id of a username.
+
+    The hash doesn't depend on the interpreter (unlike ``hash()``), a username
+    maps to the same shard in every process as long as the shard count stays.
+
+    Args:
+        username (str): username.
+        shards (int): number of shards.
+
+    Returns:
+        str: shard id, ``"0"`` to ``str(shards - 1)``.
+    """
+    digest = hashlib.blake2b(username.encode(), digest_size=8).digest()
+    return str(int.from_bytes(digest, "big") % shards)
+
+
+def _usernames(statement: Any) -> list[str] | None:
+    """Usernames a statement is restricted to by its WHERE clause.
+
+    Only top level ``username == value`` and ``username IN (...)`` criteria
+    combined with AND are recognized.
+
+    Args:
+        statement (Any): SELECT, UPDATE or DELETE statement.
+
+    Returns:
+        list[str] | None: usernames, None when the statement isn't restricted.
+    """
+    where = getattr(statement, "whereclause", None)
+    if where is None:
+        return None
+    criteria: Iterable[Any] = (
+        where.clauses
+        if isinstance(where, BooleanClauseList) and where.operator is operators.and_
+        else [where]
+    )
+    for criterion in criteria:
+        if not (
+            isinstance(criterion, BinaryExpression)
+            and isinstance(criterion.left, Column)
+            and criterion.left.table.name in USERNAME_TABLES
+            and criterion.left.name == "username"
+            and isinstance(criterion.right, BindParameter)
+        ):
+            continue
+        if criterion.operator is operators.eq:
+            return [criterion.right.effective_value]
+        if criterion.operator is operators.in_op:
+            return list(criterion.right.effective_value)
+    return None
+
+
+class UserShardedSession(ShardedSession):
+    """Session routing rows and queries to the shards of their users."""
+
+    def __init__(self, *args: Any, shards: dict[str, Any], **kwargs: Any):
+        """Sharded session.
+
+        Args:
+            *args (Any): arguments of :class:`Session`.
+            shards (dict[str, Any]): engine of every shard id.
+            **kwargs (Any): keyword arguments of :class:`Session`.
+        """
+        self.shard_ids = sorted(shards, key=int)
+        super().__init__(
+            *args,
+            shards=shards,
+            shard_chooser=self.choose_shard,
+            identity_chooser=self.choose_identity_shards,
+            execute_chooser=self.choose_execute_shards,
+            **kwargs,
+        )
+
+    def _shards_of(self, table: str | None) -> list[str]:
+        """Shards a table without further criteria is read from."""
+        if table in SHARDED_TABLES:
+            return self.shard_ids
+        if table in REPLICATED_TABLES:
+            return [self.info.get("shard_id", HOME_SHARD)]
+        return [HOME_SHARD]
+
+    def choose_shard(self, mapper: Any, instance: Any, clause: Any = None) -> str:
+        """Shard of a new row.
+
+        Args:
+            mapper (Any): mapper of the row.
+            instance (Any): the row, None for association rows.
+            clause (Any, optional): statement being executed.
+
+        Returns:
+            str: shard id.
+        """
+        username = getattr(instance, "username", None)
+        if username is not None:
+            return shard_for(username, len(self.shard_ids))
+        table = getattr(getattr(mapper, "local_table", None), "name", None)
+        if table in SHARDED_TABLES | REPLICATED_TABLES:
+            return self.info.get("shard_id", HOME_SHARD)
+        return HOME_SHARD
+
+    def choose_identity_shards(
+        self, mapper: Any, primary_key: Any, *, lazy_loaded_from: Any, **kw: Any
+    ) -> list[str]:
+        """Shards to look a primary key up in.
+
+        Args:
+            mapper (Any): mapper of the row.
+            primary_key (Any): primary key values.
+            lazy_loaded_from (Any): state of the row loading this one, if any.
+            **kw (Any): execution options and bind arguments.
+
+        Returns:
+            list[str]: shard ids.
+        """
+        if lazy_loaded_from is not None and lazy_loaded_from.identity_token:
+            return [lazy_loaded_from.identity_token]
+        return self._shards_of(mapper.local_table.name)
+
+    def choose_execute_shards(self, context: ORMExecuteState) -> list[str]:
+        """Shards to run a statement on.
+
+        Args:
+            context (ORMExecuteState): statement execution.
+
+        Returns:
+            list[str]: shard ids.
+        """
+        if context.lazy_loaded_from is not None:
+            # relationships of a row are stored on the shard of the row
+            return [context.lazy_loaded_from.identity_token]
+        tables = {mapper.local_table.name for mapper in context.all_mappers}
+        if tables & SHARDED_TABLES:
+            usernames = _usernames(context.statement)
+            if usernames is not None:
+                return sorted(
+                    {shard_for(name, len(self.shard_ids)) for name in usernames},
+                    key=int,
+                )
+            return self.shard_ids
+        if tables & REPLICATED_TABLES:
+            return self._shards_of(next(iter(tables & REPLICATED_TABLES)))
+        return [HOME_SHARD]
+
+
+def pin_shard(db: Session, username: str) -> None:
+    """Write rows without a username (``user_role``, roles) to a user's shard.
+
+    Does nothing on sessions that aren't sharded.
+
+    Args:
+        db (Session): database session.
+        username (str): username of the user being written.
+    """
+    if isinstance(db, UserShardedSession):
+        db.info["shard_id"] = shard_for(username, len(db.shard_ids))
+
+
+def shard_bind_arguments(db: Session) -> dict[str, dict[str, Any]]:
+    """Bind arguments running a statement on each shard of a session.
+
+    Args:
+        db (Session): database session.
+
+    Returns:
+        dict[str, dict[str, Any]]: bind arguments by shard id, a single empty
+            entry for sessions that aren't sharded.
+    """
+    if isinstance(db, UserShardedSession):
+        return {shard: {"shard_id": shard} for shard in db.shard_ids}
+    return {HOME_SHARD: {}}
+
+
+def user_bind_arguments(db: Session, username: str) -> dict[str, Any]:
+    """Bind arguments running a statement on the shard of a user.
+
+    Args:
+        db (Session): database session.
+        username (str): username.
+
+    Returns:
+        dict[str, Any]: bind arguments, empty for sessions that aren't sharded.
+    """
+    if isinstance(db, UserShardedSession):
+        return {"shard_id": shard_for(username, len(db.shard_ids))}
+    return {}
@@ -0,0 +1,238 @@
+"""Cache backend in a memory-mapped file shared by the workers of a host.
+
+The file holds a header, a table of tag generations and a fixed number of
+fixed-size slots::
+
+    header | generations (u64 each) | slot 0 | slot 1 | ... | slot n-1
+
+* A key lives in one of ``PROBES`` consecutive slots starting at its hash. A
+  full neighbourhood overwrites its least recently written slot, so the table
+  never grows and never needs a sweep; entries keyed with old generations are
+  overwritten the same way.
+* Every slot starts with a version: writers make it odd while they write and
+  even again afterwards, under a byte range lock of the slot (``fcntl``) so
+  writers of different processes never interleave. Readers don't lock, they
+  don't retry: an odd or changed version, or a checksum mismatch, is a miss.
+* Tags are hashed onto ``GENERATIONS`` counters. Two tags sharing a counter
+  invalidate each other's entries, never keep stale ones alive.
+* The file name ends with the layout version and the geometry, e.g.
+  ``response_cache.mmap.1.1024x32768``: workers started with other settings map
+  another file, a mapped file is never resized. Files no worker maps anymore
+  can be deleted.
+
+Only POSIX systems are supported (``fcntl``).
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Iterable
+
+MAGIC = b"FUMCACHE"
+LAYOUT_VERSION = 1
+GENERATIONS = 4096
+PROBES = 4
+PAGE = 4096
+
+# magic, layout version, slots, slot size, generations
+HEADER = struct.Struct("<8sIIII")
+GENERATION = struct.Struct("<Q")
+VERSION = struct.Struct("<I")
+# version, key hash, written at, key length, value length, value checksum
+SLOT_HEADER = struct.Struct("<IQdHII")
+SLOT_HEADER_SIZE = 32
+
+
+def _hash(value: str) -> int:
+    """64 bit hash of a string, equal in every process."""
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), "little"
+    )
+
+
+class MmapCacheBackend:
+    """Fixed-slot hash table of entries and tag generations in a shared file."""
+
+    def __init__(self, path: str, *, slots: int, slot_size: int) -> None:
+        """Map the cache file of a geometry, creating it if needed.
+
+        Args:
+            path (str): cache file, every worker of the host maps the same one,
+                the layout version and geometry are appended to it.
+            slots (int): number of slots.
+            slot_size (int): bytes of a slot, key and value included.
+
+        Raises:
+            ValueError: slots too small to hold anything, or the file isn't a
+                cache file of this geometry.
+        """
+        if slot_size <= SLOT_HEADER_SIZE:
+            raise ValueError(f"slot_size must exceed {SLOT_HEADER_SIZE} bytes")
+        self.path = f"{path}.{LAYOUT_VERSION}.{slots}x{slot_size}"
+        self.slots = slots
+        self.slot_size = slot_size
+        self._generations_offset = PAGE
+        self._slots_offset = PAGE * (1 + (GENERATIONS * GENERATION.size) // PAGE)
+        self._size = self._slots_offset + slots * slot_size
+        self._lock = threading.Lock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        expected = HEADER.pack(MAGIC, LAYOUT_VERSION, slots, slot_size, GENERATIONS)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, HEADER.size, 0)
+            if not header.strip(b"\0"):
+                # new file, mapped by nobody until its header is written
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, expected, 0)
+                header = expected
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        if header != expected:
+            os.close(self._fd)
+            raise ValueError(f"{self.path} isn't a cache file of this geometry")
+        self._map = mmap.mmap(self._fd, self._size)
+
+    def _slot_offsets(self, key_hash: int) -> list[int]:
+        """Offsets of the slots a key may live in."""
+        first = key_hash % self.slots
+        return [
+            self._slots_offset + (first + i) % self.slots * self.slot_size
+            for i in range(min(PROBES, self.slots))
+        ]
+
+    def _read(self, offset: int, key_hash: int, key: bytes) -> bytes | None:
+        """Value of a slot if it holds the key and wasn't being written."""
+        version, stored_hash, _, key_len, value_len, checksum = SLOT_HEADER.unpack_from(
+            self._map, offset
+        )
+        if version & 1 or stored_hash != key_hash or key_len != len(key):
+            return None
+        if SLOT_HEADER_SIZE + key_len + value_len > self.slot_size:
+            return None
+        start = offset + SLOT_HEADER_SIZE
+        if self._map[start : start + key_len] != key:
+            return None
+        value = self._map[start + key_len : start + key_len + value_len]
+        if (
+            VERSION.unpack_from(self._map, offset)[0] != version
+            or zlib.crc32(value) != checksum
+        ):
+            return None
+        return value
+
+    def get(self, key: str) -> bytes | None:
+        """Entry of a key, None on a miss."""
+        key_hash = _hash(key)
+        encoded = key.encode()
+        for offset in self._slot_offsets(key_hash):
+            value = self._read(offset, key_hash, encoded)
+            if value is not None:
+                return value
+        return None
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store an entry, replacing the least recently written of its slots."""
+        encoded = key.encode()
+        if SLOT_HEADER_SIZE + len(encoded) + len(value) > self.slot_size:
+            return
+        key_hash = _hash(key)
+        offsets = self._slot_offsets(key_hash)
+
+        def rank(offset: int) -> tuple[int, float]:
+            _, stored_hash, written_at, key_len, _, _ = SLOT_HEADER.unpack_from(
+                self._map, offset
+            )
+            if stored_hash == key_hash and key_len == len(encoded):
+                return (0, 0.0)
+            if not key_len:
+                return (1, 0.0)
+            return (2, written_at)
+
+        offset = min(offsets, key=rank)
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.slot_size, offset)
+            try:
+                (version,) = VERSION.unpack_from(self._map, offset)
+                writing = version | 1
+                VERSION.pack_into(self._map, offset, writing)
+                start = offset + SLOT_HEADER_SIZE
+                self._map[start : start + len(encoded)] = encoded
+                self._map[start + len(encoded) : start + len(encoded) + len(value)] = (
+                    value
+                )
+                SLOT_HEADER.pack_into(
+                    self._map,
+                    offset,
+                    writing,
+                    key_hash,
+                    time.time(),
+                    len(encoded),
+                    len(value),
+                    zlib.crc32(value),
+                )
+                VERSION.pack_into(self._map, offset, (writing + 1) & 0xFFFFFFFF)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slot_size, offset)
+
+    def _generation_offset(self, tag: str) -> int:
+        """Offset of the counter of a tag."""
+        return self._generations_offset + _hash(tag) % GENERATIONS * GENERATION.size
+
+    def generations(self, tags: Iterable[str]) -> list[int]:
+        """Current generation of every tag."""
+        return [
+            GENERATION.unpack_from(self._map, self._generation_offset(tag))[0]
+            for tag in tags
+        ]
+
+    def bump(self, tags: Iterable[str]) -> None:
+        """Increment generations of tags, in every process mapping the file."""
+        with self._lock:
+            for offset in sorted({self._generation_offset(tag) for tag in tags}):
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, GENERATION.size, offset)
+                try:
+                    (generation,) = GENERATION.unpack_from(self._map, offset)
+                    GENERATION.pack_into(self._map, offset, generation + 1)
+                finally:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, GENERATION.size, offset)
+
+    def clear(self) -> None:
+        """Drop every entry, generations are kept."""
+        with self._lock:
+            fcntl.lockf(
+                self._fd,
+                fcntl.LOCK_EX,
+                self.slots * self.slot_size,
+                self._slots_offset,
+            )
+            try:
+                for slot in range(self.slots):
+                    offset = self._slots_offset + slot * self.slot_size
+                    (version,) = VERSION.unpack_from(self._map, offset)
+                    SLOT_HEADER.pack_into(
+                        self._map,
+                        offset,
+                        ((version | 1) + 1) & 0xFFFFFFFF,
+                        0,
+                        0.0,
+                        0,
+                        0,
+                        0,
+                    )
+            finally:
+                fcntl.lockf(
+                    self._fd,
+                    fcntl.LOCK_UN,
+                    self.slots * self.slot_size,
+                    self._slots_offset,
+                )
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._map.close()
+        os.close(self._fd)
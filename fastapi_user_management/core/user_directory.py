@@ -0,0 +1,296 @@
+"""Read-only snapshot of the users, for authentication without the database.
+
+A snapshot is a file of the fields token validation needs, for every user of
+every shard, sorted by a 64 bit hash of the username and stored by column::
+
+    header | hashes (u64) | ids (i64) | token versions (u32) | role masks (u32)
+           | statuses (u8)
+
+:class:`UserDirectory` maps the file and finds a username by binary search over
+the hash column, read in place through a ``memoryview``: nothing is parsed or
+copied, whatever the number of users. Snapshots are written to a temporary file
+and renamed over the previous one, readers notice the new file every
+``refresh_interval`` seconds and switch to it; lookups still running keep the
+map they started with.
+
+Snapshots are stale by design: a snapshot older than ``max_age`` isn't used, and
+callers fall back to the database for users the snapshot doesn't know, or
+whose token version differs (tokens issued or revoked since it was built).
+Statuses and roles may have changed since too, routes requiring a permission
+look their users up again. Usernames whose hashes collide are left out of the snapshot.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import suppress
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, select
+
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.database import shard_engines
+from fastapi_user_management.models.user import UserModel, UserStatusValues
+
+MAGIC = b"FUMUSERS"
+LAYOUT_VERSION = 1
+# magic, layout version, users, built at (UNIX time)
+HEADER = struct.Struct("<8sIQd")
+HEADER_SIZE = 32
+STATUSES = list(UserStatusValues)
+BATCH_SIZE = 1000
+
+
+def username_hash(username: str) -> int:
+    """64 bit hash of a username, equal in every process."""
+    return int.from_bytes(
+        hashlib.blake2b(username.encode(), digest_size=8).digest(), "little"
+    )
+
+
+@dataclass(slots=True, frozen=True)
+class DirectoryEntry:
+    """User found in a snapshot.
+
+    Attributes:
+        id (int): id of the user in their shard.
+        status (UserStatusValues): status.
+        role_mask (int): role bits, see ``UserModel.role_mask``.
+        token_version (int): version claimed by valid tokens.
+    """
+
+    id: int
+    status: UserStatusValues
+    role_mask: int
+    token_version: int
+
+
+def read_users(engines: Iterable[Engine]) -> Iterator[tuple[int, int, int, int, int]]:
+    """Stream the snapshot fields of the users of every shard.
+
+    Args:
+        engines (Iterable[Engine]): shard engines.
+
+    Yields:
+        tuple[int, int, int, int, int]: username hash, id, token version, role
+            mask and status index of a user.
+    """
+    query = select(
+        UserModel.username,
+        UserModel.id,
+        UserModel.token_version,
+        UserModel.role_mask,
+        UserModel.status,
+    ).execution_options(yield_per=BATCH_SIZE)
+    for engine in engines:
+        with engine.connect() as connection:
+            for username, id_, token_version, role_mask, status in connection.execute(
+                query
+            ):
+                yield (
+                    username_hash(username),
+                    id_,
+                    token_version,
+                    role_mask,
+                    STATUSES.index(status),
+                )
+
+
+def write_snapshot(path: str, users: Iterable[tuple[int, int, int, int, int]]) -> int:
+    """Write a snapshot atomically.
+
+    Args:
+        path (str): snapshot file, replaced once the new one is complete.
+        users (Iterable[tuple[int, int, int, int, int]]): rows of
+            :func:`read_users`.
+
+    Returns:
+        int: users written.
+    """
+    rows = sorted(users)
+    colliding = {
+        rows[i][0] for i in range(1, len(rows)) if rows[i][0] == rows[i - 1][0]
+    }
+    rows = [row for row in rows if row[0] not in colliding]
+    columns = list(zip(*rows)) or [(), (), (), (), ()]
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(
+            HEADER.pack(MAGIC, LAYOUT_VERSION, len(rows), time.time()).ljust(
+                HEADER_SIZE, b"\0"
+            )
+        )
+        for fmt, column in zip("QqIIB", columns):
+            file.write(struct.pack(f"<{len(column)}{fmt}", *column))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    return len(rows)
+
+
+def build_snapshot(path: str) -> int:
+    """Snapshot the users of every shard.
+
+    Args:
+        path (str): snapshot file.
+
+    Returns:
+        int: users written.
+    """
+    return write_snapshot(path, read_users(shard_engines.values()))
+
+
+class _Snapshot:
+    """Columns of a mapped snapshot file."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self.identity = os.fstat(file.fileno()).st_ino
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, layout_version, count, self.built_at = HEADER.unpack_from(self._map)
+        if magic != MAGIC or layout_version != LAYOUT_VERSION:
+            raise ValueError(f"{path} isn't a user directory snapshot")
+        view = memoryview(self._map)
+        offset = HEADER_SIZE
+        columns = []
+        for fmt, size in zip("QqIIB", (8, 8, 4, 4, 1)):
+            columns.append(view[offset : offset + count * size].cast(fmt))
+            offset += count * size
+        self.hashes, self.ids, self.token_versions, self.role_masks, self.statuses = (
+            columns
+        )
+
+    def find(self, key: int) -> int | None:
+        """Index of a username hash, None if absent."""
+        index = bisect.bisect_left(self.hashes, key)
+        if index < len(self.hashes) and self.hashes[index] == key:
+            return index
+        return None
+
+
+class UserDirectory:
+    """Users of the latest snapshot file."""
+
+    def __init__(self, path: str, *, refresh_interval: float, max_age: float) -> None:
+        """Directory over a snapshot file, mapped by the first lookup.
+
+        Args:
+            path (str): snapshot file.
+            refresh_interval (float): seconds between checks for a new snapshot.
+            max_age (float): seconds a snapshot is used after it was built.
+        """
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._snapshot: _Snapshot | None = None
+        self._checked_at = float("-inf")
+
+    def refresh(self) -> None:
+        """Switch to the snapshot file if it was replaced."""
+        self._checked_at = time.monotonic()
+        try:
+            identity = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            self._snapshot = None
+            return
+        if self._snapshot is None or self._snapshot.identity != identity:
+            self._snapshot = _Snapshot(self.path)
+
+    def lookup(self, username: str) -> DirectoryEntry | None:
+        """Snapshot fields of a user.
+
+        Args:
+            username (str): username.
+
+        Returns:
+            DirectoryEntry | None: user, None if the snapshot doesn't have them
+                or is too old.
+        """
+        if time.monotonic() - self._checked_at > self.refresh_interval:
+            self.refresh()
+        snapshot = self._snapshot
+        if snapshot is None or time.time() - snapshot.built_at > self.max_age:
+            return None
+        index = snapshot.find(username_hash(username))
+        if index is None:
+            return None
+        return DirectoryEntry(
+            id=snapshot.ids[index],
+            status=STATUSES[snapshot.statuses[index]],
+            role_mask=snapshot.role_masks[index],
+            token_version=snapshot.token_versions[index],
+        )
+
+    def principal(self, username: str, *, token_version: int) -> UserModel | None:
+        """User of a token, detached from any session.
+
+        Args:
+            username (str): ``sub`` claim of the token.
+            token_version (int): ``ver`` claim of the token.
+
+        Returns:
+            UserModel | None: user with the snapshot fields, None when the
+                database must decide.
+        """
+        entry = self.lookup(username)
+        if entry is None or entry.token_version != token_version:
+            return None
+        return UserModel(
+            id=entry.id,
+            username=username,
+            status=entry.status,
+            role_mask=entry.role_mask,
+            token_version=entry.token_version,
+        )
+
+
+class SnapshotBuilder:
+    """Task rebuilding the snapshot of a worker periodically."""
+
+    def __init__(self, path: str, *, interval: float) -> None:
+        """Builder, started by :meth:`start`.
+
+        Args:
+            path (str): snapshot file.
+            interval (float): seconds between two builds.
+        """
+        self.path = path
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Build snapshots on the running loop, in a thread."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop building."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.to_thread(build_snapshot, self.path)
+            await asyncio.sleep(self.interval)
+
+
+user_directory = (
+    UserDirectory(
+        SETTINGS.USER_DIRECTORY_PATH,
+        refresh_interval=SETTINGS.USER_DIRECTORY_REFRESH_INTERVAL,
+        max_age=SETTINGS.USER_DIRECTORY_MAX_AGE,
+    )
+    if SETTINGS.USER_DIRECTORY_ENABLED
+    else None
+)
+snapshot_builder = SnapshotBuilder(
+    SETTINGS.USER_DIRECTORY_PATH, interval=SETTINGS.USER_DIRECTORY_BUILD_INTERVAL
+)
@@ -0,0 +1,271 @@
+"""Bloom filter of existing usernames.
+
+Logins and user creation start by looking the username up. Under credential
+stuffing most logins are for usernames that don't exist, so both first ask an
+in-memory Bloom filter of the usernames: a miss means the user certainly doesn't
+exist and no query runs. Hits (existing users and rare false positives) look
+the user up as before.
+
+The filter is built by a scan of every shard at startup and every
+``rebuild_interval`` seconds. Users created by this process are added right
+away; every ``sync_interval`` seconds, users created by other workers are added
+by a primary key range query above the highest id seen on each shard, ids of
+``user_account`` are AUTOINCREMENT so they're never reused. Bloom filters can't
+forget: deleted usernames stay in the filter, as false positives, until the
+next rebuild, which happens early once deletions reach a tenth of the filter.
+Archived users keep their username, the filter has them too.
+
+Rebuilds after startup run in a background thread with a session of their own,
+checks keep answering from the previous filter until the new one replaces it.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.database import SessionLocal
+from fastapi_user_management.core.sharding import shard_bind_arguments
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.models.user_archive import ArchivedUserModel
+from fastapi_user_management.tools.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+# spare room of a rebuilt filter for users created until the next rebuild
+MIN_CAPACITY = 1024
+# ids below the highest one seen read again by a sync, for inserts committed
+# out of id order
+SYNC_OVERLAP = 64
+BATCH_SIZE = 1000
+
+
+@dataclass(slots=True)
+class UsernameFilterStats:
+    """Counters of username checks since startup.
+
+    Attributes:
+        checks (int): usernames checked.
+        definite_misses (int): checks answered without a query.
+        false_positives (int): filter hits whose lookup found no user.
+    """
+
+    checks: int = 0
+    definite_misses: int = 0
+    false_positives: int = 0
+
+
+class UsernameFilter:
+    """Existing usernames, answered from a Bloom filter."""
+
+    def __init__(
+        self,
+        *,
+        sync_interval: float,
+        rebuild_interval: float,
+        error_rate: float,
+        session_factory: Callable[[], Session] | None = None,
+    ) -> None:
+        """Filter without usernames, it's built by the first check.
+
+        Args:
+            sync_interval (float): seconds between two reads of new users.
+            rebuild_interval (float): seconds between two rebuilds of the filter.
+            error_rate (float): false positive rate of the filter.
+            session_factory (Callable[[], Session] | None, optional): sessions
+                of background rebuilds. Defaults to None, checks rebuild the
+                filter with their own session.
+        """
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.error_rate = error_rate
+        self.session_factory = session_factory
+        self.stats = UsernameFilterStats()
+        self._filter: BloomFilter | None = None
+        self._capacity = 0
+        self._deleted = 0
+        self._max_ids: dict[str, int] = {}
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        # usernames added while a rebuild scans, None when no rebuild runs
+        self._pending: list[str] | None = None
+        self._rebuilding: threading.Thread | None = None
+
+    @property
+    def filter(self) -> BloomFilter | None:
+        """Current filter, None before the first check."""
+        return self._filter
+
+    def rebuild(self, db: Session) -> None:
+        """Rebuild the filter from a scan of every shard.
+
+        The scan doesn't hold the lock, usernames added meanwhile are added to
+        the new filter too.
+
+        Args:
+            db (Session): database session.
+        """
+        with self._lock:
+            self._pending = []
+        try:
+            shards = shard_bind_arguments(db)
+            count = sum(
+                db.scalar(select(func.count(model.id)), bind_arguments=bind)
+                for bind in shards.values()
+                for model in (UserModel, ArchivedUserModel)
+            )
+            capacity = 2 * count + MIN_CAPACITY
+            bloom = BloomFilter(capacity, self.error_rate)
+            max_ids: dict[str, int] = {}
+            query = select(UserModel.id, UserModel.username).execution_options(
+                yield_per=BATCH_SIZE
+            )
+            archived = select(ArchivedUserModel.username).execution_options(
+                yield_per=BATCH_SIZE
+            )
+            for shard, bind in shards.items():
+                max_id = 0
+                for id_, username in db.execute(query, bind_arguments=bind):
+                    bloom.add(username)
+                    max_id = max(max_id, id_)
+                max_ids[shard] = max_id
+                for username in db.scalars(archived, bind_arguments=bind):
+                    bloom.add(username)
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        # swapped and reset at once, later usernames are added to the new filter
+        with self._lock:
+            for username in self._pending:
+                if username not in bloom:
+                    bloom.add(username)
+            for shard, max_id in max_ids.items():
+                self._max_ids[shard] = max(self._max_ids.get(shard, 0), max_id)
+            self._filter = bloom
+            self._capacity = capacity
+            self._deleted = 0
+            self._built_at = self._synced_at = time.monotonic()
+            self._pending = None
+
+    def rebuild_in_background(self) -> None:
+        """Start a rebuild in a thread, unless one is running."""
+        with self._lock:
+            if self._rebuilding is not None and self._rebuilding.is_alive():
+                return
+            self._rebuilding = threading.Thread(
+                target=self._rebuild_with_own_session,
+                name="username-filter-rebuild",
+                daemon=True,
+            )
+            self._rebuilding.start()
+
+    def _rebuild_with_own_session(self) -> None:
+        """Rebuild the filter with a session of the session factory."""
+        try:
+            with self.session_factory() as db:
+                self.rebuild(db)
+        except Exception:
+            # the previous filter stays, the next check tries again
+            logger.exception("Rebuild of the username filter failed")
+
+    def sync(self, db: Session) -> None:
+        """Add users created by other processes since the last sync.
+
+        Args:
+            db (Session): database session.
+        """
+        with self._lock:
+            for shard, bind in shard_bind_arguments(db).items():
+                max_id = self._max_ids.get(shard, 0)
+                rows = db.execute(
+                    select(UserModel.id, UserModel.username).where(
+                        UserModel.id > max_id - SYNC_OVERLAP
+                    ),
+                    bind_arguments=bind,
+                )
+                for id_, username in rows:
+                    self._add(username)
+                    self._max_ids[shard] = max(self._max_ids.get(shard, 0), id_)
+            self._synced_at = time.monotonic()
+
+    def add(self, username: str) -> None:
+        """Add a created user.
+
+        Args:
+            username (str): username.
+        """
+        with self._lock:
+            self._add(username)
+
+    def _add(self, username: str) -> None:
+        """Add a username to the filter and to a running rebuild, locked."""
+        if self._filter is not None and username not in self._filter:
+            self._filter.add(username)
+        if self._pending is not None:
+            self._pending.append(username)
+
+    def remove(self, username: str) -> None:
+        """Count a deleted user, it stays a false positive until the next rebuild.
+
+        Args:
+            username (str): username.
+        """
+        self._deleted += 1
+
+    def might_exist(self, db: Session, *, username: str) -> bool:
+        """Check whether a user may exist.
+
+        Args:
+            db (Session): database session.
+            username (str): username.
+
+        Returns:
+            bool: False if the user certainly doesn't exist.
+        """
+        now = time.monotonic()
+        if self.session_factory is None and self._filter is None:
+            self.rebuild(db)
+        if self._filter is None:
+            # built at startup, until then every user may exist
+            self.rebuild_in_background()
+            self.stats.checks += 1
+            return True
+        if (
+            now - self._built_at > self.rebuild_interval
+            or self._filter.count > self._capacity
+            or self._deleted * 10 > self._filter.count
+        ):
+            if self.session_factory is None:
+                self.rebuild(db)
+            else:
+                self.rebuild_in_background()
+        if now - self._synced_at > self.sync_interval:
+            self.sync(db)
+        self.stats.checks += 1
+        if username in self._filter:
+            return True
+        self.stats.definite_misses += 1
+        return False
+
+    def record_false_positive(self) -> None:
+        """Count a filter hit whose lookup found no user."""
+        self.stats.false_positives += 1
+
+
+username_filter = (
+    UsernameFilter(
+        sync_interval=SETTINGS.USERNAME_FILTER_SYNC_INTERVAL,
+        rebuild_interval=SETTINGS.USERNAME_FILTER_REBUILD_INTERVAL,
+        error_rate=SETTINGS.USERNAME_FILTER_ERROR_RATE,
+        session_factory=SessionLocal,
+    )
+    if SETTINGS.USERNAME_FILTER_ENABLED
+    else None
+)
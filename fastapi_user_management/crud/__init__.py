@@ -1,4 +1,15 @@
+from fastapi_user_management.crud.crud_dicom_series import dicom_series
+from fastapi_user_management.crud.crud_permission import permission
+from fastapi_user_management.crud.crud_revoked_token import revoked_token
 from fastapi_user_management.crud.crud_role import role
+from fastapi_user_management.crud.crud_user_archive import user_archive
 from fastapi_user_management.crud.crud_users import user
 
-__all__ = ["user", "role"]
+__all__ = [
+    "user",
+    "role",
+    "permission",
+    "dicom_series",
+    "revoked_token",
+    "user_archive",
+]
@@ -1,9 +1,8 @@
 """Base CRUD module for inheritance."""
 from typing import Any, Generic, TypeVar
 
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import inspect, select
 from sqlalchemy.orm import Session
 
 from fastapi_user_management.models.base import Base
@@ -56,20 +55,27 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             db.execute(select(self.model).offset(skip).limit(limit)).scalars().all()
         )   
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+    def create(
+        self, db: Session, *, obj_in: CreateSchemaType, commit: bool = True
+    ) -> ModelType:
         """Create new object.
 
         Args:
             db (Session): database session
             obj_in (CreateSchemaType): new object based on schema
+            commit (bool, optional): commit the session, when False changes are
+                only flushed, e.g. inside a savepoint. Defaults to True.
 
         Returns:
             ModelType: created object
         """
-        obj_in_data = jsonable_encoder(obj_in)   
+        obj_in_data = obj_in.model_dump()
         db_obj = self.model(**obj_in_data)   
         db.add(db_obj)   
-        db.commit()   
+        if commit:
+            db.commit()
+        else:
+            db.flush()
         db.refresh(db_obj)   
         return db_obj   
 
@@ -79,6 +85,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         *,
         db_obj: ModelType,
         obj_in: UpdateSchemaType | dict[str, Any],
+        commit: bool = True,
     ) -> ModelType:
         """Update existing record.
 
@@ -86,29 +93,36 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             db (Session): database session
             db_obj (ModelType): existing record
             obj_in (UpdateSchemaType | dict[str, Any]): updated information
+            commit (bool, optional): commit the session, when False changes are
+                only flushed, e.g. inside a savepoint. Defaults to True.
 
         Returns:
             ModelType: updated record
         """
-        obj_data = jsonable_encoder(db_obj)
+        columns = inspect(db_obj).mapper.column_attrs.keys()
         if isinstance(obj_in, dict):   
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)   
-        for field in obj_data:
+            update_data = obj_in.model_dump(exclude_unset=True)   
+        for field in columns:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
-        db.commit()
+        if commit:
+            db.commit()
+        else:
+            db.flush()
         db.refresh(db_obj)
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
+    def remove(self, db: Session, *, id: int, commit: bool = True) -> ModelType:
         """Remove existing object.
 
         Args:
             db (Session): database session
             id (int): object id
+            commit (bool, optional): commit the session, when False changes are
+                only flushed, e.g. inside a savepoint. Defaults to True.
 
         Returns:
             ModelType: deleted object
@@ -117,5 +131,8 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             select(self.model).where(self.model.id == id)
         ).scalar_one()
         db.delete(obj)  # type: ignore  # `[no-untyped-call]`
-        db.commit()
+        if commit:
+            db.commit()
+        else:
+            db.flush()
         return obj
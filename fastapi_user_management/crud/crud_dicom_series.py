@@ -0,0 +1,160 @@
+"""CRUD module for DicomSeriesModel table."""
+
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import RowMapping, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from fastapi_user_management.crud.crud_base import CRUDBase
+from fastapi_user_management.models.dicom_series import DicomSeriesModel
+from fastapi_user_management.schemas.dicom import DicomSeriesCreate
+
+
+class CRUDDicomSeries(CRUDBase[DicomSeriesModel, DicomSeriesCreate, DicomSeriesCreate]):
+    """CRUD for DICOM series."""
+
+    def get_by_series_uid(
+        self, db: Session, *, series_instance_uid: str
+    ) -> DicomSeriesModel | None:
+        """Get series by its SeriesInstanceUID.
+
+        Args:
+            db (Session): database session
+            series_instance_uid (str): SeriesInstanceUID
+
+        Returns:
+            DicomSeriesModel | None: selected series
+        """
+        return db.execute(
+            select(self.model).where(
+                self.model.series_instance_uid == series_instance_uid
+            )
+        ).scalar_one_or_none()
+
+    def upsert(self, db: Session, *, obj_in: DicomSeriesCreate) -> DicomSeriesModel:
+        """Create series or update the existing one with the same SeriesInstanceUID.
+
+        Every instance of a series carries the same header, so uploading another
+        instance of a known series refreshes the stored row instead of failing.
+        The row is written by one ``INSERT ... ON CONFLICT DO UPDATE``, uploads
+        of the same series racing each other both succeed.
+
+        Args:
+            db (Session): database session
+            obj_in (DicomSeriesCreate): series data based on schema
+
+        Returns:
+            DicomSeriesModel: created or updated series
+        """
+        values = obj_in.model_dump()
+        statement = (
+            sqlite_insert(self.model)
+            .values(**values, created_at=datetime.utcnow())
+            .on_conflict_do_update(
+                index_elements=[self.model.series_instance_uid], set_=values
+            )
+            .returning(self.model)
+        )
+        db_obj = db.scalars(
+            statement, execution_options={"populate_existing": True}
+        ).one()
+        db.commit()
+        return db_obj
+
+    def upsert_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Iterable[DicomSeriesCreate],
+        chunk_size: int = 500,
+    ) -> int:
+        """Create or update many series, one transaction per chunk.
+
+        Every chunk is one executemany of ``INSERT ... ON CONFLICT DO UPDATE``,
+        series stored meanwhile by other requests are updated too.
+
+        Args:
+            db (Session): database session
+            objs_in (Iterable[DicomSeriesCreate]): series with unique
+                SeriesInstanceUIDs
+            chunk_size (int, optional): rows per transaction. Defaults to 500.
+
+        Returns:
+            int: number of upserted series
+        """
+        statement = sqlite_insert(self.model)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.model.series_instance_uid],
+            set_={
+                field: statement.excluded[field]
+                for field in DicomSeriesCreate.model_fields
+            },
+        )
+        upserted = 0
+        objs_iter = iter(objs_in)
+        while chunk := list(islice(objs_iter, chunk_size)):
+            created_at = datetime.utcnow()
+            db.execute(
+                statement,
+                [{**obj.model_dump(), "created_at": created_at} for obj in chunk],
+            )
+            db.commit()
+            upserted += len(chunk)
+        return upserted
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        patient_id: str | None = None,
+        study_instance_uid: str | None = None,
+        modality: str | None = None,
+        body_part_examined: str | None = None,
+        after: int | None = None,
+        limit: int = 50,
+    ) -> Sequence[RowMapping]:
+        """Get a page of series matching every given filter, ordered by id.
+
+        Only the needed columns are selected, rows aren't hydrated to ORM objects.
+
+        Args:
+            db (Session): database session
+            patient_id (str | None, optional): PatientID filter. Defaults to None.
+            study_instance_uid (str | None, optional): StudyInstanceUID filter.
+                Defaults to None.
+            modality (str | None, optional): Modality filter. Defaults to None.
+            body_part_examined (str | None, optional): BodyPartExamined filter.
+                Defaults to None.
+            after (int | None, optional): id of the last row of previous page.
+                Defaults to None.
+            limit (int, optional): loading limit. Defaults to 50.
+
+        Returns:
+            Sequence[RowMapping]: series columns with their id
+        """
+        query = select(
+            self.model.id,
+            self.model.patient_id,
+            self.model.study_instance_uid,
+            self.model.series_instance_uid,
+            self.model.modality,
+            self.model.body_part_examined,
+        )
+        filters = {
+            self.model.patient_id: patient_id,
+            self.model.study_instance_uid: study_instance_uid,
+            self.model.modality: modality,
+            self.model.body_part_examined: body_part_examined,
+        }
+        for column, value in filters.items():
+            if value is not None:
+                query = query.where(column == value)
+        if after is not None:
+            query = query.where(self.model.id > after)
+        return db.execute(query.order_by(self.model.id).limit(limit)).mappings().all()
+
+
+dicom_series = CRUDDicomSeries(DicomSeriesModel)
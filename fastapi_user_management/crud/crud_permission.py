@@ -0,0 +1,110 @@
+"""CRUD module for PermissionModel table."""
+
+from collections.abc import Iterable, Mapping
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from fastapi_user_management.crud.crud_base import CRUDBase
+from fastapi_user_management.models.permission import PermissionModel, PermissionNames
+from fastapi_user_management.models.role import RoleModel, RoleNames
+from fastapi_user_management.models.role_permission import RolePermissionModel
+from fastapi_user_management.schemas.permission import PermissionBase
+
+
+class CRUDPermission(CRUDBase[PermissionModel, PermissionBase, PermissionBase]):
+    """CRUD for permissions and their grants to roles."""
+
+    def sync(
+        self,
+        db: Session,
+        *,
+        grants: Mapping[RoleNames, Iterable[PermissionNames]],
+    ) -> None:
+        """Store every permission and the default grants of roles without grants.
+
+        Roles that already have grants are left alone, so grants changed in the
+        database survive restarts.
+
+        Args:
+            db (Session): database session
+            grants (Mapping[RoleNames, Iterable[PermissionNames]]): default
+                permissions of every role.
+        """
+        stored = set(db.execute(select(self.model.name)).scalars())
+        missing = [
+            {"name": permission, "bit": permission.bit}
+            for permission in PermissionNames
+            if permission not in stored
+        ]
+        if missing:
+            db.execute(insert(self.model), missing)
+        roles = dict(db.execute(select(RoleModel.name, RoleModel.id)).tuples().all())
+        for name in grants:
+            if name not in roles:
+                role = RoleModel(name=name)
+                db.add(role)
+                db.flush()
+                roles[name] = role.id
+        granted = set(db.execute(select(RolePermissionModel.role_id)).scalars())
+        permission_ids = dict(
+            db.execute(select(self.model.name, self.model.id)).tuples().all()
+        )
+        rows = [
+            {"role_id": roles[name], "permission_id": permission_ids[permission]}
+            for name, permissions in grants.items()
+            if roles[name] not in granted
+            for permission in permissions
+        ]
+        if rows:
+            db.execute(insert(RolePermissionModel), rows)
+        db.commit()
+
+    def get_role_masks(self, db: Session) -> dict[RoleNames, int]:
+        """Compile the permissions of every role into a bitmask.
+
+        Args:
+            db (Session): database session
+
+        Returns:
+            dict[RoleNames, int]: permission mask by role.
+        """
+        masks: dict[RoleNames, int] = {}
+        for role, bit in db.execute(
+            select(RoleModel.name, self.model.bit)
+            .select_from(RolePermissionModel)
+            .join(RoleModel, RoleModel.id == RolePermissionModel.role_id)
+            .join(self.model, self.model.id == RolePermissionModel.permission_id)
+        ):
+            masks[role] = masks.get(role, 0) | 1 << bit
+        return masks
+
+    def grant(
+        self, db: Session, *, role: RoleModel, permissions: Iterable[PermissionNames]
+    ) -> None:
+        """Grant permissions to a role.
+
+        Args:
+            db (Session): database session
+            role (RoleModel): role
+            permissions (Iterable[PermissionNames]): granted permissions
+        """
+        granted = set(
+            db.execute(
+                select(self.model.name)
+                .join(
+                    RolePermissionModel,
+                    self.model.id == RolePermissionModel.permission_id,
+                )
+                .where(RolePermissionModel.role_id == role.id)
+            ).scalars()
+        )
+        for permission in set(permissions) - granted:
+            permission_id = db.execute(
+                select(self.model.id).where(self.model.name == permission)
+            ).scalar_one()
+            db.add(RolePermissionModel(role_id=role.id, permission_id=permission_id))
+        db.commit()
+
+
+permission = CRUDPermission(PermissionModel)
@@ -0,0 +1,75 @@
+"""CRUD module for RevokedTokenModel table."""
+from datetime import datetime
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from fastapi_user_management.crud.crud_base import CRUDBase
+from fastapi_user_management.models.revoked_token import RevokedTokenModel
+from fastapi_user_management.schemas.auth import RevokedTokenCreate
+
+
+class CRUDRevokedToken(
+    CRUDBase[RevokedTokenModel, RevokedTokenCreate, RevokedTokenCreate]
+):
+    """CRUD for revoked access tokens."""
+
+    def revoke(self, db: Session, *, obj_in: RevokedTokenCreate) -> None:
+        """Record a revoked token, revoking it again does nothing.
+
+        Args:
+            db (Session): database session
+            obj_in (RevokedTokenCreate): token to revoke
+        """
+        db.merge(self.model(jti=obj_in.jti, expires_at=obj_in.expires_at))
+        db.commit()
+
+    def is_revoked(self, db: Session, *, jti: str) -> bool:
+        """Check whether a token was revoked.
+
+        Args:
+            db (Session): database session
+            jti (str): ``jti`` claim of the token
+
+        Returns:
+            bool: True if the token is revoked.
+        """
+        return (
+            db.execute(
+                select(self.model.jti).where(self.model.jti == jti)
+            ).scalar_one_or_none()
+            is not None
+        )
+
+    def get_active_jtis(self, db: Session) -> list[str]:
+        """Get ``jti`` of every revoked token that didn't expire yet.
+
+        Args:
+            db (Session): database session
+
+        Returns:
+            list[str]: token ids.
+        """
+        return list(
+            db.execute(
+                select(self.model.jti).where(self.model.expires_at >= datetime.utcnow())
+            ).scalars()
+        )
+
+    def prune(self, db: Session) -> int:
+        """Delete revoked tokens that expired, they are rejected anyway.
+
+        Args:
+            db (Session): database session
+
+        Returns:
+            int: number of deleted rows.
+        """
+        result = db.execute(
+            delete(self.model).where(self.model.expires_at < datetime.utcnow())
+        )
+        db.commit()
+        return result.rowcount
+
+
+revoked_token = CRUDRevokedToken(RevokedTokenModel)
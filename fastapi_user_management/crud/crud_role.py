@@ -26,12 +26,16 @@ class CRUDRole(CRUDBase[RoleModel, RoleBase, RoleCreate]):
             select(self.model).where(self.model.name == role_obj.name)
         ).scalar_one_or_none()
 
-    def create(self, db: Session, *, obj_in: RoleBase) -> RoleModel:
+    def create(
+        self, db: Session, *, obj_in: RoleBase, commit: bool = True
+    ) -> RoleModel:
         """Creat new role in database.
 
         Args:
             db (Session): database session
             obj_in (RoleBase): role object from schema
+            commit (bool, optional): commit the session, when False changes are
+                only flushed, e.g. inside a savepoint. Defaults to True.
 
         Returns:
             RoleModel: created role
@@ -39,7 +43,10 @@ class CRUDRole(CRUDBase[RoleModel, RoleBase, RoleCreate]):
         db_obj: RoleModel = self.model(name=obj_in.name)
 
         db.add(db_obj)
-        db.commit()
+        if commit:
+            db.commit()
+        else:
+            db.flush()
         db.refresh(db_obj)
         return db_obj
 
@@ -0,0 +1,202 @@
+"""CRUD module for ArchivedUserModel table."""
+from datetime import datetime
+from operator import attrgetter
+from typing import Any
+
+from pydantic import BaseModel, EmailStr
+from sqlalchemy import DateTime, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from fastapi_user_management.core.database import use_writer
+from fastapi_user_management.core.response_cache import (
+    USERS_TAG,
+    invalidate_on_commit,
+    user_tag,
+)
+from fastapi_user_management.core.sharding import pin_shard, user_bind_arguments
+from fastapi_user_management.crud.crud_base import CRUDBase
+from fastapi_user_management.models.table_version import bump_table_version
+from fastapi_user_management.models.user import UserModel, UserStatusValues
+from fastapi_user_management.models.user_archive import (
+    ArchivedUserModel,
+    ArchivedUserRoleModel,
+)
+from fastapi_user_management.models.user_role import UserRoleModel
+
+
+class CRUDUserArchive(CRUDBase[ArchivedUserModel, BaseModel, BaseModel]):
+    """CRUD moving users between ``user_account`` and the archive tables."""
+
+    def exists(self, db: Session, *, username: EmailStr) -> bool:
+        """Check whether an archived user has a username.
+
+        Args:
+            db (Session): database session
+            username (EmailStr): username
+
+        Returns:
+            bool: True if the username belongs to an archived user.
+        """
+        return (
+            db.execute(
+                select(self.model.id).where(self.model.username == username)
+            ).first()
+            is not None
+        )
+
+    def get_page(
+        self, db: Session, *, after: str | None = None, limit: int = 50
+    ) -> list[ArchivedUserModel]:
+        """Get a page of archived users ordered by username (keyset pagination).
+
+        Args:
+            db (Session): database session
+            after (str | None, optional): last username of the previous page.
+                Defaults to None.
+            limit (int, optional): page size. Defaults to 50.
+
+        Returns:
+            list[ArchivedUserModel]: archived users ordered by username.
+        """
+        query = select(self.model).order_by(self.model.username).limit(limit)
+        if after is not None:
+            query = query.where(self.model.username > after)
+        users = db.execute(query).scalars()
+        return sorted(users, key=attrgetter("username"))[:limit]
+
+    def archive(
+        self,
+        db: Session,
+        *,
+        deactivated_before: datetime,
+        limit: int,
+        bind_arguments: dict[str, Any] | None = None,
+    ) -> int:
+        """Move a batch of long-deactivated users to the archive, in one commit.
+
+        Users are moved with their ``user_role`` rows by ``INSERT ... SELECT``
+        and ``DELETE``, without loading them.
+
+        Args:
+            db (Session): database session
+            deactivated_before (datetime): users deactivated, and unchanged
+                since, before this time are archived.
+            limit (int): most users moved.
+            bind_arguments (dict[str, Any] | None, optional): shard to archive
+                on, see ``shard_bind_arguments``. Defaults to None.
+
+        Returns:
+            int: number of archived users.
+        """
+        bind = bind_arguments or {}
+        users = UserModel.__table__
+        user_roles = UserRoleModel.__table__
+        use_writer(db)
+        selected = db.execute(
+            select(users.c.id, users.c.username)
+            .where(
+                users.c.status == UserStatusValues.DEACTIVATE,
+                func.coalesce(users.c.updated_at, users.c.created_at)
+                < deactivated_before,
+            )
+            .order_by(users.c.id)
+            .limit(limit),
+            bind_arguments=bind,
+        ).all()
+        if not selected:
+            db.commit()
+            return 0
+        ids = [id_ for id_, _ in selected]
+        db.execute(
+            insert(self.model.__table__).from_select(
+                [*users.c.keys(), "archived_at"],
+                select(
+                    *users.c, literal(datetime.utcnow(), DateTime(timezone=True))
+                ).where(users.c.id.in_(ids)),
+            ),
+            bind_arguments=bind,
+        )
+        db.execute(
+            insert(ArchivedUserRoleModel.__table__).from_select(
+                ["user_id", "role_id"],
+                select(user_roles.c.user_id, user_roles.c.role_id).where(
+                    user_roles.c.user_id.in_(ids)
+                ),
+            ),
+            bind_arguments=bind,
+        )
+        db.execute(
+            delete(user_roles).where(user_roles.c.user_id.in_(ids)),
+            bind_arguments=bind,
+        )
+        db.execute(delete(users).where(users.c.id.in_(ids)), bind_arguments=bind)
+        bump_table_version(db.connection(bind_arguments=bind), UserModel.__tablename__)
+        invalidate_on_commit(
+            db, USERS_TAG, *(user_tag(username) for _, username in selected)
+        )
+        db.commit()
+        return len(selected)
+
+    def restore(
+        self, db: Session, *, username: EmailStr, commit: bool = True
+    ) -> UserModel | None:
+        """Move an archived user back to ``user_account``.
+
+        The user keeps its id unless another user took it meanwhile. Access
+        tokens issued before the user was archived stay revoked.
+
+        Args:
+            db (Session): database session
+            username (EmailStr): username
+            commit (bool, optional): commit the session, when False changes are
+                only flushed, e.g. inside a savepoint. Defaults to True.
+
+        Returns:
+            UserModel | None: restored user, None if no user was archived with
+                this username.
+        """
+        use_writer(db)
+        pin_shard(db, username)
+        bind = user_bind_arguments(db, username)
+        archived = db.execute(
+            select(self.model).where(self.model.username == username)
+        ).scalar_one_or_none()
+        if archived is None:
+            return None
+        values = {
+            column: getattr(archived, column) for column in UserModel.__table__.c.keys()
+        }
+        values["token_version"] += 1
+        id_taken = db.execute(
+            select(UserModel.id).where(UserModel.id == archived.id),
+            bind_arguments=bind,
+        ).first()
+        if id_taken is not None:
+            del values["id"]
+        role_ids = db.scalars(
+            select(ArchivedUserRoleModel.role_id).where(
+                ArchivedUserRoleModel.user_id == archived.id
+            ),
+            bind_arguments=bind,
+        ).all()
+        db.execute(
+            delete(ArchivedUserRoleModel).where(
+                ArchivedUserRoleModel.user_id == archived.id
+            ),
+            bind_arguments=bind,
+        )
+        db.delete(archived)
+        user = UserModel(**values)
+        db.add(user)
+        db.flush()
+        db.add_all(
+            UserRoleModel(user_id=user.id, role_id=role_id) for role_id in role_ids
+        )
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return user
+
+
+user_archive = CRUDUserArchive(ArchivedUserModel)
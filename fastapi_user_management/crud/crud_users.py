@@ -1,17 +1,36 @@
 """CRUD module for UserModel table."""
 import secrets
 from datetime import datetime
+from operator import attrgetter
 from typing import Any
 
 from pydantic import EmailStr
-from sqlalchemy import select
+from sqlalchemy import case, distinct, func, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from fastapi_user_management import crud
+from fastapi_user_management.core.database import release, use_writer
+from fastapi_user_management.core.response_cache import USERS_TAG, invalidate_on_commit
+from fastapi_user_management.core.sharding import (
+    UserShardedSession,
+    pin_shard,
+    user_bind_arguments,
+)
+from fastapi_user_management.core.username_filter import username_filter
 from fastapi_user_management.crud.crud_base import CRUDBase
-from fastapi_user_management.errors.exceptions import PasswordMatchError, UserExistError
+from fastapi_user_management.errors.exceptions import (
+    PasswordMatchError,
+    UserExistError,
+    UsernameShardError,
+)
 from fastapi_user_management.models.role import RoleModel, RoleNames
+from fastapi_user_management.models.table_version import (
+    TableVersionModel,
+    bump_table_version,
+)
 from fastapi_user_management.models.user import UserModel, UserStatusValues
+from fastapi_user_management.models.user_role import UserRoleModel
 from fastapi_user_management.schemas.user import BaseUserCreate, UserCreate, UserUpdate
 from fastapi_user_management.tools.encryption import get_password_hash, verify_password
 
@@ -35,35 +54,235 @@ class CRUDUser(CRUDBase[UserModel, BaseUserCreate | UserCreate, UserUpdate]):
             select(self.model).where(self.model.username == username)
         ).scalar_one_or_none()
 
-    def create(self, db: Session, *, obj_in: BaseUserCreate) -> UserModel:
+    def get_or_restore(
+        self, db: Session, *, username: EmailStr, commit: bool = True
+    ) -> UserModel | None:
+        """Get user by username, restoring it first if it was archived.
+
+        Args:
+            db (Session): database session
+            username (EmailStr): username
+            commit (bool, optional): commit the restore, when False it's only
+                flushed, e.g. inside a savepoint. Defaults to True.
+
+        Returns:
+            UserModel | None: selected user
+        """
+        user = self.get_by_username(db, username=username)
+        if user is None:
+            user = crud.user_archive.restore(db, username=username, commit=commit)
+        return user
+
+    def _might_exist(self, db: Session, username: str) -> bool:
+        """Check the username filter, True when it's disabled."""
+        return username_filter is None or username_filter.might_exist(
+            db, username=username
+        )
+
+    def get_version(
+        self, db: Session, *, username: EmailStr
+    ) -> tuple[int, int, datetime | None] | None:
+        """Get version columns of a user without loading the user.
+
+        Args:
+            db (Session): database session
+            username (EmailStr): username
+
+        Returns:
+            tuple[int, int, datetime | None] | None: id, row version and last
+                update of the user, None if there is no such user.
+        """
+        row = db.execute(
+            select(
+                self.model.id, self.model.row_version, self.model.updated_at
+            ).where(self.model.username == username)
+        ).first()
+        return None if row is None else tuple(row)
+
+    def get_table_version(self, db: Session) -> int:
+        """Get the change counter of ``user_account``, bumped by every write.
+
+        Args:
+            db (Session): database session
+
+        Returns:
+            int: counter, summed over shards when users are sharded.
+        """
+        return sum(
+            db.execute(
+                select(TableVersionModel.version).where(
+                    TableVersionModel.name == self.model.__tablename__
+                )
+            ).scalars()
+        )
+
+    def get_multi(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 50,
+        role: RoleNames | None = None,
+    ) -> list[UserModel] | Any:
+        """Get list of users, read from ``user_account`` only.
+
+        Args:
+            db (Session): database session
+            skip (int, optional): skip an id. Defaults to 0.
+            limit (int, optional): loading limit. Defaults to 50.
+            role (RoleNames | None, optional): only users with this role.
+                Defaults to None.
+
+        Returns:
+            list[UserModel] | Any: list of users
+        """
+        query = select(self.model)
+        if role is not None:
+            query = query.where(self.model.role_mask.op("&")(1 << role.bit) != 0)
+        if isinstance(db, UserShardedSession):
+            # every shard returns its first skip + limit users, merged by username
+            users = db.execute(
+                query.order_by(self.model.username).limit(skip + limit)
+            ).scalars()
+            return sorted(users, key=attrgetter("username"))[skip : skip + limit]
+        return db.execute(query.offset(skip).limit(limit)).scalars().all()
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        after: str | None = None,
+        limit: int = 50,
+        role: RoleNames | None = None,
+    ) -> list[UserModel]:
+        """Get a page of users ordered by username (keyset pagination).
+
+        On sharded storage every shard returns its own page and the pages are
+        merged, the cost of a page depends on neither its depth nor table size.
+
+        Args:
+            db (Session): database session
+            after (str | None, optional): last username of the previous page.
+                Defaults to None.
+            limit (int, optional): page size. Defaults to 50.
+            role (RoleNames | None, optional): only users with this role.
+                Defaults to None.
+
+        Returns:
+            list[UserModel]: users ordered by username.
+        """
+        query = select(self.model).order_by(self.model.username).limit(limit)
+        if after is not None:
+            query = query.where(self.model.username > after)
+        if role is not None:
+            query = query.where(self.model.role_mask.op("&")(1 << role.bit) != 0)
+        users = db.execute(query).scalars()
+        return sorted(users, key=attrgetter("username"))[:limit]
+
+    def reconcile_role_masks(self, db: Session) -> int:
+        """Recompute ``role_mask`` of every user from ``user_role``.
+
+        Masks are maintained when ``roles`` change through the ORM, this repairs
+        rows written around it (raw SQL, imports, crashes mid-way).
+
+        Args:
+            db (Session): database session
+
+        Returns:
+            int: number of users whose mask was wrong.
+        """
+        role_bit = case(
+            *((RoleModel.name == role, 1 << role.bit) for role in RoleNames), else_=0
+        )
+        mask = (
+            select(func.coalesce(func.sum(distinct(role_bit)), 0))
+            .select_from(UserRoleModel)
+            .join(RoleModel, RoleModel.id == UserRoleModel.role_id)
+            .where(UserRoleModel.user_id == self.model.id)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            update(self.model)
+            .where(self.model.role_mask != mask)
+            .values(
+                role_mask=mask,
+                row_version=self.model.row_version + 1,
+                updated_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            bump_table_version(db.connection(), self.model.__tablename__)
+            invalidate_on_commit(db, USERS_TAG)
+        db.commit()
+        return result.rowcount
+
+    def hash_new_password(self, obj_in: BaseUserCreate) -> str:
+        """Hash the password of a user to create, a random one if it has none.
+
+        Args:
+            obj_in (BaseUserCreate): user data based on schema
+
+        Returns:
+            str: password hash
+        """
+        return get_password_hash(
+            obj_in.password
+            if obj_in.password is not None
+            else secrets.token_urlsafe(PASSWORD_LENGTH)
+        )
+
+    def create(
+        self,
+        db: Session,
+        *,
+        obj_in: BaseUserCreate,
+        commit: bool = True,
+        password_hash: str | None = None,
+    ) -> UserModel:
         """Create new user.
 
         Args:
             db (Session): database session
             obj_in (BaseUserCreate): user data based on schema
+            commit (bool, optional): commit the session, when False changes are
+                only flushed, e.g. inside a savepoint. Defaults to True.
+            password_hash (str | None, optional): hash of ``obj_in`` from
+                ``hash_new_password``, made before a transaction was opened.
+                Defaults to None, the password is hashed here.
 
         Returns:
             UserModel: created user
         """
-        if self.get_by_username(db=db, username=obj_in.username):
+        # Hash first: the connection checked out below isn't held during bcrypt.
+        password = (
+            password_hash
+            if password_hash is not None
+            else self.hash_new_password(obj_in)
+        )
+        # A replica may not have the user yet, ask the database the insert goes to.
+        use_writer(db)
+        pin_shard(db, obj_in.username)
+        # definite filter misses skip the lookup, the unique constraint still
+        # rejects a duplicate the filter hasn't seen yet
+        if self._might_exist(db, obj_in.username) and (
+            self.get_by_username(db=db, username=obj_in.username)
+            or crud.user_archive.exists(db=db, username=obj_in.username)
+        ):
             raise UserExistError
         roles: list[RoleModel] = []
         for role_obj in obj_in.roles:
             role = (
                 crud.role.get_by_name(db=db, role_obj=role_obj)
                 if crud.role.get_by_name(db=db, role_obj=role_obj) is not None
-                else crud.role.create(db=db, obj_in=role_obj)
+                else crud.role.create(db=db, obj_in=role_obj, commit=commit)
             )
             roles.append(role)
 
         db_obj: UserModel = self.model(
             username=obj_in.username,
             fullname=obj_in.fullname,
-            password=get_password_hash(
-                obj_in.password
-                if obj_in.password is not None
-                else secrets.token_urlsafe(PASSWORD_LENGTH)
-            ),
+            password=password,
             created_at=datetime.utcnow(),
             status=(
                 obj_in.status if obj_in.status is not None else UserStatusValues.PENDING
@@ -71,7 +290,18 @@ class CRUDUser(CRUDBase[UserModel, BaseUserCreate | UserCreate, UserUpdate]):
             roles=roles,
         )
         db.add(db_obj)
-        db.commit()
+        try:
+            if commit:
+                db.commit()
+            else:
+                db.flush()
+        except IntegrityError as e:
+            # a savepoint of the caller is rolled back by the caller
+            if commit:
+                db.rollback()
+            raise UserExistError from e
+        if username_filter is not None:
+            username_filter.add(db_obj.username)
         db.refresh(db_obj)
         return db_obj
 
@@ -81,6 +311,8 @@ class CRUDUser(CRUDBase[UserModel, BaseUserCreate | UserCreate, UserUpdate]):
         *,
         db_obj: UserModel,
         obj_in: UserUpdate | dict[str, Any],
+        commit: bool = True,
+        password_hash: str | None = None,
     ) -> UserModel:
         """Update user info.
 
@@ -88,9 +320,16 @@ class CRUDUser(CRUDBase[UserModel, BaseUserCreate | UserCreate, UserUpdate]):
             db (Session): database session
             db_obj (UserModel): selected user
             obj_in (UserUpdate | dict[str, Any]): updating data
+            commit (bool, optional): commit the session, when False changes are
+                only flushed, e.g. inside a savepoint. Defaults to True.
+            password_hash (str | None, optional): hash of the new password,
+                made before a transaction was opened. Defaults to None, the
+                password is hashed here.
 
         Raises:
             PasswordMatchError: raise if password and its confirmation doesn't match
+            UsernameShardError: raise if the new username belongs to another
+                shard, the user's rows would stay on the old one.
 
         Returns:
             UserModel: selected user
@@ -98,14 +337,30 @@ class CRUDUser(CRUDBase[UserModel, BaseUserCreate | UserCreate, UserUpdate]):
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)
+            update_data = obj_in.model_dump(exclude_unset=True)
+        username = update_data.get("username", db_obj.username)
+        if user_bind_arguments(db, username) != user_bind_arguments(
+            db, db_obj.username
+        ):
+            raise UsernameShardError
+        pin_shard(db, db_obj.username)
         if update_data["new_password"] == update_data["new_password_confirm"]:
-            hashed_password = get_password_hash(update_data["new_password"])
+            if password_hash is None:
+                # flushed changes of an uncommitted caller must not be committed
+                if commit:
+                    release(db)
+                password_hash = get_password_hash(update_data["new_password"])
             del update_data["new_password"]
-            update_data["password"] = hashed_password
+            update_data["password"] = password_hash
         else:
             raise PasswordMatchError
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        previous = db_obj.username
+        db_obj = super().update(db, db_obj=db_obj, obj_in=update_data, commit=commit)
+        if username != previous and username_filter is not None:
+            # older ids are past the sync window, the new name is only added here
+            username_filter.add(username)
+            username_filter.remove(previous)
+        return db_obj
 
     def authenticate(
         self, db: Session, *, username: EmailStr, password: str
@@ -120,25 +375,94 @@ class CRUDUser(CRUDBase[UserModel, BaseUserCreate | UserCreate, UserUpdate]):
         Returns:
             UserModel | None: logged in user or None
         """
+        if not self._might_exist(db, username):
+            release(db)
+            return None
         user = self.get_by_username(db, username=username)
+        release(db)
         if not user:
+            if username_filter is not None:
+                username_filter.record_false_positive()
             return None
         if not verify_password(password, user.password):
             return None
         return user
 
-    def remove_by_username(self, db: Session, *, username: EmailStr) -> UserModel:
+    def replace_password_hash(
+        self, db: Session, *, username: EmailStr, old_hash: str, new_hash: str
+    ) -> bool:
+        """Replace the hash of a password by a hash of the same password.
+
+        The hash is only replaced if it's still ``old_hash``, a password changed
+        meanwhile is kept. It isn't a change of the user: ``row_version`` and
+        ``updated_at`` are kept.
+
+        Args:
+            db (Session): database session
+            username (EmailStr): username
+            old_hash (str): hash read when the password was verified.
+            new_hash (str): new hash of the same password.
+
+        Returns:
+            bool: whether the hash was replaced.
+        """
+        use_writer(db)
+        result = db.execute(
+            update(self.model)
+            .where(self.model.username == username, self.model.password == old_hash)
+            .values(password=new_hash)
+            .execution_options(synchronize_session=False),
+            bind_arguments=user_bind_arguments(db, username),
+        )
+        db.commit()
+        return bool(result.rowcount)
+
+    def remove_by_username(
+        self, db: Session, *, username: EmailStr, commit: bool = True
+    ) -> UserModel:
         """Delete user by username.
 
         Args:
             db (Session): database session
             username (EmailStr): username
+            commit (bool, optional): commit the session, when False changes are
+                only flushed, e.g. inside a savepoint. Defaults to True.
 
         Returns:
             UserModel: deleted user
         """
         selected_user = self.get_by_username(db=db, username=username)
-        return super().remove(db, id=selected_user.id)
+        pin_shard(db, username)
+        db.delete(selected_user)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        if username_filter is not None:
+            username_filter.remove(username)
+        return selected_user
+
+    def revoke_sessions(
+        self, db: Session, *, db_obj: UserModel, commit: bool = True
+    ) -> UserModel:
+        """Revoke every access token issued to a user so far.
+
+        Args:
+            db (Session): database session
+            db_obj (UserModel): selected user
+            commit (bool, optional): commit the session, when False changes are
+                only flushed, e.g. inside a savepoint. Defaults to True.
+
+        Returns:
+            UserModel: selected user
+        """
+        pin_shard(db, db_obj.username)
+        db_obj.token_version += 1
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return db_obj
 
     def is_active(self, user: UserModel) -> bool:
         """Check user status.
@@ -161,10 +485,7 @@ class CRUDUser(CRUDBase[UserModel, BaseUserCreate | UserCreate, UserUpdate]):
         Returns:
             bool: True if user is admin.
         """
-        admin_role = db.execute(
-            select(RoleModel).where(RoleModel.name == RoleNames.ADMIN)
-        ).scalar_one_or_none()
-        return admin_role in db_obj.roles
+        return RoleNames.ADMIN in db_obj.role_names
 
 
 user = CRUDUser(UserModel)
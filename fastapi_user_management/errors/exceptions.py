@@ -33,3 +33,90 @@ class UserExistError(Exception):
         """
         self.message = message
         super().__init__(message)
+
+
+class DicomParseError(Exception):
+    """DicomParseError Custom error.
+
+    Custom error that occur when uploaded file is not a supported DICOM file.
+    """
+
+    def __init__(self, message: str = "Invalid DICOM file!") -> None:
+        """Initiate custom error.
+
+        Args:
+            message (str): error message to display, \
+                default is set to 'Invalid DICOM file!'.
+        """
+        self.message = message
+        super().__init__(message)
+
+
+class InvalidCursorError(Exception):
+    """InvalidCursorError Custom error.
+
+    Custom error that occur when a pagination cursor can't be decoded.
+    """
+
+    def __init__(self, message: str = "Invalid cursor!") -> None:
+        """Initiate custom error.
+
+        Args:
+            message (str): error message to display, \
+                default is set to 'Invalid cursor!'.
+        """
+        self.message = message
+        super().__init__(message)
+
+
+class JobCancelledError(Exception):
+    """JobCancelledError Custom error.
+
+    Custom error raised in a background job when its cancellation was requested.
+    """
+
+    def __init__(self, message: str = "Job cancelled!") -> None:
+        """Initiate custom error.
+
+        Args:
+            message (str): error message to display, \
+                default is set to 'Job cancelled!'.
+        """
+        self.message = message
+        super().__init__(message)
+
+
+class JobInterruptedError(Exception):
+    """JobInterruptedError Custom error.
+
+    Custom error raised in a background job when its worker shuts down, the job
+    is queued again.
+    """
+
+    def __init__(self, message: str = "Job interrupted!") -> None:
+        """Initiate custom error.
+
+        Args:
+            message (str): error message to display, \
+                default is set to 'Job interrupted!'.
+        """
+        self.message = message
+        super().__init__(message)
+
+
+class UsernameShardError(Exception):
+    """UsernameShardError Custom error.
+
+    Custom error that occur when a user is renamed to a username of another
+    shard, users can't move between shards.
+    """
+
+    def __init__(self, message: str = "Username belongs to another shard!") -> None:
+        """Initiate custom error.
+
+        Args:
+            message (str): error message to display, \
+                default is set to 'Username belongs to another shard!'.
+        """
+        self.message = message
+        super().__init__(message)
@@ -0,0 +1,51 @@
+"""Define DICOM Series Model Table."""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from fastapi_user_management.models.base import Base
+
+
+class DicomSeriesModel(Base):
+    """DICOM Series Database Model known as dicom_series."""
+
+    __tablename__ = "dicom_series"
+    # Pages are ordered by ``id``, which every index implicitly ends with. Low
+    # cardinality filters (modality, body part) get an index per combination, so
+    # a page is read straight from the index in ``id`` order whatever the table
+    # size; patient and study filters select few rows and only need a prefix.
+    __table_args__ = (
+        Index("ix_dicom_series_patient_id_study", "patient_id", "study_instance_uid"),
+        Index("ix_dicom_series_study_instance_uid", "study_instance_uid"),
+        Index("ix_dicom_series_modality_body_part", "modality", "body_part_examined"),
+        Index("ix_dicom_series_modality", "modality"),
+        Index("ix_dicom_series_body_part_examined", "body_part_examined"),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    patient_id: Mapped[str | None] = mapped_column(String, nullable=True, unique=False)
+    study_instance_uid: Mapped[str | None] = mapped_column(
+        String, nullable=True, unique=False
+    )
+    series_instance_uid: Mapped[str] = mapped_column(
+        String, nullable=False, unique=True
+    )
+    modality: Mapped[str | None] = mapped_column(String, nullable=True, unique=False)
+    body_part_examined: Mapped[str | None] = mapped_column(
+        String, nullable=True, unique=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, unique=False
+    )
+
+    def __repr__(self) -> str:
+        """Database object representation.
+
+        Returns:
+            str: object
+        """
+        return (
+            f"<DicomSeries(series_instance_uid={self.series_instance_uid},"
+            f" modality={self.modality})>"
+        )
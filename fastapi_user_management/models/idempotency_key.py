@@ -0,0 +1,36 @@
+"""Define Idempotency Key Model Table."""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from fastapi_user_management.models.base import Base
+
+
+class IdempotencyKeyModel(Base):
+    """Final response of a request sent with an ``Idempotency-Key`` header.
+
+    ``scope`` identifies the caller and the endpoint, so equal keys of different
+    clients never collide. Rows without ``status_code`` belong to requests still
+    running.
+    """
+
+    __tablename__ = "idempotency_key"
+    scope: Mapped[str] = mapped_column(String, primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    content_type: Mapped[str | None] = mapped_column(String, nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+    def __repr__(self) -> str:
+        """Database object representation.
+
+        Returns:
+            str: object
+        """
+        return f"<IdempotencyKey(key={self.key}, status_code={self.status_code})>"
@@ -0,0 +1,80 @@
+"""Define Job Model Table."""
+
+from datetime import datetime
+from enum import StrEnum, auto
+from typing import Any
+
+from sqlalchemy import JSON, Boolean, DateTime, Enum, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from fastapi_user_management.models.base import Base
+
+
+class JobStatusValues(StrEnum):
+    """Job Status Enum.
+
+    Values:
+        QUEUED: queued
+        RUNNING: running
+        SUCCEEDED: succeeded
+        FAILED: failed
+        CANCELLED: cancelled
+    """
+
+    QUEUED = auto()
+    RUNNING = auto()
+    SUCCEEDED = auto()
+    FAILED = auto()
+    CANCELLED = auto()
+
+
+class JobModel(Base):
+    """Background job, run by the worker threads of any process.
+
+    ``done``, ``total`` and ``result`` are the last progress reported by the
+    handler, a resumed job restarts from them. ``heartbeat_at`` is refreshed
+    while a process runs the job, running jobs whose heartbeat stopped are queued
+    again. ``params`` is cleared once the job ends.
+    """
+
+    __tablename__ = "job"
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+    params: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    status: Mapped[JobStatusValues] = mapped_column(
+        Enum(JobStatusValues),
+        nullable=False,
+        default=JobStatusValues.QUEUED,
+        index=True,
+    )
+    # permissions needed to submit the job, and to read or cancel it
+    permission_mask: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_by: Mapped[str] = mapped_column(String, nullable=False)
+    done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    result: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+    started_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    heartbeat_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    def __repr__(self) -> str:
+        """Database object representation.
+
+        Returns:
+            str: object
+        """
+        return f"<Job(id={self.id}, kind={self.kind}, status={self.status})>"
@@ -0,0 +1,52 @@
+"""Define Permission Model Table."""
+
+from enum import StrEnum, auto
+
+from sqlalchemy import Enum, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from fastapi_user_management.models.base import Base
+
+
+class PermissionNames(StrEnum):
+    """Enum Values for Permissions.
+
+    The position of a value is its bit in permission masks, append new values.
+
+    Values:
+        USER_READ: user_read
+        USER_CREATE: user_create
+        USER_UPDATE: user_update
+        USER_DELETE: user_delete
+        DIAGNOSTICS_READ: diagnostics_read
+    """
+
+    USER_READ = auto()
+    USER_CREATE = auto()
+    USER_UPDATE = auto()
+    USER_DELETE = auto()
+    DIAGNOSTICS_READ = auto()
+
+    @property
+    def bit(self) -> int:
+        """Bit of the permission in permission masks."""
+        return list(PermissionNames).index(self)
+
+
+class PermissionModel(Base):
+    """Permission Database Table."""
+
+    __tablename__ = "permission"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[PermissionNames] = mapped_column(
+        Enum(PermissionNames), nullable=False, unique=True
+    )
+    bit: Mapped[int] = mapped_column(Integer, nullable=False, unique=True)
+
+    def __repr__(self) -> str:
+        """Database object representation.
+
+        Returns:
+            str: object
+        """
+        return f"<Permission(name={self.name}, bit={self.bit})>"
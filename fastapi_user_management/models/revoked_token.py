@@ -0,0 +1,29 @@
+"""Define Revoked Token Model Table."""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from fastapi_user_management.models.base import Base
+
+
+class RevokedTokenModel(Base):
+    """Access token revoked before it expires, known by its ``jti`` claim.
+
+    Rows are useless once the token expires and are pruned then.
+    """
+
+    __tablename__ = "revoked_token"
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+    def __repr__(self) -> str:
+        """Database object representation.
+
+        Returns:
+            str: object
+        """
+        return f"<RevokedToken(jti={self.jti}, expires_at={self.expires_at})>"
@@ -1,4 +1,5 @@
 """Define Role Model Table."""
+
 from enum import StrEnum, auto
 
 from sqlalchemy import Enum, Integer
@@ -18,6 +19,23 @@ class RoleNames(StrEnum):
     ADMIN = auto()
     USER = auto()
 
+    @property
+    def bit(self) -> int:
+        """Bit of the role in ``user_account.role_mask``, append new values."""
+        return list(RoleNames).index(self)
+
+    @classmethod
+    def from_mask(cls, mask: int) -> list["RoleNames"]:
+        """Roles of a role mask.
+
+        Args:
+            mask (int): ``user_account.role_mask`` value.
+
+        Returns:
+            list[RoleNames]: roles whose bit is set, in declaration order.
+        """
+        return [role for role in cls if mask >> role.bit & 1]
+
 
 class RoleModel(Base):
     """Role Database Table."""
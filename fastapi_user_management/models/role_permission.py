@@ -0,0 +1,16 @@
+"""Relationship Table for Role and Permission Tables."""
+
+from sqlalchemy import ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from fastapi_user_management.models.base import Base
+
+
+class RolePermissionModel(Base):
+    """RolePermission Table mapping role_id to permission_id."""
+
+    __tablename__ = "role_permission"
+    __table_args__ = (UniqueConstraint("role_id", "permission_id"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    role_id: Mapped[int] = mapped_column(Integer, ForeignKey("role.id"))
+    permission_id: Mapped[int] = mapped_column(Integer, ForeignKey("permission.id"))
@@ -0,0 +1,41 @@
+"""Define Table Version Model Table."""
+
+from sqlalchemy import Connection, Integer, String, insert, update
+from sqlalchemy.orm import Mapped, mapped_column
+
+from fastapi_user_management.models.base import Base
+
+
+class TableVersionModel(Base):
+    """Change counter of a table, bumped in the transaction of every write to it.
+
+    Listings derive their ETags from it, a list is unchanged while the counter
+    is. On sharded storage every shard counts its own writes.
+    """
+
+    __tablename__ = "table_version"
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        """Database object representation.
+
+        Returns:
+            str: object
+        """
+        return f"<TableVersion(name={self.name}, version={self.version})>"
+
+
+def bump_table_version(connection: Connection, name: str) -> None:
+    """Increment the change counter of a table.
+
+    Args:
+        connection (Connection): connection of the transaction writing the table.
+        name (str): table name.
+    """
+    table = TableVersionModel.__table__
+    result = connection.execute(
+        update(table).where(table.c.name == name).values(version=table.c.version + 1)
+    )
+    if not result.rowcount:
+        connection.execute(insert(table).values(name=name, version=1))
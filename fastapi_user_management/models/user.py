@@ -3,9 +3,10 @@
 from datetime import datetime
 from enum import StrEnum, auto
 
-from sqlalchemy import DateTime, Enum, Integer, String
+from sqlalchemy import Connection, DateTime, Enum, Integer, String, event
 from sqlalchemy.orm import (
     Mapped,
+    Mapper,
     backref,
     mapped_column,
     relationship,
@@ -13,7 +14,8 @@ from sqlalchemy.orm import (
 )
 
 from fastapi_user_management.models.base import Base
-from fastapi_user_management.models.role import RoleModel
+from fastapi_user_management.models.role import RoleModel, RoleNames
+from fastapi_user_management.models.table_version import bump_table_version
 from fastapi_user_management.models.user_role import UserRoleModel  # noqa: F401
 
 
@@ -39,11 +41,13 @@ class UserModel(Base):
     """
 
     __tablename__ = "user_account"
+    # ids are never reused, the username filter syncs new users by id
+    __table_args__ = {"sqlite_autoincrement": True}
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     fullname: Mapped[str] = mapped_column(String, nullable=False, unique=False)
     username: Mapped[str] = mapped_column(String, nullable=False, unique=True)
     password: Mapped[str] = mapped_column(String, nullable=False, unique=False)
-    phone_number: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    phone_number: Mapped[str] = mapped_column(String, nullable=True, unique=True)
     last_login: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True, default=None)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, unique=False
@@ -51,10 +55,38 @@ class UserModel(Base):
     status: Mapped[UserStatusValues] = mapped_column(
         Enum(UserStatusValues), nullable=False, default=UserStatusValues.PENDING
     )
+    # Denormalized ``roles``: bit ``RoleNames.bit`` is set for every role, kept in
+    # sync by the events below, so listings never need to join ``user_role``.
+    role_mask: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    # Incremented by every ORM update (optimistic locking), with updated_at it
+    # tags a user's representation for conditional requests.
+    row_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default="1"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
+    # Claimed by access tokens as ``ver``, incrementing it revokes every token
+    # issued to the user so far.
+    token_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
     roles: Mapped[list["RoleModel"]] = relationship(
         "RoleModel", secondary="user_role", backref=backref("users", lazy="dynamic")
     )
 
+    __mapper_args__ = {"version_id_col": row_version}
+
+    @property
+    def role_names(self) -> list[RoleNames]:
+        """Roles of the user read from ``role_mask``, without loading ``roles``."""
+        return RoleNames.from_mask(self.role_mask or 0)
+
     @validates("username")
     def validate_email(self, key: str, username: str) -> str:
         """Simple email validator.
@@ -80,3 +112,25 @@ class UserModel(Base):
             f"<User(username={self.username}, fullname={self.fullname},"
             f" status={self.status})>"
         )
+
+
+@event.listens_for(UserModel.roles, "append")
+def _add_role_bit(target: UserModel, value: RoleModel, initiator: object) -> None:
+    """Set bit of an added role in ``role_mask``."""
+    target.role_mask = (target.role_mask or 0) | 1 << value.name.bit
+
+
+@event.listens_for(UserModel.roles, "remove")
+def _remove_role_bit(target: UserModel, value: RoleModel, initiator: object) -> None:
+    """Clear bit of a removed role in ``role_mask``."""
+    target.role_mask = (target.role_mask or 0) & ~(1 << value.name.bit)
+
+
+@event.listens_for(UserModel, "after_insert")
+@event.listens_for(UserModel, "after_update")
+@event.listens_for(UserModel, "after_delete")
+def _bump_user_table_version(
+    mapper: Mapper, connection: Connection, target: UserModel
+) -> None:
+    """Count the write in the ``user_account`` change counter."""
+    bump_table_version(connection, UserModel.__tablename__)
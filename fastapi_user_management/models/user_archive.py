@@ -0,0 +1,69 @@
+"""Define Archived User Model Tables."""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.role import RoleNames
+from fastapi_user_management.models.user import UserStatusValues
+
+
+class ArchivedUserModel(Base):
+    """Long-deactivated user moved out of ``user_account``.
+
+    Columns are those of ``user_account``, rows keep their id and are moved back
+    unchanged when the user is restored. The username stays taken while the user
+    is archived.
+    """
+
+    __tablename__ = "user_account_archive"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    fullname: Mapped[str] = mapped_column(String, nullable=False)
+    username: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    password: Mapped[str] = mapped_column(String, nullable=False)
+    phone_number: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_login: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    status: Mapped[UserStatusValues] = mapped_column(
+        Enum(UserStatusValues), nullable=False
+    )
+    role_mask: Mapped[int] = mapped_column(Integer, nullable=False)
+    row_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+    @property
+    def role_names(self) -> list[RoleNames]:
+        """Roles of the user read from ``role_mask``."""
+        return RoleNames.from_mask(self.role_mask or 0)
+
+    def __repr__(self) -> str:
+        """Database object representation.
+
+        Returns:
+            str: object
+        """
+        return (
+            f"<ArchivedUser(username={self.username}, archived_at={self.archived_at})>"
+        )
+
+
+class ArchivedUserRoleModel(Base):
+    """``user_role`` rows of an archived user."""
+
+    __tablename__ = "user_role_archive"
+    __table_args__ = (Index("ix_user_role_archive_user_id", "user_id"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user_account_archive.id"))
+    role_id: Mapped[int] = mapped_column(Integer, ForeignKey("role.id"))
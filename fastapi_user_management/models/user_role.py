@@ -1,6 +1,6 @@
 """Relationship Table for User and Role Tables."""
 
-from sqlalchemy import ForeignKey, Integer
+from sqlalchemy import ForeignKey, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column
 
 from fastapi_user_management.models.base import Base
@@ -10,6 +10,8 @@ class UserRoleModel(Base):
     """UserRole Table mapping user_id to role_id."""
 
     __tablename__ = "user_role"
+    # Loading roles of a user and recomputing role masks look rows up by user.
+    __table_args__ = (Index("ix_user_role_user_id", "user_id"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user_account.id"))
     role_id: Mapped[int] = mapped_column(Integer, ForeignKey("role.id"))
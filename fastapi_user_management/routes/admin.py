@@ -1,17 +1,77 @@
 """Admin endpoint ``/admin``."""
+from collections.abc import Iterator
+from contextlib import contextmanager
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
 from pydantic import EmailStr
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from starlette.concurrency import run_in_threadpool
 
 from fastapi_user_management import crud
-from fastapi_user_management.core.database import get_db
-from fastapi_user_management.errors.exceptions import PasswordMatchError, UserExistError
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.database import get_db, use_writer
+from fastapi_user_management.core.permissions import (
+    permission_mask,
+    permission_registry,
+)
+from fastapi_user_management.core.response_cache import (
+    ROLES_TAG,
+    USERS_TAG,
+    response_cache,
+    user_tag,
+)
+from fastapi_user_management.errors.exceptions import (
+    InvalidCursorError,
+    PasswordMatchError,
+    UserExistError,
+    UsernameShardError,
+)
 from fastapi_user_management.misc import CREATE_USER_OPENAPI_EXAMPLE
+from fastapi_user_management.models.permission import PermissionNames
+from fastapi_user_management.models.role import RoleNames
 from fastapi_user_management.models.user import UserModel
 from fastapi_user_management.routes import auth
-from fastapi_user_management.schemas.user import BaseUserCreate, UserBase, UserUpdate, UserProfile
+from fastapi_user_management.schemas.batch import (
+    BatchOperation,
+    BatchRequest,
+    BatchResponse,
+    BatchResult,
+    CreateUserOperation,
+    DeleteUserOperation,
+    UpdateUserOperation,
+)
+from fastapi_user_management.schemas.user import (
+    USER_LIST,
+    ArchivedUser,
+    ArchivedUserPage,
+    BaseUserCreate,
+    UserBase,
+    UserPage,
+    UserProfile,
+    UserUpdate,
+)
+from fastapi_user_management.tools.encryption import get_password_hash
+from fastapi_user_management.tools.etag import etag_matches, weak_etag
+from fastapi_user_management.tools.pagination import decode_cursor, encode_cursor
+
+# permission required by every kind of batch operation
+OPERATION_PERMISSIONS = {
+    "create": PermissionNames.USER_CREATE,
+    "update": PermissionNames.USER_UPDATE,
+    "delete": PermissionNames.USER_DELETE,
+    "revoke_sessions": PermissionNames.USER_UPDATE,
+}
 
 router = APIRouter(
     prefix="/admin",
@@ -21,80 +81,476 @@ router = APIRouter(
     },
 )
 
+def cached_response(key: str, if_none_match: str | None) -> Response | None:
+    """Answer a request from the response cache.
+
+    Args:
+        key (str): cache key of the response.
+        if_none_match (str | None): ETags of cached copies of the client.
+
+    Returns:
+        Response | None: cached body or 304 Not Modified, None on a miss.
+    """
+    cached = response_cache.get(key)
+    if cached is None:
+        return None
+    etag, body = cached
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+def cache_response(key: str, etag: str, body: bytes) -> Response:
+    """Cache a serialized response and return it.
+
+    Args:
+        key (str): cache key of the response.
+        etag (str): ETag of the response.
+        body (bytes): JSON body.
+
+    Returns:
+        Response: JSON response with its ``ETag``.
+    """
+    response_cache.set(key, etag, body)
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
 
 @router.get("/user", response_model=list[UserBase])
 async def read_users(
-    current_user: Annotated[UserModel, Depends(auth.get_current_active_user)],
+    current_user: Annotated[
+        UserModel, Depends(auth.require_permission(PermissionNames.USER_READ))
+    ],
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 50,
+    role: RoleNames | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     """Read all users exist in database.
 
+    The weak ``ETag`` changes with every write to ``user_account``, a matching
+    ``If-None-Match`` is answered with 304 without loading any user. Bodies are
+    kept in the response cache until a user or role write commits.
+
     Args:
         current_user (Annotated[UserModel, Depends): logged in user.
         db (Session, optional): db session. Defaults to Depends(get_db).
         skip (int, optional): skip. Defaults to 0.
         limit (int, optional): limit. Defaults to 50.
+        role (RoleNames | None, optional): only users with this role.
+            Defaults to None.
+        if_none_match (str | None, optional): ETags of cached copies.
+            Defaults to None.
 
     Raises:
         HTTPException: raise exception for non-admin users with 403 status code.
 
     Returns:
-        list[UserModel]: list of users.
+        Response: JSON list of users, or 304 Not Modified.
     """
-    if crud.user.is_admin(db=db, db_obj=current_user):
-        queried_users: list[UserModel] = crud.user.get_multi(
-            db=db, skip=skip, limit=limit
+    key = response_cache.key(
+        "read_users",
+        tags=(USERS_TAG, ROLES_TAG),
+        scope=permission_registry.user_mask(current_user),
+        params={"skip": skip, "limit": limit, "role": role},
+    )
+    cached = cached_response(key, if_none_match)
+    if cached is not None:
+        return cached
+    etag = weak_etag(crud.user.get_table_version(db=db), "list", skip, limit, role)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
         )
-        return queried_users
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+    queried_users: list[UserModel] = crud.user.get_multi(
+        db=db, skip=skip, limit=limit, role=role
+    )
+    body = USER_LIST.dump_json([UserBase.from_row(user) for user in queried_users])
+    return cache_response(key, etag, body)
+
+
+@router.get("/user-page", response_model=UserPage)
+async def read_user_page(
+    current_user: Annotated[
+        UserModel, Depends(auth.require_permission(PermissionNames.USER_READ))
+    ],
+    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    role: RoleNames | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    """Read users ordered by username, page by page.
+
+    Pages are chained with ``next_cursor`` (keyset pagination), so the cost of a
+    page doesn't depend on its depth, also when users are sharded. Pages have a
+    weak ``ETag`` and are cached like ``GET /admin/user``.
+
+    Args:
+        current_user (Annotated[UserModel, Depends): logged in user.
+        db (Session, optional): db session. Defaults to Depends(get_db).
+        cursor (str | None, optional): ``next_cursor`` of the previous page.
+            Defaults to None.
+        limit (int, optional): page size. Defaults to 50.
+        role (RoleNames | None, optional): only users with this role.
+            Defaults to None.
+        if_none_match (str | None, optional): ETags of cached copies.
+            Defaults to None.
+
+    Raises:
+        HTTPException: 400 Invalid cursor.
+
+    Returns:
+        Response: JSON page of users, or 304 Not Modified.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            (after,) = decode_cursor(cursor)
+            if not isinstance(after, str):
+                raise InvalidCursorError
+        except (InvalidCursorError, ValueError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor!"
+            ) from e
+    key = response_cache.key(
+        "read_user_page",
+        tags=(USERS_TAG, ROLES_TAG),
+        scope=permission_registry.user_mask(current_user),
+        params={"after": after, "limit": limit, "role": role},
+    )
+    cached = cached_response(key, if_none_match)
+    if cached is not None:
+        return cached
+    etag = weak_etag(crud.user.get_table_version(db=db), "page", after, limit, role)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
         )
+    users = crud.user.get_page(db=db, after=after, limit=limit + 1, role=role)
+    next_cursor = (
+        encode_cursor(users[limit - 1].username) if len(users) > limit else None
+    )
+    page = UserPage(
+        items=[UserBase.from_row(user) for user in users[:limit]],
+        next_cursor=next_cursor,
+    )
+    return cache_response(key, etag, page.model_dump_json().encode())
+
 
 @router.get("/user-profile", response_model=UserProfile)
 async def user_profile(
     username: EmailStr,
-    current_user: Annotated[UserModel, Depends(auth.get_current_active_user)],
+    current_user: Annotated[
+        UserModel, Depends(auth.require_permission(PermissionNames.USER_READ))
+    ],
     db: Session = Depends(get_db),
+    if_none_match: Annotated[str | None, Header()] = None,
 ) -> Response:
-    if crud.user.is_admin(db=db, db_obj=current_user):
-        user: UserModel = crud.user.get_by_username(username=username)
-        return user
-    else:
+    """Endpoint to read the profile of a user.
+
+    The weak ``ETag`` is derived from the user's row version, a matching
+    ``If-None-Match`` is answered with 304 without loading the user. Profiles
+    are cached until a write to the user or to roles commits. Archived users
+    aren't restored by reading them, they're listed by
+    ``GET /admin/archived-users``.
+
+    Args:
+        username (EmailStr): selected user
+        current_user (Annotated[UserModel, Depends): logged in user
+        db (Session, optional): db session. Defaults to Depends(get_db).
+        if_none_match (str | None, optional): ETags of cached copies.
+            Defaults to None.
+
+    Raises:
+        HTTPException: 404 User not found, or archived.
+
+    Returns:
+        Response: user profile, or 304 Not Modified.
+    """
+    key = response_cache.key(
+        "user_profile",
+        tags=(user_tag(username), ROLES_TAG),
+        scope=permission_registry.user_mask(current_user),
+        params={"username": username},
+    )
+    cached = cached_response(key, if_none_match)
+    if cached is not None:
+        return cached
+    version = crud.user.get_version(db=db, username=username)
+    if version is None:
+        archived = crud.user_archive.exists(db=db, username=username)
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User is archived!" if archived else "User not found!",
+        )
+    etag = weak_etag(*version)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
         )
+    user: UserModel = crud.user.get_by_username(db=db, username=username)
+    if user:
+        return cache_response(
+            key,
+            weak_etag(user.id, user.row_version, user.updated_at),
+            UserProfile.from_row(user).model_dump_json().encode(),
+        )
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail="User not found!"
+    )
+
+
+@router.get("/archived-users", response_model=ArchivedUserPage)
+async def read_archived_users(
+    current_user: Annotated[
+        UserModel, Depends(auth.require_permission(PermissionNames.USER_READ))
+    ],
+    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+) -> ArchivedUserPage:
+    """Read archived users ordered by username, page by page.
+
+    Pages are chained with ``next_cursor`` like ``GET /admin/user-page``.
+    Updating or deleting an archived user with the other endpoints restores it.
+
+    Args:
+        current_user (Annotated[UserModel, Depends): logged in user.
+        db (Session, optional): db session. Defaults to Depends(get_db).
+        cursor (str | None, optional): ``next_cursor`` of the previous page.
+            Defaults to None.
+        limit (int, optional): page size. Defaults to 50.
+
+    Raises:
+        HTTPException: 400 Invalid cursor.
+
+    Returns:
+        ArchivedUserPage: page of archived users.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            (after,) = decode_cursor(cursor)
+            if not isinstance(after, str):
+                raise InvalidCursorError
+        except (InvalidCursorError, ValueError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor!"
+            ) from e
+    users = crud.user_archive.get_page(db=db, after=after, limit=limit + 1)
+    next_cursor = (
+        encode_cursor(users[limit - 1].username) if len(users) > limit else None
+    )
+    return ArchivedUserPage(
+        items=[ArchivedUser.from_row(user) for user in users[:limit]],
+        next_cursor=next_cursor,
+    )
+
+
+def get_user_or_404(
+    db: Session, username: EmailStr, *, commit: bool = True
+) -> UserModel:
+    """Get a user by username, restoring it if it was archived.
+
+    Args:
+        db (Session): database session.
+        username (EmailStr): username.
+        commit (bool, optional): commit the restore. Defaults to True.
+
+    Raises:
+        HTTPException: 404 User not found.
+
+    Returns:
+        UserModel: selected user.
+    """
+    user: UserModel | None = crud.user.get_or_restore(
+        db=db, username=username, commit=commit
+    )
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found!"
+        )
+    return user
+
+
+def create(
+    db: Session,
+    new_user: BaseUserCreate,
+    *,
+    commit: bool = True,
+    password_hash: str | None = None,
+) -> UserModel:
+    """Create a user.
+
+    Args:
+        db (Session): database session.
+        new_user (BaseUserCreate): user to create.
+        commit (bool, optional): commit the session. Defaults to True.
+        password_hash (str | None, optional): hash of its password.
+            Defaults to None, the password is hashed by the CRUD.
+
+    Raises:
+        HTTPException: 409 Username already exists.
+
+    Returns:
+        UserModel: created user.
+    """
+    try:
+        return crud.user.create(
+            db=db, obj_in=new_user, commit=commit, password_hash=password_hash
+        )
+    except UserExistError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=e.message
+        ) from e
+
+
+@contextmanager
+def conflict_on_stale_data(db: Session, *, commit: bool) -> Iterator[None]:
+    """Answer a write of a user changed by a concurrent request with a conflict.
+
+    Args:
+        db (Session): database session.
+        commit (bool): the write commits, its transaction is rolled back.
+            Otherwise the caller rolls back its savepoint.
+
+    Raises:
+        HTTPException: 409 User was changed meanwhile.
+    """
+    try:
+        yield
+    except StaleDataError as e:
+        if commit:
+            db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User was changed meanwhile, try again!",
+        ) from e
 
 
+def update(
+    db: Session,
+    username: EmailStr,
+    obj_in: UserUpdate,
+    *,
+    commit: bool = True,
+    password_hash: str | None = None,
+) -> UserModel:
+    """Update a user.
+
+    Args:
+        db (Session): database session.
+        username (EmailStr): selected user.
+        obj_in (UserUpdate): update user info.
+        commit (bool, optional): commit the session. Defaults to True.
+        password_hash (str | None, optional): hash of the new password.
+            Defaults to None, the password is hashed by the CRUD.
+
+    Raises:
+        HTTPException: 404 User not found.
+        HTTPException: 400 Password doesn't match.
+        HTTPException: 409 Username belongs to another shard.
+        HTTPException: 409 User was changed meanwhile.
+
+    Returns:
+        UserModel: updated user.
+    """
+    user = get_user_or_404(db, username, commit=commit)
+    try:
+        with conflict_on_stale_data(db, commit=commit):
+            return crud.user.update(
+                db=db,
+                db_obj=user,
+                obj_in=obj_in,
+                commit=commit,
+                password_hash=password_hash,
+            )
+    except PasswordMatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=e.message
+        ) from e
+    except UsernameShardError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=e.message
+        ) from e
+
+
+def delete(db: Session, username: EmailStr, *, commit: bool = True) -> None:
+    """Delete a user who isn't an admin.
+
+    Args:
+        db (Session): database session.
+        username (EmailStr): selected user.
+        commit (bool, optional): commit the session. Defaults to True.
+
+    Raises:
+        HTTPException: 404 User not found.
+        HTTPException: 409 Can't remove user with admin role.
+        HTTPException: 409 User was changed meanwhile.
+    """
+    user = get_user_or_404(db, username, commit=commit)
+    if crud.user.is_admin(db=db, db_obj=user):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Can't delete user with admin role!",
+        )
+    with conflict_on_stale_data(db, commit=commit):
+        crud.user.remove_by_username(db=db, username=username, commit=commit)
+
+
+def revoke_sessions(db: Session, username: EmailStr, *, commit: bool = True) -> None:
+    """Revoke every access token issued to a user.
+
+    Args:
+        db (Session): database session.
+        username (EmailStr): selected user.
+        commit (bool, optional): commit the session. Defaults to True.
+
+    Raises:
+        HTTPException: 404 User not found.
+        HTTPException: 409 User was changed meanwhile.
+    """
+    user = get_user_or_404(db, username, commit=commit)
+    with conflict_on_stale_data(db, commit=commit):
+        crud.user.revoke_sessions(db=db, db_obj=user, commit=commit)
+
 
 @router.post("/user", response_model=UserBase)
 async def create_user(
     new_user: Annotated[
         BaseUserCreate, Body(openapi_examples=CREATE_USER_OPENAPI_EXAMPLE)
     ],
-    current_user: Annotated[UserModel, Depends(auth.get_current_active_user)],
+    current_user: Annotated[
+        UserModel, Depends(auth.require_permission(PermissionNames.USER_CREATE))
+    ],
     db: Session = Depends(get_db),
 ):
-    if crud.user.is_admin(db=db, db_obj=current_user):
-        try:
-            created_user: UserModel = crud.user.create(db=db, obj_in=new_user)
-            return created_user
-        except UserExistError as e:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT, detail=e.message
-            ) from e
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
-        )
+    """Endpoint to create user.
+
+    Args:
+        new_user (BaseUserCreate): user to create
+        current_user (Annotated[UserModel, Depends): logged in user
+        db (Session, optional): db session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 409 Username already exists.
+        HTTPException: 403 Access denied
+
+    Returns:
+        UserModel: created user
+    """
+    return create(db, new_user)
 
 
 @router.delete("/user")
 async def delete_user(
     username: EmailStr,
-    current_user: Annotated[UserModel, Depends(auth.get_current_active_user)],
+    current_user: Annotated[
+        UserModel, Depends(auth.require_permission(PermissionNames.USER_DELETE))
+    ],
     db: Session = Depends(get_db),
 ) -> Response:
     """Endpoint to delete user.
@@ -112,31 +568,45 @@ async def delete_user(
     Returns:
         Response: 200 - OK
     """
-    if crud.user.is_admin(db=db, db_obj=current_user):
-        user: UserModel = crud.user.get_by_username(db=db, username=username)
-        if user:
-            if not crud.user.is_admin(db=db, db_obj=user):
-                crud.user.remove_by_username(db=db, username=username)
-                return Response(status_code=status.HTTP_200_OK)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="Can't delete user with admin role!",
-                )
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found!"
-        )
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
-        )
+    delete(db, username)
+    return Response(status_code=status.HTTP_200_OK)
+
+
+@router.delete("/user-sessions")
+async def revoke_user_sessions(
+    username: EmailStr,
+    current_user: Annotated[
+        UserModel, Depends(auth.require_permission(PermissionNames.USER_UPDATE))
+    ],
+    db: Session = Depends(get_db),
+) -> Response:
+    """Endpoint to revoke every access token issued to a user.
+
+    The user has to log in again, tokens issued afterwards are valid.
+
+    Args:
+        username (EmailStr): selected user
+        current_user (Annotated[UserModel, Depends): logged in user
+        db (Session, optional): db session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 404 User not found.
+        HTTPException: 403 Access denied
+
+    Returns:
+        Response: 200 - OK
+    """
+    revoke_sessions(db, username)
+    return Response(status_code=status.HTTP_200_OK)
 
 
 @router.patch("/user")
 async def update_user(
     username: EmailStr,
     obj_in: UserUpdate,
-    current_user: Annotated[UserModel, Depends(auth.get_current_active_user)],
+    current_user: Annotated[
+        UserModel, Depends(auth.require_permission(PermissionNames.USER_UPDATE))
+    ],
     db: Session = Depends(get_db),
 ) -> Response:
     """Endpoint to update user.
@@ -155,19 +625,161 @@ async def update_user(
     Returns:
         Response: 200 - OK
     """
-    if crud.user.is_admin(db=db, db_obj=current_user):
-        user: UserModel = crud.user.get_by_username(username=username)
-        if user:
-            try:
-                crud.user.update(db=db, db_obj=user, obj_in=obj_in)
-            except PasswordMatchError as e:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, detail=e.message
-                ) from e
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found!"
+    update(db, username, obj_in)
+    return Response(status_code=status.HTTP_200_OK)
+
+
+def hash_passwords(
+    operations: list[BatchOperation], *, random_passwords: bool = True
+) -> list[str | None]:
+    """Hash the passwords of the operations of a batch.
+
+    Batches hash before opening their transaction, it would hold the write
+    lock of the database for a bcrypt hash per operation otherwise.
+
+    Args:
+        operations (list[BatchOperation]): operations.
+        random_passwords (bool, optional): hash a random password for the
+            creations without one. Defaults to True.
+
+    Returns:
+        list[str | None]: password hash of every operation, None for
+            operations without password and mismatched password confirmations.
+    """
+    hashes: list[str | None] = []
+    for operation in operations:
+        if isinstance(operation, CreateUserOperation) and (
+            random_passwords or operation.user.password is not None
+        ):
+            hashes.append(crud.user.hash_new_password(operation.user))
+        elif (
+            isinstance(operation, UpdateUserOperation)
+            and operation.changes.new_password == operation.changes.new_password_confirm
+        ):
+            hashes.append(get_password_hash(operation.changes.new_password))
+        else:
+            hashes.append(None)
+    return hashes
+
+
+def run_operation(
+    db: Session, operation: BatchOperation, password_hash: str | None = None
+) -> UserModel | None:
+    """Run an operation of a batch without committing.
+
+    Args:
+        db (Session): database session.
+        operation (BatchOperation): operation.
+        password_hash (str | None, optional): its hash from ``hash_passwords``.
+            Defaults to None, a password is hashed in the transaction.
+
+    Raises:
+        HTTPException: error the single operation endpoint would answer.
+
+    Returns:
+        UserModel | None: created or updated user.
+    """
+    if isinstance(operation, CreateUserOperation):
+        return create(db, operation.user, commit=False, password_hash=password_hash)
+    if isinstance(operation, UpdateUserOperation):
+        return update(
+            db,
+            operation.username,
+            operation.changes,
+            commit=False,
+            password_hash=password_hash,
         )
+    if isinstance(operation, DeleteUserOperation):
+        delete(db, operation.username, commit=False)
     else:
+        revoke_sessions(db, operation.username, commit=False)
+    return None
+
+
+def require_operation_permissions(
+    current_user: UserModel, operations: list[BatchOperation]
+) -> int:
+    """Check the caller has the permissions of every operation of a batch.
+
+    Args:
+        current_user (UserModel): logged in user.
+        operations (list[BatchOperation]): operations.
+
+    Raises:
+        HTTPException: 403 Access denied
+
+    Returns:
+        int: permission mask of the operations.
+    """
+    required = permission_mask(
+        *{OPERATION_PERMISSIONS[operation.op] for operation in operations}
+    )
+    if not permission_registry.has_permissions(current_user, required):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
         )
+    return required
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    current_user: Annotated[UserModel, Depends(auth.get_current_principal)],
+    db: Session = Depends(get_db),
+) -> BatchResponse:
+    """Endpoint to run user operations in order, in one transaction.
+
+    The caller is authenticated and authorized once, for the permissions of
+    every operation of the batch. Each operation runs in a savepoint: a failed
+    operation is rolled back alone and reported with the status code its
+    single operation endpoint would answer, the changes of the others are
+    committed together at the end. Atomic batches stop at the first failure
+    and commit nothing.
+
+    Args:
+        batch (BatchRequest): operations.
+        current_user (Annotated[UserModel, Depends): logged in user
+        db (Session, optional): db session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 413 Too many operations.
+        HTTPException: 403 Access denied
+
+    Returns:
+        BatchResponse: result of every operation run.
+    """
+    if len(batch.operations) > SETTINGS.BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch can't have more than {SETTINGS.BATCH_MAX_OPERATIONS}"
+            " operations!",
+        )
+    require_operation_permissions(current_user, batch.operations)
+    password_hashes = await run_in_threadpool(hash_passwords, batch.operations)
+    use_writer(db)
+    results: list[BatchResult] = []
+    failed = False
+    for operation, password_hash in zip(batch.operations, password_hashes):
+        savepoint = db.begin_nested()
+        try:
+            user = run_operation(db, operation, password_hash)
+        except HTTPException as e:
+            savepoint.rollback()
+            failed = True
+            results.append(BatchResult(status_code=e.status_code, detail=e.detail))
+            if batch.atomic:
+                break
+        else:
+            savepoint.commit()
+            results.append(
+                BatchResult(
+                    status_code=status.HTTP_200_OK,
+                    user=None if user is None else UserBase.from_row(user),
+                )
+            )
+    committed = not (failed and batch.atomic)
+    if committed:
+        db.commit()
+    else:
+        db.rollback()
+    return BatchResponse(committed=committed, results=results)
@@ -1,20 +1,37 @@
 """Token provider endpoint for JWT."""
-from datetime import timedelta
+from collections.abc import Callable, Coroutine
+from datetime import datetime, timedelta
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Response,
+    status,
+)
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import EmailStr
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 
 from fastapi_user_management import crud
 from fastapi_user_management.config import SETTINGS
-from fastapi_user_management.core.database import get_db
+from fastapi_user_management.core.database import SessionLocal, get_db, release
+from fastapi_user_management.core.permissions import (
+    permission_mask,
+    permission_registry,
+)
+from fastapi_user_management.core.principal_cache import principal_cache
+from fastapi_user_management.core.revocation import token_revocations
+from fastapi_user_management.core.user_directory import user_directory
+from fastapi_user_management.models.permission import PermissionNames
 from fastapi_user_management.models.user import UserModel, UserStatusValues
 from fastapi_user_management.schemas.auth import Token, TokenData
 from fastapi_user_management.schemas.user import UserBase
+from fastapi_user_management.tools.encryption import get_password_hash, needs_rehash
 from fastapi_user_management.tools.token import create_access_token
 
 router = APIRouter(
@@ -25,16 +42,39 @@ router = APIRouter(
     },
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 
+def lookup_principal(db: Session, username: str) -> UserModel | None:
+    """User of a token from the principal cache, or the database on a miss.
+
+    Args:
+        db (Session): db session.
+        username (str): ``sub`` claim of the token.
+
+    Returns:
+        UserModel | None: user, None if they don't exist.
+    """
+    key = principal_cache.key(username)
+    user = principal_cache.get(key)
+    if user is None:
+        user = crud.user.get_by_username(db=db, username=username)
+        if user is not None:
+            principal_cache.set(key, user)
+    return user
+
+
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)
 ) -> UserModel | Any:
     """Get current user information from token and database.
 
+    The connection used for the lookup is released right away, handlers that
+    reject the user or don't query never hold one. Users found in the user
+    directory snapshot or the principal cache aren't looked up, they are
+    detached from the session. Tokens revoked by logout, or issued before the
+    user's sessions were revoked, are rejected.
+
     Args:
         token (Annotated[str, Depends): access token
         db (Session, optional): db session. Defaults to Depends(get_db).
@@ -55,21 +95,29 @@ async def get_current_user(
             token, SETTINGS.SECRET_KEY, algorithms=[SETTINGS.ALGORITHM]
         )
         username: EmailStr = payload.get("sub")
-        if username is None:   
-            raise CREDENTIALS_EXCEPTION   
+        if username is None:
+            raise CREDENTIALS_EXCEPTION
         token_data = TokenData(username=username)
-    except JWTError as e:   
-        raise CREDENTIALS_EXCEPTION from e   
-    user: UserModel | Any = crud.user.get_by_username(
-        db=db, username=token_data.username
-    )
-    if user is None:   
-        raise CREDENTIALS_EXCEPTION   
+    except JWTError as e:
+        raise CREDENTIALS_EXCEPTION from e
+    jti: str | None = payload.get("jti")
+    if jti is not None and token_revocations.is_revoked(db, jti=jti):
+        raise CREDENTIALS_EXCEPTION
+    user: UserModel | Any = None
+    if user_directory is not None:
+        user = user_directory.principal(
+            token_data.username, token_version=payload.get("ver", 0)
+        )
+    if user is None:
+        user = lookup_principal(db, token_data.username)
+    release(db)
+    if user is None or payload.get("ver", 0) != user.token_version:
+        raise CREDENTIALS_EXCEPTION
     return user
 
 
 async def get_current_active_user(
-    current_user: Annotated[UserBase, Depends(get_current_user)]
+    current_user: Annotated[UserBase, Depends(get_current_user)],
 ) -> UserBase:
     """Check if user is active or not.
 
@@ -89,15 +137,112 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_principal(
+    current_user: Annotated[UserModel, Depends(get_current_active_user)],
+    db: Session = Depends(get_db),
+) -> UserModel:
+    """Current active user with up to date status and roles.
+
+    Every route checking permissions authenticates with it.
+
+    Users resolved without a lookup, from the user directory snapshot, may have
+    been deactivated or lost roles since it was built: they are looked up again,
+    through the principal cache, which writes to the user invalidate.
+
+    Args:
+        current_user (Annotated[UserModel, Depends): current user.
+        db (Session, optional): db session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 401 sessions revoked since the snapshot or 400 Inactive
+            user.
+
+    Returns:
+        UserModel: current user
+    """
+    if user_directory is None or not inspect(current_user).transient:
+        return current_user
+    user = lookup_principal(db, current_user.username)
+    release(db)
+    if user is None or user.token_version != current_user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_current_active_user(user)
+
+
+def require_permission(
+    *permissions: PermissionNames,
+) -> Callable[..., Coroutine[Any, Any, UserModel]]:
+    """Build a dependency returning the current user if they have permissions.
+
+    Args:
+        *permissions (PermissionNames): required permissions.
+
+    Returns:
+        Callable[..., Coroutine[Any, Any, UserModel]]: dependency.
+    """
+    required = permission_mask(*permissions)
+
+    async def check_permissions(
+        current_user: Annotated[UserModel, Depends(get_current_principal)],
+    ) -> UserModel:
+        """Check permissions of the current user.
+
+        Args:
+            current_user (Annotated[UserModel, Depends): current user.
+
+        Raises:
+            HTTPException: 403 Access denied.
+
+        Returns:
+            UserModel: current user
+        """
+        if not permission_registry.has_permissions(current_user, required):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+            )
+        return current_user
+
+    return check_permissions
+
+
+def rehash_password(username: str, password: str, old_hash: str) -> None:
+    """Hash a verified password again with the configured work factor.
+
+    Runs after the login response, in the threadpool, so the client doesn't
+    wait for the hash. A password changed meanwhile is kept.
+
+    Args:
+        username (str): username of the logged in user.
+        password (str): verified password.
+        old_hash (str): outdated hash the password was verified with.
+    """
+    with SessionLocal() as db:
+        crud.user.replace_password_hash(
+            db,
+            username=username,
+            old_hash=old_hash,
+            new_hash=get_password_hash(password),
+        )
+
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ) -> dict[str, str]:
     """Endpoint to generate access token for write credentials.
 
+    A password hashed with an outdated work factor is hashed again after the
+    response, see ``rehash_password``.
+
     Args:
         form_data (Annotated[OAuth2PasswordRequestForm, Depends): credentials
+        background_tasks (BackgroundTasks): tasks run after the response.
         db (Session, optional): db session. Defaults to Depends(get_db).
 
     Raises:
@@ -115,8 +260,44 @@ async def login_for_access_token(
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if SETTINGS.PASSWORD_HASHING_REHASH_ON_LOGIN and needs_rehash(user.password):
+        background_tasks.add_task(
+            rehash_password, user.username, form_data.password, user.password
+        )
     access_token_expires = timedelta(minutes=SETTINGS.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "ver": user.token_version},
+        expires_delta=access_token_expires,
     )
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.post("/logout")
+async def logout(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    db: Session = Depends(get_db),
+) -> Response:
+    """Endpoint to revoke the access token of the request.
+
+    Args:
+        token (Annotated[str, Depends): access token
+        current_user (Annotated[UserModel, Depends): logged in user
+        db (Session, optional): db session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 400 Token can't be revoked.
+
+    Returns:
+        Response: 200 - OK
+    """
+    # the signature was verified by get_current_user
+    claims = jwt.get_unverified_claims(token)
+    if "jti" not in claims:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Token can't be revoked!"
+        )
+    token_revocations.revoke(
+        db, jti=claims["jti"], expires_at=datetime.utcfromtimestamp(claims["exp"])
+    )
+    return Response(status_code=status.HTTP_200_OK)
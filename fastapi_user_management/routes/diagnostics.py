@@ -0,0 +1,84 @@
+"""Diagnostics endpoint ``/diagnostics``."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+
+from fastapi_user_management.core.database import pool_status
+from fastapi_user_management.core.loop_monitor import loop_monitor
+from fastapi_user_management.core.revocation import token_revocations
+from fastapi_user_management.core.username_filter import (
+    UsernameFilterStats,
+    username_filter,
+)
+from fastapi_user_management.models.permission import PermissionNames
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.routes import auth
+from fastapi_user_management.schemas.diagnostics import (
+    Diagnostics,
+    LoopLag,
+    LoopStall,
+    PoolStatus,
+    RevocationStatus,
+    UsernameFilterStatus,
+)
+
+router = APIRouter(
+    prefix="/diagnostics",
+    tags=["diagnostics"],
+    responses={
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"description": "Internal Server Error"},
+    },
+)
+
+
+@router.get("", response_model=Diagnostics)
+async def read_diagnostics(
+    current_user: Annotated[
+        UserModel, Depends(auth.require_permission(PermissionNames.DIAGNOSTICS_READ))
+    ],
+):
+    """Event loop lag, recent stalls, database pool, revocation and username filter.
+
+    Stalls are moments the event loop was blocked longer than the configured
+    threshold, with the stack of the blocking call and the route it ran for.
+
+    Args:
+        current_user (Annotated[UserModel, Depends): logged in user with the
+            ``diagnostics_read`` permission.
+
+    Returns:
+        Diagnostics: loop, pool, revocation and username filter health.
+    """
+    bloom = token_revocations.filter
+    usernames = username_filter.filter if username_filter else None
+    username_stats = username_filter.stats if username_filter else UsernameFilterStats()
+    return Diagnostics(
+        loop_monitor=loop_monitor.running,
+        lag=LoopLag(**loop_monitor.percentiles()),
+        stalls=[
+            LoopStall(
+                route=stall.route,
+                detected_at=stall.detected_at,
+                lag_ms=stall.lag * 1000,
+                stack=stall.stack,
+            )
+            for stall in reversed(loop_monitor.stalls)
+        ],
+        pool=PoolStatus(**pool_status()),
+        revocation=RevocationStatus(
+            revoked_tokens=bloom.count if bloom else 0,
+            error_rate=bloom.error_rate if bloom else 0.0,
+            checks=token_revocations.stats.checks,
+            table_lookups=token_revocations.stats.table_lookups,
+            false_positives=token_revocations.stats.false_positives,
+        ),
+        username_filter=UsernameFilterStatus(
+            enabled=username_filter is not None,
+            usernames=usernames.count if usernames else 0,
+            error_rate=usernames.error_rate if usernames else 0.0,
+            checks=username_stats.checks,
+            definite_misses=username_stats.definite_misses,
+            false_positives=username_stats.false_positives,
+        ),
+    )
@@ -0,0 +1,227 @@
+"""DICOM endpoint ``/dicom``."""
+
+from dataclasses import asdict
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session
+
+from fastapi_user_management import crud
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.database import get_db
+from fastapi_user_management.errors.exceptions import (
+    DicomParseError,
+    InvalidCursorError,
+)
+from fastapi_user_management.models.dicom_series import DicomSeriesModel
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.routes import auth
+from fastapi_user_management.schemas.dicom import (
+    DicomBulkIngest,
+    DicomIngestError,
+    DicomSeriesBase,
+    DicomSeriesCreate,
+    DicomSeriesPage,
+)
+from fastapi_user_management.tools.dicom import DicomHeaderParser
+from fastapi_user_management.tools.dicom_ingest import DicomIngest, get_executor
+from fastapi_user_management.tools.pagination import decode_cursor, encode_cursor
+
+router = APIRouter(
+    prefix="/dicom",
+    tags=["dicom"],
+    responses={
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"description": "Internal Server Error"},
+    },
+)
+
+DICOM_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/dicom": {"schema": {"type": "string", "format": "binary"}}
+        },
+    }
+}
+
+BULK_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "files": {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                        }
+                    },
+                }
+            },
+            "application/zip": {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+@router.get("/series", response_model=DicomSeriesPage)
+async def read_series(
+    current_user: Annotated[UserModel, Depends(auth.get_current_active_user)],
+    db: Session = Depends(get_db),
+    patient_id: str | None = None,
+    study_instance_uid: str | None = None,
+    modality: str | None = None,
+    body_part_examined: str | None = None,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+):
+    """Query stored series by any combination of header values.
+
+    Pages are chained with ``next_cursor`` (keyset pagination), so the cost of a
+    page doesn't depend on its depth or on the table size.
+
+    Args:
+        current_user (Annotated[UserModel, Depends): logged in user.
+        db (Session, optional): db session. Defaults to Depends(get_db).
+        patient_id (str | None, optional): PatientID. Defaults to None.
+        study_instance_uid (str | None, optional): StudyInstanceUID.
+            Defaults to None.
+        modality (str | None, optional): Modality. Defaults to None.
+        body_part_examined (str | None, optional): BodyPartExamined.
+            Defaults to None.
+        cursor (str | None, optional): ``next_cursor`` of the previous page.
+            Defaults to None.
+        limit (int, optional): page size. Defaults to 50.
+
+    Raises:
+        HTTPException: 400 Invalid cursor.
+
+    Returns:
+        DicomSeriesPage: page of series.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            (after,) = decode_cursor(cursor)
+            if not isinstance(after, int):
+                raise InvalidCursorError
+        except (InvalidCursorError, ValueError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor!"
+            ) from e
+    rows = crud.dicom_series.get_page(
+        db=db,
+        patient_id=patient_id,
+        study_instance_uid=study_instance_uid,
+        modality=modality,
+        body_part_examined=body_part_examined,
+        after=after,
+        limit=limit + 1,
+    )
+    next_cursor = encode_cursor(rows[limit - 1]["id"]) if len(rows) > limit else None
+    return DicomSeriesPage(
+        items=[DicomSeriesBase(**row) for row in rows[:limit]],
+        next_cursor=next_cursor,
+    )
+
+
+@router.post(
+    "/series", response_model=DicomSeriesBase, openapi_extra=DICOM_REQUEST_BODY
+)
+async def upload_dicom(
+    request: Request,
+    current_user: Annotated[UserModel, Depends(auth.get_current_active_user)],
+    db: Session = Depends(get_db),
+):
+    """Store header of an uploaded DICOM file in ``dicom_series``.
+
+    The raw file is sent as request body. It is parsed while it streams in and
+    reading stops as soon as the header is complete, pixel data is never read.
+
+    Args:
+        request (Request): request with the DICOM file as body.
+        current_user (Annotated[UserModel, Depends): logged in user.
+        db (Session, optional): db session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 422 file isn't a valid DICOM file or has no SeriesInstanceUID.
+
+    Returns:
+        DicomSeriesModel: stored series.
+    """
+    parser = DicomHeaderParser()
+    try:
+        async for chunk in request.stream():
+            if parser.feed(chunk):
+                break
+        header = parser.close()
+    except DicomParseError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.message
+        ) from e
+    if header.series_instance_uid is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="SeriesInstanceUID is missing!",
+        )
+    series: DicomSeriesModel = crud.dicom_series.upsert(
+        db=db, obj_in=DicomSeriesCreate(**asdict(header))
+    )
+    return series
+
+
+@router.post(
+    "/series/bulk", response_model=DicomBulkIngest, openapi_extra=BULK_REQUEST_BODY
+)
+async def bulk_ingest_dicom(
+    request: Request,
+    current_user: Annotated[UserModel, Depends(auth.get_current_active_user)],
+    db: Session = Depends(get_db),
+):
+    """Store headers of many DICOM files in ``dicom_series``.
+
+    Body is either a zip archive or a multipart body of DICOM files and zip
+    archives. It's walked as a stream while header extraction runs in a process
+    pool, then series are de-duplicated by SeriesInstanceUID and upserted in
+    chunked transactions. Broken files are reported without failing the request.
+
+    Args:
+        request (Request): request with a zip or multipart body.
+        current_user (Annotated[UserModel, Depends): logged in user.
+        db (Session, optional): db session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 422 body is neither a zip archive nor a multipart body.
+
+    Returns:
+        DicomBulkIngest: ingest summary with per-file errors.
+    """
+    executor = get_executor(SETTINGS.DICOM_INGEST_WORKERS)
+    max_pending = 2 * SETTINGS.DICOM_INGEST_WORKERS
+    try:
+        ingest = DicomIngest(
+            request.headers.get("content-type", ""),
+            executor=executor,
+            batch_size=SETTINGS.DICOM_INGEST_BATCH_SIZE,
+            head_bytes=SETTINGS.DICOM_INGEST_HEAD_BYTES,
+        )
+        async for chunk in request.stream():
+            ingest.feed(chunk)
+            await ingest.drain(max_pending)
+        await ingest.close()
+    except DicomParseError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.message
+        ) from e
+    series = crud.dicom_series.upsert_many(
+        db=db,
+        objs_in=(DicomSeriesCreate(**asdict(h)) for h in ingest.series.values()),
+        chunk_size=SETTINGS.DICOM_UPSERT_CHUNK_SIZE,
+    )
+    return DicomBulkIngest(
+        files=ingest.files,
+        instances=ingest.instances,
+        series=series,
+        errors=[DicomIngestError(file=f, detail=d) for f, d in ingest.errors],
+    )
@@ -0,0 +1,338 @@
+"""Background job endpoint ``/admin/jobs``."""
+
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+
+from fastapi_user_management import crud
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.archive import archive_deactivated
+from fastapi_user_management.core.database import SessionLocal, use_writer
+from fastapi_user_management.core.jobs import JobContext, job_queue
+from fastapi_user_management.core.permissions import (
+    permission_mask,
+    permission_registry,
+)
+from fastapi_user_management.models.job import JobModel
+from fastapi_user_management.models.permission import PermissionNames
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.routes import admin, auth
+from fastapi_user_management.schemas.batch import (
+    BatchOperation,
+    CreateUserOperation,
+    UpdateUserOperation,
+)
+from fastapi_user_management.schemas.job import JobResponse, UserBatchJobRequest
+
+USER_BATCH_JOB = "user_batch"
+ARCHIVE_USERS_JOB = "archive_users"
+# stored in place of the passwords of user batch jobs, which keep their hashes
+REDACTED_PASSWORD = "<redacted>"
+MISMATCHED_PASSWORD = "<mismatched>"
+# failed operations whose error is kept in the result of a user batch job
+MAX_REPORTED_ERRORS = 100
+
+OPERATION = TypeAdapter(BatchOperation)
+
+router = APIRouter(
+    prefix="/admin/jobs",
+    tags=["admin"],
+    responses={
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"description": "Internal Server Error"},
+    },
+)
+
+
+def redact_passwords(
+    batch: UserBatchJobRequest, password_hashes: list[str | None]
+) -> list[dict[str, Any]]:
+    """Operations of a user batch job as stored, without their passwords.
+
+    Args:
+        batch (UserBatchJobRequest): operations.
+        password_hashes (list[str | None]): hashes of their passwords, from
+            ``admin.hash_passwords``.
+
+    Returns:
+        list[dict[str, Any]]: JSON operations, created users have no password
+            and updated passwords are redacted, a mismatched confirmation stays
+            mismatched.
+    """
+    operations = []
+    for operation, password_hash in zip(batch.operations, password_hashes):
+        data = operation.model_dump(mode="json", exclude_unset=True)
+        if isinstance(operation, CreateUserOperation):
+            data["user"].pop("password", None)
+        elif isinstance(operation, UpdateUserOperation):
+            data["changes"] = {
+                "new_password": REDACTED_PASSWORD,
+                "new_password_confirm": (
+                    REDACTED_PASSWORD if password_hash else MISMATCHED_PASSWORD
+                ),
+            }
+        operations.append(data)
+    return operations
+
+
+@job_queue.register(USER_BATCH_JOB)
+def run_user_batch(
+    context: JobContext,
+    operations: list[dict[str, Any]],
+    password_hashes: list[str | None] | None = None,
+) -> dict[str, Any]:
+    """Run the operations of a user batch job, one chunk per transaction.
+
+    A chunk ends after ``chunk_size`` operations or ``chunk_seconds``, so it
+    never holds the write lock of the database for long. Random passwords of
+    the creations of a chunk are hashed before its transaction.
+
+    Args:
+        context (JobContext): progress of the job.
+        operations (list[dict[str, Any]]): operations, as stored by
+            ``redact_passwords``.
+        password_hashes (list[str | None] | None, optional): hashes of their
+            passwords. Defaults to None, for jobs storing plaintext passwords.
+
+    Returns:
+        dict[str, Any]: counts of succeeded and failed operations, and the
+            errors of the first failed ones.
+    """
+    result = context.result or {"succeeded": 0, "failed": 0, "errors": []}
+    index, total = context.done, len(operations)
+    with SessionLocal() as db:
+        use_writer(db)
+        while index < total:
+            end = min(index + SETTINGS.JOBS_CHUNK_SIZE, total)
+            chunk = [OPERATION.validate_python(data) for data in operations[index:end]]
+            if password_hashes is None:
+                hashes = admin.hash_passwords(chunk)
+            else:
+                hashes = [
+                    (
+                        crud.user.hash_new_password(operation.user)
+                        if password_hash is None
+                        and isinstance(operation, CreateUserOperation)
+                        else password_hash
+                    )
+                    for operation, password_hash in zip(
+                        chunk, password_hashes[index:end]
+                    )
+                ]
+            # sqlite has a single writer, requests writing wait for the chunk
+            deadline = time.monotonic() + SETTINGS.JOBS_CHUNK_SECONDS
+            start = index
+            while index < end and time.monotonic() < deadline:
+                savepoint = db.begin_nested()
+                try:
+                    admin.run_operation(db, chunk[index - start], hashes[index - start])
+                except HTTPException as e:
+                    savepoint.rollback()
+                    result["failed"] += 1
+                    if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                        result["errors"].append(
+                            {
+                                "index": index,
+                                "status_code": e.status_code,
+                                "detail": e.detail,
+                            }
+                        )
+                else:
+                    savepoint.commit()
+                    result["succeeded"] += 1
+                index += 1
+            db.commit()
+            context.report(index, total, result=result)
+    return result
+
+
+@job_queue.register(ARCHIVE_USERS_JOB)
+def run_archive_users(context: JobContext, deactivated_before: str) -> dict[str, Any]:
+    """Archive users deactivated before a time, a batch per report.
+
+    Args:
+        context (JobContext): progress of the job.
+        deactivated_before (str): ISO time, users deactivated, and unchanged
+            since, before it are archived.
+
+    Returns:
+        dict[str, Any]: count of archived users.
+    """
+    # batches already archived by an interrupted run are gone from user_account
+    previously = (context.result or {}).get("archived", 0)
+
+    def report(archived: int) -> None:
+        total = previously + archived
+        context.report(total, result={"archived": total})
+
+    with SessionLocal() as db:
+        archived = archive_deactivated(
+            db,
+            deactivated_before=datetime.fromisoformat(deactivated_before),
+            batch_size=SETTINGS.ARCHIVE_BATCH_SIZE,
+            duty_cycle=SETTINGS.ARCHIVE_DUTY_CYCLE,
+            report=report,
+        )
+    return {"archived": previously + archived}
+
+
+def get_job_or_404(job_id: str, current_user: UserModel) -> JobModel:
+    """Get a job the caller may see.
+
+    Args:
+        job_id (str): id of the job.
+        current_user (UserModel): logged in user.
+
+    Raises:
+        HTTPException: 404 Job not found.
+        HTTPException: 403 Access denied
+
+    Returns:
+        JobModel: selected job.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found!"
+        )
+    if not permission_registry.has_permissions(current_user, job.permission_mask):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+        )
+    return job
+
+
+@router.post(
+    "/user-batch", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED
+)
+async def submit_user_batch(
+    batch: UserBatchJobRequest,
+    current_user: Annotated[UserModel, Depends(auth.get_current_principal)],
+) -> JobResponse:
+    """Endpoint to run user operations in order, in a background job.
+
+    The job is only queued, poll ``GET /admin/jobs/{id}`` for its progress.
+    Operations run like in ``POST /admin/batch`` but are committed a chunk at a
+    time, the result counts succeeded and failed operations. Given passwords
+    are hashed before the job is queued, the request takes a hash per password.
+
+    Args:
+        batch (UserBatchJobRequest): operations.
+        current_user (Annotated[UserModel, Depends): logged in user
+
+    Raises:
+        HTTPException: 413 Too many operations.
+        HTTPException: 403 Access denied
+
+    Returns:
+        JobResponse: queued job.
+    """
+    if len(batch.operations) > SETTINGS.JOBS_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A job can't have more than {SETTINGS.JOBS_MAX_OPERATIONS}"
+            " operations!",
+        )
+    required = admin.require_operation_permissions(current_user, batch.operations)
+    # jobs are stored, and may wait for a worker, with hashes, not passwords
+    password_hashes = await run_in_threadpool(
+        partial(admin.hash_passwords, random_passwords=False), batch.operations
+    )
+    job = job_queue.submit(
+        USER_BATCH_JOB,
+        {
+            "operations": redact_passwords(batch, password_hashes),
+            "password_hashes": password_hashes,
+        },
+        created_by=current_user.username,
+        permission_mask=required,
+    )
+    return JobResponse.model_validate(job)
+
+
+@router.post(
+    "/archive-users", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED
+)
+async def submit_archive_users(
+    current_user: Annotated[
+        UserModel, Depends(auth.require_permission(PermissionNames.USER_DELETE))
+    ],
+    after_days: Annotated[float | None, Query(ge=0)] = None,
+) -> JobResponse:
+    """Endpoint to archive long-deactivated users in a background job.
+
+    Users deactivated, and unchanged since, for ``after_days`` days are moved to
+    the archive tables in throttled batches, poll ``GET /admin/jobs/{id}`` for
+    the count of archived users.
+
+    Args:
+        current_user (Annotated[UserModel, Depends): logged in user
+        after_days (float | None, optional): days a user has been deactivated.
+            Defaults to ``archive.after_days`` of the settings.
+
+    Raises:
+        HTTPException: 403 Access denied
+
+    Returns:
+        JobResponse: queued job.
+    """
+    days = SETTINGS.ARCHIVE_AFTER_DAYS if after_days is None else after_days
+    job = job_queue.submit(
+        ARCHIVE_USERS_JOB,
+        {"deactivated_before": (datetime.utcnow() - timedelta(days=days)).isoformat()},
+        created_by=current_user.username,
+        permission_mask=permission_mask(PermissionNames.USER_DELETE),
+    )
+    return JobResponse.model_validate(job)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def read_job(
+    job_id: str,
+    current_user: Annotated[UserModel, Depends(auth.get_current_principal)],
+) -> JobResponse:
+    """Endpoint to poll the status and progress of a job.
+
+    Args:
+        job_id (str): id of the job.
+        current_user (Annotated[UserModel, Depends): logged in user with the
+            permissions the job needed.
+
+    Raises:
+        HTTPException: 404 Job not found.
+        HTTPException: 403 Access denied
+
+    Returns:
+        JobResponse: job.
+    """
+    return JobResponse.model_validate(get_job_or_404(job_id, current_user))
+
+
+@router.delete("/{job_id}", response_model=JobResponse)
+async def cancel_job(
+    job_id: str,
+    current_user: Annotated[UserModel, Depends(auth.get_current_principal)],
+) -> JobResponse:
+    """Endpoint to cancel a job.
+
+    A queued job is cancelled at once, a running job stops after its current
+    chunk, what it committed so far is kept. Finished jobs are left unchanged.
+
+    Args:
+        job_id (str): id of the job.
+        current_user (Annotated[UserModel, Depends): logged in user with the
+            permissions the job needed.
+
+    Raises:
+        HTTPException: 404 Job not found.
+        HTTPException: 403 Access denied
+
+    Returns:
+        JobResponse: job.
+    """
+    get_job_or_404(job_id, current_user)
+    return JobResponse.model_validate(job_queue.cancel(job_id))
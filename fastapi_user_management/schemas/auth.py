@@ -1,4 +1,6 @@
 """Define schame for auth."""
+from datetime import datetime
+
 from pydantic import BaseModel, EmailStr
 
 
@@ -18,3 +20,15 @@ class TokenData(BaseModel):
     """Token data schema."""
 
     username: EmailStr | None = None
+
+
+class RevokedTokenCreate(BaseModel):
+    """Token to revoke.
+
+    Args:
+        jti: ``jti`` claim of the token.
+        expires_at: ``exp`` claim of the token.
+    """
+
+    jti: str
+    expires_at: datetime
@@ -0,0 +1,85 @@
+"""Define schemas of the admin batch endpoint."""
+from typing import Annotated, Literal
+
+from pydantic import BaseModel, EmailStr, Field
+
+from fastapi_user_management.schemas.user import BaseUserCreate, UserBase, UserUpdate
+
+
+class CreateUserOperation(BaseModel):
+    """Create a user, like ``POST /admin/user``."""
+
+    op: Literal["create"]
+    user: BaseUserCreate
+
+
+class UpdateUserOperation(BaseModel):
+    """Update a user, like ``PATCH /admin/user``."""
+
+    op: Literal["update"]
+    username: EmailStr
+    changes: UserUpdate
+
+
+class DeleteUserOperation(BaseModel):
+    """Delete a user, like ``DELETE /admin/user``."""
+
+    op: Literal["delete"]
+    username: EmailStr
+
+
+class RevokeSessionsOperation(BaseModel):
+    """Revoke the tokens of a user, like ``DELETE /admin/user-sessions``."""
+
+    op: Literal["revoke_sessions"]
+    username: EmailStr
+
+
+BatchOperation = Annotated[
+    CreateUserOperation
+    | UpdateUserOperation
+    | DeleteUserOperation
+    | RevokeSessionsOperation,
+    Field(discriminator="op"),
+]
+
+
+class BatchRequest(BaseModel):
+    """Operations run in order, in one transaction.
+
+    Args:
+        operations: operations, each one in its own savepoint.
+        atomic: roll every operation back when one fails, by default failed
+            operations are rolled back alone and the others are committed.
+    """
+
+    operations: list[BatchOperation] = Field(min_length=1)
+    atomic: bool = False
+
+
+class BatchResult(BaseModel):
+    """Outcome of an operation.
+
+    Args:
+        status_code: status code the single operation endpoint would answer.
+        detail: error message of a failed operation.
+        user: created or updated user.
+    """
+
+    status_code: int
+    detail: str | None = None
+    user: UserBase | None = None
+
+
+class BatchResponse(BaseModel):
+    """Outcome of every operation, in request order.
+
+    Args:
+        committed: whether the changes were committed, False when an atomic
+            batch failed.
+        results: one result per operation, operations after the failure of an
+            atomic batch aren't run and have no result.
+    """
+
+    committed: bool
+    results: list[BatchResult]
@@ -0,0 +1,91 @@
+"""Module to define diagnostics schemas."""
+
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class LoopLag(BaseModel):
+    """Event loop lag percentiles of the recent heartbeats."""
+
+    samples: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class LoopStall(BaseModel):
+    """Stall of the event loop with the blocking stack.
+
+    Args:
+        route: ``METHOD /path`` of the blocking request.
+        detected_at: time the watchdog caught the stall.
+        lag_ms: time the loop was blocked.
+        stack: stack of the blocking frame, innermost call last.
+    """
+
+    route: str | None
+    detected_at: datetime
+    lag_ms: float
+    stack: list[str]
+
+
+class PoolStatus(BaseModel):
+    """Database connection pool usage."""
+
+    pool: str
+    size: int | None
+    checked_in: int | None
+    checked_out: int | None
+    overflow: int | None
+    status: str
+
+
+class RevocationStatus(BaseModel):
+    """Bloom filter of revoked tokens and how often it avoided a query.
+
+    Args:
+        revoked_tokens: tokens in the filter.
+        error_rate: expected false positive rate of the filter.
+        checks: tokens checked since startup.
+        table_lookups: checks that queried the table.
+        false_positives: lookups that found the token not revoked.
+    """
+
+    revoked_tokens: int
+    error_rate: float
+    checks: int
+    table_lookups: int
+    false_positives: int
+
+
+class UsernameFilterStatus(BaseModel):
+    """Bloom filter of usernames and how often it avoided a query.
+
+    Args:
+        enabled: whether logins and creations check the filter.
+        usernames: usernames added to the filter.
+        error_rate: expected false positive rate of the filter.
+        checks: usernames checked since startup.
+        definite_misses: checks answered without a query.
+        false_positives: lookups of filter hits that found no user.
+    """
+
+    enabled: bool
+    usernames: int
+    error_rate: float
+    checks: int
+    definite_misses: int
+    false_positives: int
+
+
+class Diagnostics(BaseModel):
+    """Event loop, database pool, token revocation and username filter health."""
+
+    loop_monitor: bool
+    lag: LoopLag
+    stalls: list[LoopStall]
+    pool: PoolStatus
+    revocation: RevocationStatus
+    username_filter: UsernameFilterStatus
@@ -0,0 +1,58 @@
+"""Module to define DICOM schemas."""
+
+from pydantic import BaseModel, ConfigDict
+
+
+class DicomSeriesBase(BaseModel):
+    """Base Schema for DICOM series."""
+
+    patient_id: str | None = None
+    study_instance_uid: str | None = None
+    series_instance_uid: str | None = None
+    modality: str | None = None
+    body_part_examined: str | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DicomSeriesPage(BaseModel):
+    """Page of series with the cursor of the next page.
+
+    Args:
+        items: series of this page.
+        next_cursor: cursor of the next page, None on the last page.
+    """
+
+    items: list[DicomSeriesBase]
+    next_cursor: str | None = None
+
+
+class DicomSeriesCreate(DicomSeriesBase):
+    """Schema to store DICOM series extracted from uploaded file."""
+
+    series_instance_uid: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DicomIngestError(BaseModel):
+    """File that couldn't be ingested."""
+
+    file: str
+    detail: str
+
+
+class DicomBulkIngest(BaseModel):
+    """Result of a bulk ingest.
+
+    Args:
+        files: number of files found in the request.
+        instances: number of files whose header was stored.
+        series: number of distinct series created or updated.
+        errors: files that couldn't be ingested.
+    """
+
+    files: int
+    instances: int
+    series: int
+    errors: list[DicomIngestError]
@@ -0,0 +1,51 @@
+"""Define schemas of background jobs."""
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from fastapi_user_management.models.job import JobStatusValues
+from fastapi_user_management.schemas.batch import BatchOperation
+
+
+class UserBatchJobRequest(BaseModel):
+    """Operations run in order by a background job.
+
+    Args:
+        operations: operations, each one in its own savepoint. Failed
+            operations are rolled back alone, the others are committed in
+            chunks as the job makes progress.
+    """
+
+    operations: list[BatchOperation] = Field(min_length=1)
+
+
+class JobResponse(BaseModel):
+    """Status and progress of a background job.
+
+    Args:
+        id: id of the job, polled at ``GET /admin/jobs/{id}``.
+        kind: kind of job.
+        status: queued, running or how the job ended.
+        done: units of work done, ``total`` of them.
+        total: units of work of the job, None until its first report.
+        result: result of the job, the partial result while it runs.
+        error: error of a failed job.
+        cancel_requested: whether the job was asked to stop.
+        created_by: username of the submitter.
+    """
+
+    id: str
+    kind: str
+    status: JobStatusValues
+    done: int
+    total: int | None = None
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    cancel_requested: bool
+    created_by: str
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
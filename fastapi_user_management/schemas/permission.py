@@ -0,0 +1,13 @@
+"""Module to define Permission schemas."""
+
+from pydantic import BaseModel, ConfigDict
+
+from fastapi_user_management.models.permission import PermissionNames
+
+
+class PermissionBase(BaseModel):
+    """Base Schema for permission."""
+
+    name: PermissionNames
+
+    model_config = ConfigDict(from_attributes=True)
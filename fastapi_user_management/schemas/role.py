@@ -1,5 +1,5 @@
 """Module to define Role schemas."""
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from fastapi_user_management.models.role import RoleNames
 
@@ -8,12 +8,12 @@ class RoleBase(BaseModel):
     """Base Schema for role."""
 
     name: RoleNames | None = None
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class RoleCreate(RoleBase):
 
     name: RoleNames
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
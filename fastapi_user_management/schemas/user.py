@@ -1,8 +1,10 @@
 """Module to define User schemas."""
-from pydantic import BaseModel, EmailStr
 from datetime import datetime
+from typing import Any, Self
 
-from fastapi_user_management.models.user import UserStatusValues
+from pydantic import BaseModel, ConfigDict, EmailStr, TypeAdapter, model_validator
+
+from fastapi_user_management.models.user import UserModel, UserStatusValues
 from fastapi_user_management.schemas.role import RoleBase
 
 
@@ -13,21 +15,100 @@ class UserBase(BaseModel):
     username: EmailStr | None = None
     status: UserStatusValues | None = None
     roles: list[RoleBase] | None = None
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode="before")
+    @classmethod
+    def roles_from_mask(cls, data: Any) -> Any:
+        """Read roles of users from ``role_mask``, ``roles`` is never loaded.
+
+        Args:
+            data (Any): validated object.
+
+        Returns:
+            Any: fields of a user, other objects unchanged.
+        """
+        if not isinstance(data, UserModel):
+            return data
+        return cls._row_fields(data)
+
+    @classmethod
+    def _row_fields(cls, user: UserModel) -> dict[str, Any]:
+        """Fields of the schema read from a stored user."""
+        fields = {
+            name: getattr(user, name)
+            for name in cls.model_fields
+            if name != "roles" and hasattr(user, name)
+        }
+        roles = [RoleBase.model_construct(name=name) for name in user.role_names]
+        return {**fields, "roles": roles}
+
+    @classmethod
+    def from_row(cls, user: UserModel) -> Self:
+        """Schema of a stored user without validating its values again.
+
+        Rows were validated when they were written, checking the username of
+        every listed user dominates the cost of serializing listings.
+
+        Args:
+            user (UserModel): stored user.
+
+        Returns:
+            Self: schema of the user.
+        """
+        return cls.model_construct(**cls._row_fields(user))
+
+
+class UserPage(BaseModel):
+    """Page of users with the cursor of the next page.
+
+    Args:
+        items: users of this page, ordered by username.
+        next_cursor: cursor of the next page, None on the last page.
+    """
+
+    items: list[UserBase]
+    next_cursor: str | None = None
+
+
+class ArchivedUser(UserBase):
+    """Archived user, admin endpoints writing it restore it."""
+
+    archived_at: datetime
+
+
+class ArchivedUserPage(BaseModel):
+    """Page of archived users with the cursor of the next page.
+
+    Args:
+        items: archived users of this page, ordered by username.
+        next_cursor: cursor of the next page, None on the last page.
+    """
+
+    items: list[ArchivedUser]
+    next_cursor: str | None = None
 
 
 class UserProfile(UserBase):
+    """Schema of a user profile, the user with its contact and login details.
+
+    Args:
+        phone_number: phone number, None if the user has none.
+        last_login: time of the last login, None before the first one.
+    """
+
     phone_number: str | None = None
-    last_login: datetime | None= None
+    last_login: datetime | None = None
+
 
 class UserLogin(BaseModel):
     """Schema use for login request."""
 
     username: EmailStr
     password: str
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BaseUserCreate(UserBase):
@@ -37,8 +118,8 @@ class BaseUserCreate(UserBase):
     username: EmailStr
     password: str | None = None
     roles: list[RoleBase]
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserCreate(BaseUserCreate):
@@ -48,8 +129,8 @@ class UserCreate(BaseUserCreate):
     username: EmailStr
     password: str
     roles: list[RoleBase]
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserUpdate(UserBase):
@@ -57,3 +138,7 @@ class UserUpdate(UserBase):
 
     new_password: str
     new_password_confirm: str
+
+
+# validate ORM rows and serialize lists without a wrapper model, build once
+USER_LIST = TypeAdapter(list[UserBase])
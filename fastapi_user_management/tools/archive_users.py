@@ -0,0 +1,37 @@
+"""Archive users deactivated for ``archive.after_days`` days.
+
+Run from the directory of ``settings.yaml``, e.g. daily::
+
+    python -m fastapi_user_management.tools.archive_users [--days DAYS]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.archive import archive_deactivated
+from fastapi_user_management.core.database import SessionLocal
+
+
+def main() -> None:
+    """Archive long-deactivated users and report how many were archived."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--days",
+        type=float,
+        default=SETTINGS.ARCHIVE_AFTER_DAYS,
+        help="days a user has been deactivated before it's archived",
+    )
+    args = parser.parse_args()
+    with SessionLocal() as db:
+        archived = archive_deactivated(
+            db,
+            deactivated_before=datetime.utcnow() - timedelta(days=args.days),
+            batch_size=SETTINGS.ARCHIVE_BATCH_SIZE,
+            duty_cycle=SETTINGS.ARCHIVE_DUTY_CYCLE,
+        )
+    print(f"archived {archived} users")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
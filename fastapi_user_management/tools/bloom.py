@@ -0,0 +1,85 @@
+"""Bloom filter of strings."""
+
+import hashlib
+import math
+from collections.abc import Iterable
+
+
+class BloomFilter:
+    """Set of strings answering "definitely not a member" or "maybe a member".
+
+    Positions of a value are derived from one blake2b digest by double hashing,
+    so membership costs one hash whatever the number of hash functions.
+
+    Attributes:
+        size (int): number of bits.
+        hashes (int): bits set per value.
+        count (int): values added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        """Empty filter sized for ``capacity`` values.
+
+        Args:
+            capacity (int): values the filter is sized for.
+            error_rate (float, optional): false positive rate at capacity.
+                Defaults to 0.01.
+        """
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def from_values(
+        cls, values: Iterable[str], *, capacity: int, error_rate: float = 0.01
+    ) -> "BloomFilter":
+        """Filter holding values.
+
+        Args:
+            values (Iterable[str]): members.
+            capacity (int): values the filter is sized for.
+            error_rate (float, optional): false positive rate at capacity.
+                Defaults to 0.01.
+
+        Returns:
+            BloomFilter: filter.
+        """
+        bloom = cls(capacity, error_rate)
+        for value in values:
+            bloom.add(value)
+        return bloom
+
+    def _positions(self, value: str) -> Iterable[int]:
+        """Bits of a value."""
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value: str) -> None:
+        """Add a value.
+
+        Args:
+            value (str): value.
+        """
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: object) -> bool:
+        """Whether a value may have been added, False positives are possible."""
+        if not isinstance(value, str):
+            return False
+        return all(
+            self._bits[position >> 3] >> (position & 7) & 1
+            for position in self._positions(value)
+        )
+
+    @property
+    def error_rate(self) -> float:
+        """Expected false positive rate with the values added so far."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
@@ -0,0 +1,30 @@
+"""Build the user directory snapshot read by ``user_directory`` nodes.
+
+Run from the directory of ``settings.yaml``, e.g. from cron, more often than
+``user_directory.max_age``::
+
+    python -m fastapi_user_management.tools.build_user_directory
+
+The snapshot is written to ``user_directory.path`` unless ``--output`` is given,
+nodes reading it pick it up within ``user_directory.refresh_interval``.
+"""
+
+import argparse
+
+from fastapi_user_management.config import SETTINGS
+from fastapi_user_management.core.user_directory import build_snapshot
+
+
+def main() -> None:
+    """Snapshot the users of every shard and report how many were written."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output", default=SETTINGS.USER_DIRECTORY_PATH, help="snapshot file"
+    )
+    args = parser.parse_args()
+    count = build_snapshot(args.output)
+    print(f"wrote {count} users to {args.output}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
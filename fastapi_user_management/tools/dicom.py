@@ -0,0 +1,276 @@
+"""Streaming DICOM header parser.
+
+Only the data elements stored in ``dicom_series`` are decoded. Every other element
+is skipped without being buffered and parsing stops as soon as the dataset passes
+the last wanted tag (always before ``PixelData``), so files of any size are parsed
+with a small, constant memory footprint.
+"""
+
+import struct
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from enum import Enum, auto
+
+from fastapi_user_management.errors.exceptions import DicomParseError
+
+PREAMBLE_LENGTH = 128
+MAGIC = b"DICM"
+
+TRANSFER_SYNTAX_UID = 0x00020010
+MODALITY = 0x00080060
+PATIENT_ID = 0x00100020
+BODY_PART_EXAMINED = 0x00180015
+STUDY_INSTANCE_UID = 0x0020000D
+SERIES_INSTANCE_UID = 0x0020000E
+
+ITEM = 0xFFFEE000
+ITEM_DELIMITATION = 0xFFFEE00D
+SEQUENCE_DELIMITATION = 0xFFFEE0DD
+ITEM_TAGS = frozenset({ITEM, ITEM_DELIMITATION, SEQUENCE_DELIMITATION})
+UNDEFINED_LENGTH = 0xFFFFFFFF
+
+HEADER_TAGS: dict[int, str] = {
+    PATIENT_ID: "patient_id",
+    STUDY_INSTANCE_UID: "study_instance_uid",
+    SERIES_INSTANCE_UID: "series_instance_uid",
+    MODALITY: "modality",
+    BODY_PART_EXAMINED: "body_part_examined",
+}
+LAST_HEADER_TAG = max(HEADER_TAGS)
+
+IMPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2"
+EXPLICIT_VR_BIG_ENDIAN = "1.2.840.10008.1.2.2"
+DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2.1.99"
+
+# VRs encoded with 2 reserved bytes and a 32-bit length in explicit VR syntaxes.
+LONG_VRS = frozenset(
+    {b"OB", b"OD", b"OF", b"OL", b"OV", b"OW", b"SQ", b"SV", b"UC", b"UN", b"UR"}
+    | {b"UT", b"UV"}
+)
+# Decoded values are UIs, LOs and CSs, a few dozen bytes at most.
+MAX_VALUE_LENGTH = 1024
+
+
+@dataclass(frozen=True, slots=True)
+class DicomHeader:
+    """Header values of one DICOM instance stored in ``dicom_series``."""
+
+    patient_id: str | None = None
+    study_instance_uid: str | None = None
+    series_instance_uid: str | None = None
+    modality: str | None = None
+    body_part_examined: str | None = None
+
+
+class _State(Enum):
+    PREAMBLE = auto()
+    META = auto()
+    DATASET = auto()
+    DONE = auto()
+
+
+@dataclass(slots=True)
+class DicomHeaderParser:
+    """Incremental (push) parser extracting :class:`DicomHeader` values.
+
+    Feed the file in chunks of any size with :meth:`feed` until it returns ``True``
+    or the input is exhausted, then call :meth:`close` to get the header. Elements
+    that are not needed are skipped as they stream by, so only the current chunk
+    and the few bytes of a partially received element header are ever held.
+
+    Attributes:
+        bytes_consumed (int): number of input bytes parsed so far.
+    """
+
+    bytes_consumed: int = 0
+    _state: _State = _State.PREAMBLE
+    _buffer: bytearray = field(default_factory=bytearray)
+    _skip: int = 0
+    _depth: int = 0
+    _little_endian: bool = True
+    _explicit_vr: bool = True
+    _values: dict[str, str | None] = field(default_factory=dict)
+
+    @property
+    def done(self) -> bool:
+        """Whether every header value has been read."""
+        return self._state is _State.DONE
+
+    def feed(self, data: bytes | bytearray | memoryview) -> bool:
+        """Parse next chunk of the file.
+
+        Args:
+            data (bytes | bytearray | memoryview): next chunk of the file.
+
+        Raises:
+            DicomParseError: input is not a supported DICOM file.
+
+        Returns:
+            bool: True once the header is complete and no more input is needed.
+        """
+        if self._state is _State.DONE:
+            return True
+        view = memoryview(data)
+        if self._skip:
+            skipped = min(self._skip, len(view))
+            self._skip -= skipped
+            self.bytes_consumed += skipped
+            view = view[skipped:]
+        if view:
+            self._buffer += view
+            consumed = self._parse()
+            self.bytes_consumed += consumed
+            del self._buffer[:consumed]
+        return self._state is _State.DONE
+
+    def close(self) -> DicomHeader:
+        """Finish parsing, the input is either exhausted or not needed anymore.
+
+        Raises:
+            DicomParseError: input ended before the DICOM dataset.
+
+        Returns:
+            DicomHeader: extracted header values.
+        """
+        if self._state in (_State.PREAMBLE, _State.META):
+            raise DicomParseError("Unexpected end of DICOM file!")
+        self._state = _State.DONE
+        self._buffer.clear()
+        return DicomHeader(**self._values)
+
+    def _parse(self) -> int:
+        """Parse as many elements of the buffer as possible.
+
+        Returns:
+            int: number of bytes of the buffer that were consumed.
+        """
+        buffer = self._buffer
+        pos = 0
+        while self._state is not _State.DONE:
+            available = len(buffer) - pos
+            if self._skip:
+                skipped = min(self._skip, available)
+                self._skip -= skipped
+                pos += skipped
+                if self._skip:
+                    break
+                continue
+
+            if self._state is _State.PREAMBLE:
+                if available < PREAMBLE_LENGTH + len(MAGIC):
+                    break
+                if buffer[PREAMBLE_LENGTH : PREAMBLE_LENGTH + len(MAGIC)] != MAGIC:
+                    raise DicomParseError("Not a DICOM file, `DICM` prefix is missing!")
+                pos += PREAMBLE_LENGTH + len(MAGIC)
+                self._state = _State.META
+                continue
+
+            if available < 8:
+                break
+            if self._state is _State.META:
+                # File meta information is always explicit VR little endian.
+                (group,) = struct.unpack_from("<H", buffer, pos)
+                if group != 0x0002:
+                    self._state = _State.DATASET
+                    continue
+                little_endian, explicit_vr = True, True
+            else:
+                little_endian, explicit_vr = self._little_endian, self._explicit_vr
+
+            order = "<" if little_endian else ">"
+            group, element = struct.unpack_from(f"{order}HH", buffer, pos)
+            tag = group << 16 | element
+            header_length = 8
+            if not explicit_vr or tag in ITEM_TAGS:
+                (length,) = struct.unpack_from(f"{order}I", buffer, pos + 4)
+            elif bytes(buffer[pos + 4 : pos + 6]) in LONG_VRS:
+                header_length = 12
+                if available < header_length:
+                    break
+                (length,) = struct.unpack_from(f"{order}I", buffer, pos + 8)
+            else:
+                (length,) = struct.unpack_from(f"{order}H", buffer, pos + 6)
+
+            if tag in (ITEM_DELIMITATION, SEQUENCE_DELIMITATION):
+                self._depth = max(self._depth - 1, 0)
+                pos += header_length
+                continue
+            top_level = self._depth == 0 and self._state is _State.DATASET
+            if top_level and tag > LAST_HEADER_TAG:
+                # Top level tags are sorted, nothing left to read before PixelData.
+                self._state = _State.DONE
+                break
+            if length == UNDEFINED_LENGTH:
+                # Sequence or item of undefined length, walk through its content.
+                self._depth += 1
+                pos += header_length
+                continue
+
+            if top_level:
+                wanted = tag in HEADER_TAGS
+            else:
+                wanted = self._state is _State.META and tag == TRANSFER_SYNTAX_UID
+
+            if not wanted:
+                pos += header_length
+                self._skip = length
+                continue
+            if length > MAX_VALUE_LENGTH:
+                raise DicomParseError(f"Value of tag {tag:08X} is too long!")
+            if available < header_length + length:
+                break
+            start = pos + header_length
+            value = _decode(buffer[start : start + length])
+            pos = start + length
+            if self._state is _State.META:
+                self._set_transfer_syntax(value)
+            else:
+                self._values[HEADER_TAGS[tag]] = value
+                if len(self._values) == len(HEADER_TAGS):
+                    self._state = _State.DONE
+        return pos
+
+    def _set_transfer_syntax(self, uid: str | None) -> None:
+        """Select dataset encoding from its transfer syntax.
+
+        Args:
+            uid (str | None): transfer syntax UID.
+
+        Raises:
+            DicomParseError: transfer syntax is not supported.
+        """
+        if uid == DEFLATED_EXPLICIT_VR_LITTLE_ENDIAN:
+            raise DicomParseError("Deflated transfer syntax is not supported!")
+        self._explicit_vr = uid != IMPLICIT_VR_LITTLE_ENDIAN
+        self._little_endian = uid != EXPLICIT_VR_BIG_ENDIAN
+
+
+def _decode(raw: bytearray) -> str | None:
+    """Decode a string value, stripping DICOM padding.
+
+    Args:
+        raw (bytearray): raw value bytes.
+
+    Returns:
+        str | None: decoded value or None for empty values.
+    """
+    value = bytes(raw).strip(b"\x00 ").decode("utf-8", errors="replace")
+    return value or None
+
+
+def parse_dicom_header(chunks: Iterable[bytes]) -> DicomHeader:
+    """Parse DICOM header from an iterable of chunks, e.g. an open file.
+
+    Iteration stops as soon as the header is complete.
+
+    Args:
+        chunks (Iterable[bytes]): file content.
+
+    Returns:
+        DicomHeader: extracted header values.
+    """
+    parser = DicomHeaderParser()
+    for chunk in chunks:
+        if parser.feed(chunk):
+            break
+    return parser.close()
@@ -0,0 +1,642 @@
+"""Bulk DICOM ingest from zip archives and multipart bodies.
+
+Request bodies are walked as streams, nothing is spooled to disk: zip archives are
+read entry by entry from their local file headers and multipart bodies part by
+part. Only the first bytes (the *head*) of every instance are kept, extracting the
+header from them is fanned out to a process pool in batches.
+"""
+
+import asyncio
+import multiprocessing
+import struct
+import zlib
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from fastapi_user_management.errors.exceptions import DicomParseError
+from fastapi_user_management.tools.dicom import DicomHeader, DicomHeaderParser
+
+LOCAL_FILE_HEADER = b"PK\x03\x04"
+DATA_DESCRIPTOR = b"PK\x07\x08"
+LOCAL_FILE_HEADER_STRUCT = struct.Struct("<4sHHHHHIIIHH")
+ZIP64_EXTRA_ID = 0x0001
+ZIP64_LIMIT = 0xFFFFFFFF
+
+FLAG_ENCRYPTED = 0x0001
+FLAG_DATA_DESCRIPTOR = 0x0008
+FLAG_UTF8 = 0x0800
+
+STORED = 0
+DEFLATED = 8
+
+INFLATE_CHUNK_SIZE = 64 * 1024
+
+ZIP_CONTENT_TYPES = frozenset({"application/zip", "application/x-zip-compressed"})
+
+
+@dataclass(frozen=True, slots=True)
+class DicomInstance:
+    """Head of one DICOM instance, sent to a worker process.
+
+    Attributes:
+        name (str): file name, archive members are prefixed by the archive name.
+        head (bytes): first bytes of the file, raw deflate data if ``compressed``.
+        compressed (bool): head is a raw deflate stream.
+        truncated (bool): file is longer than its head.
+    """
+
+    name: str
+    head: bytes
+    compressed: bool = False
+    truncated: bool = False
+
+
+def extract_headers(instances: list[DicomInstance]) -> list[DicomHeader | str]:
+    """Extract headers of a batch of instances, runs in a worker process.
+
+    Args:
+        instances (list[DicomInstance]): heads of DICOM instances.
+
+    Returns:
+        list[DicomHeader | str]: header or error message for every instance.
+    """
+    results: list[DicomHeader | str] = []
+    for instance in instances:
+        parser = DicomHeaderParser()
+        try:
+            if instance.compressed:
+                inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+                data = instance.head
+                while data and not parser.done and not inflater.eof:
+                    parser.feed(inflater.decompress(data, INFLATE_CHUNK_SIZE))
+                    data = inflater.unconsumed_tail
+            else:
+                parser.feed(instance.head)
+            if not parser.done and instance.truncated:
+                raise DicomParseError(
+                    f"Header is larger than {len(instance.head)} bytes!"
+                )
+            results.append(parser.close())
+        except DicomParseError as e:
+            results.append(e.message)
+        except zlib.error as e:
+            results.append(f"Corrupted zip entry: {e}")
+    return results
+
+
+InstanceCallback = Callable[[DicomInstance], None]
+ErrorCallback = Callable[[str, str], None]
+
+
+@dataclass(slots=True)
+class _ZipEntry:
+    name: str
+    method: int
+    flags: int
+    remaining: int
+    zip64: bool
+    inflater: "zlib._Decompress | None" = None
+    consumed: int = 0
+    head: bytearray = field(default_factory=bytearray)
+
+
+class ZipStreamReader:
+    """Incremental (push) reader of a zip archive.
+
+    Entries are found from their local file headers, so the central directory at
+    the end of the archive is never needed. Only the first ``head_bytes`` of every
+    entry are kept. Entries written with a data descriptor and no sizes in their
+    local header are inflated on the fly to find where they end.
+    """
+
+    def __init__(
+        self,
+        archive: str,
+        *,
+        on_instance: InstanceCallback,
+        on_error: ErrorCallback,
+        head_bytes: int,
+    ) -> None:
+        """Initiate reader.
+
+        Args:
+            archive (str): archive name, prefix of member names.
+            on_instance (InstanceCallback): called with the head of every member.
+            on_error (ErrorCallback): called with name and reason of skipped members.
+            head_bytes (int): number of bytes kept from the start of every member.
+        """
+        self.archive = archive
+        self.on_instance = on_instance
+        self.on_error = on_error
+        self.head_bytes = head_bytes
+        self._buffer = bytearray()
+        self._entry: _ZipEntry | None = None
+        self._descriptor = False
+        self._descriptor_zip64 = False
+        self._done = False
+
+    def feed(self, data: bytes | bytearray | memoryview) -> None:
+        """Parse next chunk of the archive.
+
+        Args:
+            data (bytes | bytearray | memoryview): next chunk of the archive.
+
+        Raises:
+            DicomParseError: input is not a zip archive or can't be streamed.
+        """
+        if self._done:
+            return
+        self._buffer += data
+        consumed = self._parse()
+        del self._buffer[:consumed]
+
+    def close(self) -> None:
+        """Finish reading, the input is exhausted.
+
+        Raises:
+            DicomParseError: archive ended in the middle of an entry.
+        """
+        if not self._done and (self._entry is not None or self._buffer):
+            raise DicomParseError(f"Unexpected end of zip archive {self.archive}!")
+        self._done = True
+
+    def _parse(self) -> int:
+        """Parse as many entries of the buffer as possible.
+
+        Returns:
+            int: number of bytes of the buffer that were consumed.
+        """
+        buffer = self._buffer
+        pos = 0
+        while not self._done:
+            available = len(buffer) - pos
+            if self._entry is not None:
+                if not available:
+                    break
+                pos += self._read_entry(pos, available)
+                continue
+            if self._descriptor:
+                if available < 4:
+                    break
+                size = 20 if self._descriptor_zip64 else 12
+                if buffer[pos : pos + 4] == DATA_DESCRIPTOR:
+                    size += 4
+                if available < size:
+                    break
+                pos += size
+                self._descriptor = False
+                continue
+
+            if available < 4:
+                break
+            signature = bytes(buffer[pos : pos + 4])
+            if signature != LOCAL_FILE_HEADER:
+                if signature[:2] != b"PK":
+                    raise DicomParseError(f"{self.archive} is not a zip archive!")
+                # Central directory, every entry has been read.
+                self._done = True
+                pos = len(buffer)
+                break
+            if available < LOCAL_FILE_HEADER_STRUCT.size:
+                break
+            (
+                _,
+                _,
+                flags,
+                method,
+                _,
+                _,
+                _,
+                compressed_size,
+                uncompressed_size,
+                name_length,
+                extra_length,
+            ) = LOCAL_FILE_HEADER_STRUCT.unpack_from(buffer, pos)
+            start = pos + LOCAL_FILE_HEADER_STRUCT.size
+            if available < LOCAL_FILE_HEADER_STRUCT.size + name_length + extra_length:
+                break
+            name = bytes(buffer[start : start + name_length]).decode(
+                "utf-8" if flags & FLAG_UTF8 else "cp437"
+            )
+            extra = buffer[start + name_length : start + name_length + extra_length]
+            zip64_sizes = _zip64_sizes(extra)
+            if zip64_sizes is not None and compressed_size == ZIP64_LIMIT:
+                compressed_size = zip64_sizes[
+                    1 if uncompressed_size == ZIP64_LIMIT else 0
+                ]
+            pos = start + name_length + extra_length
+            self._entry = _ZipEntry(
+                name=f"{self.archive}/{name}",
+                method=method,
+                flags=flags,
+                remaining=compressed_size,
+                zip64=zip64_sizes is not None,
+            )
+            if flags & FLAG_DATA_DESCRIPTOR and not compressed_size:
+                if method != DEFLATED or flags & FLAG_ENCRYPTED:
+                    raise DicomParseError(
+                        f"Can't stream {self._entry.name}, its size is unknown!"
+                    )
+                self._entry.inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            elif not compressed_size:
+                self._finish_entry()
+        return pos
+
+    def _read_entry(self, pos: int, available: int) -> int:
+        """Read data of the current entry from the buffer.
+
+        Args:
+            pos (int): position of entry data in the buffer.
+            available (int): number of bytes available from ``pos``.
+
+        Returns:
+            int: number of bytes of the buffer that belong to the entry.
+        """
+        entry = self._entry
+        assert entry is not None
+        size = (
+            available if entry.inflater is not None else min(entry.remaining, available)
+        )
+        room = self.head_bytes - len(entry.head)
+        if room > 0:
+            entry.head += self._buffer[pos : pos + min(room, size)]
+        if entry.inflater is not None:
+            data = self._buffer[pos : pos + size]
+            while data and not entry.inflater.eof:
+                entry.inflater.decompress(data, INFLATE_CHUNK_SIZE)
+                data = entry.inflater.unconsumed_tail
+            if entry.inflater.eof:
+                size -= len(entry.inflater.unused_data)
+                entry.consumed += size
+                self._finish_entry()
+            else:
+                entry.consumed += size
+            return size
+        entry.remaining -= size
+        entry.consumed += size
+        if not entry.remaining:
+            self._finish_entry()
+        return size
+
+    def _finish_entry(self) -> None:
+        """Hand over the head of the entry that was just read."""
+        entry = self._entry
+        assert entry is not None
+        self._entry = None
+        self._descriptor = bool(entry.flags & FLAG_DATA_DESCRIPTOR)
+        self._descriptor_zip64 = entry.zip64
+        if entry.name.endswith("/"):
+            return
+        if entry.flags & FLAG_ENCRYPTED:
+            self.on_error(entry.name, "Encrypted zip entries are not supported!")
+        elif entry.method not in (STORED, DEFLATED):
+            self.on_error(entry.name, "Unsupported zip compression method!")
+        else:
+            self.on_instance(
+                DicomInstance(
+                    name=entry.name,
+                    head=bytes(entry.head[: entry.consumed]),
+                    compressed=entry.method == DEFLATED,
+                    truncated=entry.consumed > len(entry.head),
+                )
+            )
+
+
+def _zip64_sizes(extra: bytearray) -> tuple[int, ...] | None:
+    """Read sizes of the zip64 extended information extra field.
+
+    Args:
+        extra (bytearray): extra field of a local file header.
+
+    Returns:
+        tuple[int, ...] | None: sizes stored in the field, if present.
+    """
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<HH", extra, pos)
+        if header_id == ZIP64_EXTRA_ID:
+            count = min(size, 16) // 8
+            return struct.unpack_from(f"<{count}Q", extra, pos + 4)
+        pos += 4 + size
+    return None
+
+
+class _HeadReader:
+    """Keep the head of a plain DICOM file received as multipart part."""
+
+    def __init__(self, name: str, *, on_instance: InstanceCallback, head_bytes: int):
+        self.name = name
+        self.on_instance = on_instance
+        self.head_bytes = head_bytes
+        self._head = bytearray()
+        self._size = 0
+
+    def feed(self, data: bytes | bytearray | memoryview) -> None:
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+        self._size += len(data)
+
+    def close(self) -> None:
+        self.on_instance(
+            DicomInstance(
+                name=self.name,
+                head=bytes(self._head),
+                truncated=self._size > len(self._head),
+            )
+        )
+
+
+class _Discard:
+    """Ignore a multipart part, e.g. a form field."""
+
+    def feed(self, data: bytes | bytearray | memoryview) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MultipartStreamReader:
+    """Incremental (push) reader of a ``multipart/form-data`` body.
+
+    Every file part is read either as a zip archive (``.zip`` file name or zip
+    content type) or as a single DICOM file.
+    """
+
+    def __init__(
+        self,
+        content_type: str,
+        *,
+        on_instance: InstanceCallback,
+        on_error: ErrorCallback,
+        head_bytes: int,
+    ) -> None:
+        """Initiate reader.
+
+        Args:
+            content_type (str): ``Content-Type`` header of the body.
+            on_instance (InstanceCallback): called with the head of every file.
+            on_error (ErrorCallback): called with name and reason of skipped files.
+            head_bytes (int): number of bytes kept from the start of every file.
+
+        Raises:
+            DicomParseError: multipart boundary is missing.
+        """
+        _, params = parse_options_header(content_type)
+        if b"boundary" not in params:
+            raise DicomParseError("Missing boundary in multipart body!")
+        self.on_instance = on_instance
+        self.on_error = on_error
+        self.head_bytes = head_bytes
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: dict[bytes, bytes] = {}
+        self._part: ZipStreamReader | _HeadReader | _Discard = _Discard()
+        self._parser = MultipartParser(
+            params[b"boundary"],
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+            },
+        )
+
+    def feed(self, data: bytes) -> None:
+        """Parse next chunk of the body.
+
+        Args:
+            data (bytes): next chunk of the body.
+
+        Raises:
+            DicomParseError: body is not a valid multipart body.
+        """
+        try:
+            self._parser.write(data)
+        except MultipartParseError as e:
+            raise DicomParseError(f"Invalid multipart body: {e}") from e
+
+    def close(self) -> None:
+        """Finish reading, the input is exhausted."""
+        self._parser.finalize()
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(
+            self._headers.get(b"content-disposition", b"")
+        )
+        if b"filename" not in options:
+            self._part = _Discard()
+            return
+        name = options[b"filename"].decode("utf-8", errors="replace")
+        content_type, _ = parse_options_header(self._headers.get(b"content-type", b""))
+        if name.lower().endswith(".zip") or content_type.decode() in ZIP_CONTENT_TYPES:
+            self._part = ZipStreamReader(
+                name,
+                on_instance=self.on_instance,
+                on_error=self.on_error,
+                head_bytes=self.head_bytes,
+            )
+        else:
+            self._part = _HeadReader(
+                name, on_instance=self.on_instance, head_bytes=self.head_bytes
+            )
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        try:
+            self._part.feed(memoryview(data)[start:end])
+        except DicomParseError as e:
+            self._fail(e)
+
+    def _on_part_end(self) -> None:
+        try:
+            self._part.close()
+        except DicomParseError as e:
+            self._fail(e)
+        self._part = _Discard()
+
+    def _fail(self, error: DicomParseError) -> None:
+        """Report a broken archive and ignore the rest of it."""
+        if isinstance(self._part, ZipStreamReader):
+            self.on_error(self._part.archive, error.message)
+        self._part = _Discard()
+
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def get_executor(max_workers: int) -> ProcessPoolExecutor | None:
+    """Get process pool shared by ingest requests, created on first use.
+
+    Args:
+        max_workers (int): number of worker processes, 0 extracts in-process.
+
+    Returns:
+        ProcessPoolExecutor | None: shared pool, None when disabled.
+    """
+    global _executor
+    if max_workers <= 0:
+        return None
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop worker processes of the shared pool."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+class DicomIngest:
+    """Extract headers of every DICOM instance of a streamed request body.
+
+    Feed the body with :meth:`feed`, awaiting :meth:`drain` between chunks to
+    bound the number of batches in flight, then await :meth:`close`. Headers are
+    de-duplicated by SeriesInstanceUID in :attr:`series`.
+
+    Attributes:
+        series (dict[str, DicomHeader]): last header seen for every series.
+        errors (list[tuple[str, str]]): name and reason of every failed file.
+        files (int): number of files found.
+        instances (int): number of files whose header was extracted.
+    """
+
+    def __init__(
+        self,
+        content_type: str,
+        *,
+        executor: ProcessPoolExecutor | None,
+        batch_size: int,
+        head_bytes: int,
+    ) -> None:
+        """Initiate ingest.
+
+        Args:
+            content_type (str): ``Content-Type`` header of the body.
+            executor (ProcessPoolExecutor | None): pool extracting headers, None
+                extracts them in-process.
+            batch_size (int): number of instances sent to a worker at once.
+            head_bytes (int): number of bytes kept from the start of every file.
+
+        Raises:
+            DicomParseError: body is neither multipart nor a zip archive.
+        """
+        self.executor = executor
+        self.batch_size = batch_size
+        self.series: dict[str, DicomHeader] = {}
+        self.errors: list[tuple[str, str]] = []
+        self.files = 0
+        self.instances = 0
+        self._batch: list[DicomInstance] = []
+        self._pending: list[tuple[list[DicomInstance], Future[list]]] = []
+        media_type = content_type.split(";", 1)[0].strip().lower()
+        self._reader: MultipartStreamReader | ZipStreamReader
+        if media_type == "multipart/form-data":
+            self._reader = MultipartStreamReader(
+                content_type,
+                on_instance=self._add,
+                on_error=self._error,
+                head_bytes=head_bytes,
+            )
+        elif media_type in ZIP_CONTENT_TYPES:
+            self._reader = ZipStreamReader(
+                "body",
+                on_instance=self._add,
+                on_error=self._error,
+                head_bytes=head_bytes,
+            )
+        else:
+            raise DicomParseError(
+                "Expected multipart/form-data or application/zip body!"
+            )
+
+    def feed(self, data: bytes) -> None:
+        """Read next chunk of the body.
+
+        Args:
+            data (bytes): next chunk of the body.
+
+        Raises:
+            DicomParseError: body is corrupted.
+        """
+        self._reader.feed(data)
+
+    async def drain(self, max_pending: int) -> None:
+        """Collect finished batches, wait while too many batches are in flight.
+
+        Args:
+            max_pending (int): number of batches allowed in flight.
+        """
+        while self._pending and (
+            len(self._pending) > max_pending or self._pending[0][1].done()
+        ):
+            instances, future = self._pending.pop(0)
+            self._collect(instances, await asyncio.wrap_future(future))
+
+    async def close(self) -> None:
+        """Extract remaining headers once the body is exhausted.
+
+        Raises:
+            DicomParseError: body ended unexpectedly.
+        """
+        self._reader.close()
+        self._submit()
+        await self.drain(0)
+
+    def _add(self, instance: DicomInstance) -> None:
+        self.files += 1
+        self._batch.append(instance)
+        if len(self._batch) >= self.batch_size:
+            self._submit()
+
+    def _error(self, name: str, detail: str) -> None:
+        self.files += 1
+        self.errors.append((name, detail))
+
+    def _submit(self) -> None:
+        """Send current batch to a worker, or extract it right away."""
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        if self.executor is None:
+            self._collect(batch, extract_headers(batch))
+        else:
+            self._pending.append((batch, self.executor.submit(extract_headers, batch)))
+
+    def _collect(
+        self, instances: list[DicomInstance], results: list[DicomHeader | str]
+    ) -> None:
+        for instance, result in zip(instances, results, strict=True):
+            if isinstance(result, str):
+                self.errors.append((instance.name, result))
+            elif result.series_instance_uid is None:
+                self.errors.append((instance.name, "SeriesInstanceUID is missing!"))
+            else:
+                self.instances += 1
+                self.series[result.series_instance_uid] = result
@@ -1,8 +1,22 @@
-"""Encrypt password."""
+"""Encrypt password.
+
+Every password is hashed with bcrypt by ``pwd_context``, its work factor
+(``rounds``) is set by ``configure``, at startup from ``calibrate``: the
+largest work factor whose hash fits a latency budget on this machine. Hashes
+made with fewer rounds than configured need an update, they are hashed again
+the next time their user logs in.
+"""
+import time
+
 from passlib.context import CryptContext
 
+from fastapi_user_management.config import SETTINGS
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt doesn't accept fewer rounds
+BCRYPT_MIN_ROUNDS = 4
+
 
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
@@ -10,3 +24,92 @@ def verify_password(plain_password: str, hashed_password: str):
 
 def get_password_hash(password: str):
     return pwd_context.hash(password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Check whether a hash was made with settings older than the configured ones.
+
+    Args:
+        hashed_password (str): password hash.
+
+    Returns:
+        bool: True if the password should be hashed again.
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
+def measure_hash(rounds: int, samples: int = 3) -> float:
+    """Measure the time of one bcrypt hash.
+
+    Args:
+        rounds (int): work factor.
+        samples (int, optional): hashes timed, the fastest is kept.
+            Defaults to 3.
+
+    Returns:
+        float: seconds of the fastest hash.
+    """
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    fastest = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash("calibration")
+        fastest = min(fastest, time.perf_counter() - start)
+    return fastest
+
+
+def calibrate(target_seconds: float, min_rounds: int, max_rounds: int) -> int:
+    """Pick the largest work factor whose hash takes at most ``target_seconds``.
+
+    A hash is timed at ``min_rounds``, every further round doubles its cost.
+
+    Args:
+        target_seconds (float): latency budget of a hash.
+        min_rounds (int): work factor used even when it exceeds the budget.
+        max_rounds (int): largest work factor.
+
+    Returns:
+        int: work factor.
+    """
+    min_rounds = max(min_rounds, BCRYPT_MIN_ROUNDS)
+    seconds = measure_hash(min_rounds)
+    rounds = min_rounds
+    while rounds < max_rounds and seconds * 2 <= target_seconds:
+        rounds += 1
+        seconds *= 2
+    return rounds
+
+
+def configure(rounds: int, max_rounds: int) -> None:
+    """Hash new passwords with a work factor.
+
+    Hashes with fewer rounds, or more than ``max_rounds``, need an update.
+    Stronger hashes up to ``max_rounds`` are kept, so processes calibrated on
+    different machines don't hash the same passwords back and forth.
+
+    Args:
+        rounds (int): work factor of new hashes.
+        max_rounds (int): largest work factor of kept hashes.
+    """
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=max(rounds, max_rounds),
+    )
+
+
+def configure_from_settings() -> int:
+    """Configure the work factor from the ``password_hashing`` settings.
+
+    Returns:
+        int: work factor of new hashes.
+    """
+    rounds = SETTINGS.PASSWORD_HASHING_ROUNDS
+    if SETTINGS.PASSWORD_HASHING_CALIBRATE:
+        rounds = calibrate(
+            SETTINGS.PASSWORD_HASHING_TARGET_SECONDS,
+            SETTINGS.PASSWORD_HASHING_MIN_ROUNDS,
+            SETTINGS.PASSWORD_HASHING_MAX_ROUNDS,
+        )
+    configure(rounds, SETTINGS.PASSWORD_HASHING_MAX_ROUNDS)
+    return rounds
@@ -0,0 +1,38 @@
+"""Weak entity tags for conditional GET requests."""
+
+import hashlib
+from typing import Any
+
+
+def weak_etag(*parts: Any) -> str:
+    """Weak ETag of a representation identified by ``parts``.
+
+    Args:
+        *parts (Any): values that change whenever the representation does,
+            e.g. row versions and request parameters.
+
+    Returns:
+        str: ``W/"<digest>"`` header value.
+    """
+    raw = "\x1f".join(map(str, parts)).encode()
+    return f'W/"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check ``If-None-Match`` against the current ETag (weak comparison).
+
+    Args:
+        if_none_match (str | None): header value, a list of tags or ``*``.
+        etag (str): current ETag.
+
+    Returns:
+        bool: True when the client's copy is current, answer 304.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
@@ -0,0 +1,43 @@
+"""Opaque cursors for keyset pagination."""
+
+import base64
+import binascii
+import json
+from typing import Any
+
+from fastapi_user_management.errors.exceptions import InvalidCursorError
+
+
+def encode_cursor(*key: Any) -> str:
+    """Encode sort key of the last row of a page.
+
+    Args:
+        *key (Any): JSON serializable sort key values.
+
+    Returns:
+        str: url safe cursor.
+    """
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """Decode a cursor produced by :func:`encode_cursor`.
+
+    Args:
+        cursor (str): cursor received from client.
+
+    Raises:
+        InvalidCursorError: cursor is malformed.
+
+    Returns:
+        list[Any]: sort key values.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursorError from e
+    if not isinstance(key, list):
+        raise InvalidCursorError
+    return key
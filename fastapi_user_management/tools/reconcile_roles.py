@@ -0,0 +1,20 @@
+"""Reconcile denormalized ``user_account.role_mask`` with ``user_role``.
+
+Run from the directory of ``settings.yaml``::
+
+    python -m fastapi_user_management.tools.reconcile_roles
+"""
+
+from fastapi_user_management import crud
+from fastapi_user_management.core.database import SessionLocal
+
+
+def main() -> None:
+    """Repair role masks of every user and report how many were wrong."""
+    with SessionLocal() as db:
+        fixed = crud.user.reconcile_role_masks(db)
+    print(f"reconciled role_mask of {fixed} users")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
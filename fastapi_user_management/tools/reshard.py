@@ -0,0 +1,201 @@
+"""Copy users from one shard layout to another.
+
+Run from the directory of ``settings.yaml``::
+
+    python -m fastapi_user_management.tools.reshard \
+        --source sqlite:///db.sqlite3 \
+        --target sqlite:///shard0.sqlite3 sqlite:///shard1.sqlite3
+
+Users of every source database are written to the target shard of their
+username (see :func:`~fastapi_user_management.core.sharding.shard_for`), with
+their roles. Roles and permissions are copied from the first source to every
+target, other tables stay where they are: copy the first source to the first
+target when other tables must move along. Targets must not have users yet; once
+the copy is done, point ``database.shards`` of ``settings.yaml`` at them.
+Archived users aren't copied.
+"""
+
+import argparse
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+
+from sqlalchemy import Connection, Engine, create_engine, func, select
+
+from fastapi_user_management.core.sharding import shard_for
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.permission import PermissionModel
+from fastapi_user_management.models.role import RoleModel
+from fastapi_user_management.models.role_permission import RolePermissionModel
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.models.user_role import UserRoleModel
+
+BATCH_SIZE = 1000
+REFERENCE_TABLES = (
+    RoleModel.__table__,
+    PermissionModel.__table__,
+    RolePermissionModel.__table__,
+)
+users = UserModel.__table__
+user_roles = UserRoleModel.__table__
+roles = RoleModel.__table__
+
+
+def copy_reference_data(source: Connection, target: Connection) -> None:
+    """Copy roles and permissions to a target that doesn't have any.
+
+    Args:
+        source (Connection): first source database.
+        target (Connection): target shard.
+    """
+    for table in REFERENCE_TABLES:
+        if target.scalar(select(func.count()).select_from(table)):
+            continue
+        rows = [dict(row._mapping) for row in source.execute(select(table))]
+        if rows:
+            target.execute(table.insert(), rows)
+
+
+def read_batches(source: Connection, batch_size: int) -> Iterator[list[dict]]:
+    """Users of a source database in id order, with their role names.
+
+    Args:
+        source (Connection): source database.
+        batch_size (int): users per batch.
+
+    Yields:
+        Iterator[list[dict]]: ``user_account`` rows without ``id``, role names
+            in ``"roles"``.
+    """
+    last_id = 0
+    while True:
+        rows = (
+            source.execute(
+                select(users)
+                .where(users.c.id > last_id)
+                .order_by(users.c.id)
+                .limit(batch_size)
+            )
+            .mappings()
+            .all()
+        )
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        role_names: dict[int, list[str]] = defaultdict(list)
+        for user_id, name in source.execute(
+            select(user_roles.c.user_id, roles.c.name)
+            .join_from(user_roles, roles)
+            .where(user_roles.c.user_id.in_([row["id"] for row in rows]))
+        ):
+            role_names[user_id].append(name)
+        yield [
+            {
+                **{key: value for key, value in row.items() if key != "id"},
+                "roles": role_names[row["id"]],
+            }
+            for row in rows
+        ]
+
+
+def write_batch(target: Connection, batch: list[dict]) -> None:
+    """Insert users with their role names into a target shard.
+
+    Args:
+        target (Connection): target shard.
+        batch (list[dict]): ``user_account`` rows without ``id``, role names in
+            ``"roles"``.
+    """
+    role_ids = dict(target.execute(select(roles.c.name, roles.c.id)).tuples().all())
+    target.execute(
+        users.insert(), [{k: v for k, v in u.items() if k != "roles"} for u in batch]
+    )
+    user_ids = dict(
+        target.execute(
+            select(users.c.username, users.c.id).where(
+                users.c.username.in_([user["username"] for user in batch])
+            )
+        )
+        .tuples()
+        .all()
+    )
+    rows = [
+        {"user_id": user_ids[user["username"]], "role_id": role_ids[name]}
+        for user in batch
+        for name in user["roles"]
+    ]
+    if rows:
+        target.execute(user_roles.insert(), rows)
+
+
+def reshard(
+    sources: Sequence[Engine], targets: Sequence[Engine], batch_size: int = BATCH_SIZE
+) -> list[int]:
+    """Copy the users of every source to their target shard.
+
+    Args:
+        sources (Sequence[Engine]): databases users are read from.
+        targets (Sequence[Engine]): target shards in ``database.shards`` order.
+        batch_size (int, optional): users per insert. Defaults to 1000.
+
+    Raises:
+        ValueError: a target already has users.
+
+    Returns:
+        list[int]: number of users written to every target.
+    """
+    for target_engine in targets:
+        Base.metadata.create_all(target_engine)
+    counts = [0] * len(targets)
+    connections = [target.connect() for target in targets]
+    try:
+        for connection in connections:
+            if connection.scalar(select(func.count()).select_from(users)):
+                raise ValueError(f"target {connection.engine.url} already has users")
+        with sources[0].connect() as first:
+            for connection in connections:
+                copy_reference_data(first, connection)
+        buffers: list[list[dict]] = [[] for _ in targets]
+
+        def flush(shard: int) -> None:
+            write_batch(connections[shard], buffers[shard])
+            counts[shard] += len(buffers[shard])
+            buffers[shard] = []
+
+        for source_engine in sources:
+            with source_engine.connect() as source:
+                for batch in read_batches(source, batch_size):
+                    for user in batch:
+                        shard = int(shard_for(user["username"], len(targets)))
+                        buffers[shard].append(user)
+                        if len(buffers[shard]) >= batch_size:
+                            flush(shard)
+        for shard, buffer in enumerate(buffers):
+            if buffer:
+                flush(shard)
+        for connection in connections:
+            connection.commit()
+    finally:
+        for connection in connections:
+            connection.close()
+    return counts
+
+
+def main() -> None:
+    """Copy users of the source databases to the target shards."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", nargs="+", required=True, help="database uris")
+    parser.add_argument("--target", nargs="+", required=True, help="shard uris")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    counts = reshard(
+        [create_engine(uri) for uri in args.source],
+        [create_engine(uri) for uri in args.target],
+        batch_size=args.batch_size,
+    )
+    for uri, count in zip(args.target, counts):
+        print(f"{uri}: {count} users")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """Token generation function."""
 from datetime import datetime, timedelta
+from uuid import uuid4
 
 from jose import jwt
 
@@ -9,6 +10,8 @@ from fastapi_user_management.config import SETTINGS
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Generate access token for specified time, default set to 15 minutes.
 
+    Tokens carry a unique ``jti`` claim, the id they are revoked by.
+
     Args:
         data (dict): Information related to user.
         expires_delta (timedelta | None, optional): Token expiration time. Defaults to None.
@@ -21,7 +24,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode, SETTINGS.SECRET_KEY, algorithm=SETTINGS.ALGORITHM
     )
@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from fastapi_user_management.crud import crud_users
+from fastapi_user_management.models.base import Base
+
+
+@pytest.fixture(autouse=True)
+def no_username_filter(monkeypatch):
+    # the global filter rebuilds from the configured database in a thread
+    monkeypatch.setattr(crud_users, "username_filter", None)
+
+
+@pytest.fixture()
+def engine():
+    # one connection, shared with the threads of test clients
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def db(engine):
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,174 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from fastapi_user_management import crud
+from fastapi_user_management.core import archive
+from fastapi_user_management.core.archive import archive_deactivated
+from fastapi_user_management.core.permissions import DEFAULT_ROLE_PERMISSIONS
+from fastapi_user_management.core.sharding import UserShardedSession, pin_shard
+from fastapi_user_management.core.username_filter import UsernameFilter
+from fastapi_user_management.crud import crud_users
+from fastapi_user_management.errors.exceptions import UserExistError
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.role import RoleModel, RoleNames
+from fastapi_user_management.models.user import UserModel, UserStatusValues
+from fastapi_user_management.models.user_archive import (
+    ArchivedUserModel,
+    ArchivedUserRoleModel,
+)
+from fastapi_user_management.routes import admin
+from fastapi_user_management.schemas.user import BaseUserCreate
+
+LONG_AGO = datetime.utcnow() - timedelta(days=365)
+
+
+def database(path):
+    engine = create_engine(f"sqlite+pysqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        crud.permission.sync(session, grants=DEFAULT_ROLE_PERMISSIONS)
+    return engine
+
+
+def add_users(
+    db, count, *, status=UserStatusValues.DEACTIVATE, changed=LONG_AGO, name=None
+):
+    roles = db.scalars(select(RoleModel)).all()
+    for i in range(count):
+        username = f"{name or status}{i}@mail.com"
+        pin_shard(db, username)
+        db.add(
+            UserModel(
+                fullname=username,
+                username=username,
+                password="x",
+                status=status,
+                created_at=changed,
+                updated_at=changed,
+                roles=roles,
+            )
+        )
+        db.commit()
+
+
+def count(db, model):
+    return sum(db.scalars(select(func.count(model.id))).all())
+
+
+@pytest.fixture()
+def db(tmp_path):
+    with Session(database(tmp_path / "db.sqlite3"), expire_on_commit=False) as db:
+        yield db
+
+
+def test_long_deactivated_users_are_archived_and_restored(db):
+    add_users(db, 3)
+    add_users(db, 2, status=UserStatusValues.ACTIVE)
+    add_users(db, 1, changed=datetime.utcnow(), name="recent")
+    user = crud.user.get_by_username(db, username="deactivate0@mail.com")
+    user_id, role_mask = user.id, user.role_mask
+    db.expunge_all()
+    version = crud.user.get_table_version(db)
+
+    assert (
+        archive_deactivated(
+            db,
+            deactivated_before=datetime.utcnow() - timedelta(days=30),
+            batch_size=10,
+            duty_cycle=1,
+        )
+        == 3
+    )
+    assert count(db, UserModel) == 3
+    assert count(db, ArchivedUserModel) == 3
+    assert count(db, ArchivedUserRoleModel) == 3 * len(RoleNames)
+    assert crud.user.get_table_version(db) == version + 1
+    assert crud.user.get_by_username(db, username="deactivate0@mail.com") is None
+
+    page = asyncio.run(admin.read_archived_users(current_user=None, db=db, limit=2))
+    assert [user.username for user in page.items] == [
+        "deactivate0@mail.com",
+        "deactivate1@mail.com",
+    ]
+    assert page.items[0].roles
+    assert page.next_cursor is not None
+
+    # reads don't restore
+    with pytest.raises(admin.HTTPException) as e:
+        asyncio.run(
+            admin.user_profile(
+                username="deactivate0@mail.com", current_user=UserModel(), db=db
+            )
+        )
+    assert (e.value.status_code, e.value.detail) == (404, "User is archived!")
+    assert count(db, ArchivedUserModel) == 3
+
+    user = admin.get_user_or_404(db, "deactivate0@mail.com")
+    assert (user.id, user.role_mask, user.token_version) == (user_id, role_mask, 1)
+    assert {role.name for role in user.roles} == set(RoleNames)
+    assert count(db, ArchivedUserModel) == 2
+    assert count(db, ArchivedUserRoleModel) == 2 * len(RoleNames)
+
+
+def test_archived_usernames_stay_taken(db, monkeypatch):
+    usernames = UsernameFilter(sync_interval=60, rebuild_interval=600, error_rate=0.01)
+    monkeypatch.setattr(crud_users, "username_filter", usernames)
+    add_users(db, 1)
+    archive_deactivated(
+        db, deactivated_before=datetime.utcnow(), batch_size=10, duty_cycle=1
+    )
+    usernames.rebuild(db)
+
+    with pytest.raises(UserExistError):
+        crud.user.create(
+            db,
+            obj_in=BaseUserCreate(
+                username="deactivate0@mail.com", fullname="D", roles=[]
+            ),
+        )
+
+
+def test_batches_are_throttled(db, monkeypatch):
+    add_users(db, 5)
+    pauses = []
+    monkeypatch.setattr(archive.time, "sleep", pauses.append)
+    reports = []
+
+    archive_deactivated(
+        db,
+        deactivated_before=datetime.utcnow(),
+        batch_size=2,
+        duty_cycle=0.25,
+        report=reports.append,
+    )
+
+    assert reports == [2, 4, 5]
+    assert len(pauses) == 2
+    assert all(pause > 0 for pause in pauses)
+
+
+def test_sharded_users_are_archived_on_their_shard(tmp_path):
+    shards = {str(i): database(tmp_path / f"shard{i}.sqlite3") for i in range(3)}
+    db = sessionmaker(
+        class_=UserShardedSession, shards=shards, expire_on_commit=False
+    )()
+    add_users(db, 6)
+
+    assert (
+        archive_deactivated(
+            db, deactivated_before=datetime.utcnow(), batch_size=10, duty_cycle=1
+        )
+        == 6
+    )
+    assert count(db, UserModel) == 0
+    assert crud.user_archive.exists(db, username="deactivate3@mail.com")
+
+    user = crud.user.get_or_restore(db, username="deactivate3@mail.com")
+    assert len(user.roles) == len(RoleNames)
+    assert count(db, UserModel) == 1
+    assert count(db, ArchivedUserModel) == 5
+    db.close()
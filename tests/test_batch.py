@@ -0,0 +1,194 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from fastapi_user_management import crud
+from fastapi_user_management.core.database import (
+    create_database_engine,
+    storage_profile,
+)
+from fastapi_user_management.core.permissions import (
+    DEFAULT_ROLE_PERMISSIONS,
+    PermissionRegistry,
+)
+from fastapi_user_management.crud import crud_users
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.role import RoleModel, RoleNames
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.routes import admin
+from fastapi_user_management.schemas.batch import BatchRequest
+from fastapi_user_management.schemas.user import UserUpdate
+
+
+@pytest.fixture()
+def db(tmp_path, monkeypatch):
+    engine = create_database_engine(
+        f"sqlite:///{tmp_path / 'db.sqlite3'}", storage_profile("balanced")
+    )
+    Base.metadata.create_all(engine)
+    with Session(engine, expire_on_commit=False) as session:
+        crud.permission.sync(session, grants=DEFAULT_ROLE_PERMISSIONS)
+        registry = PermissionRegistry()
+        registry.load(session)
+        monkeypatch.setattr(admin, "permission_registry", registry)
+        admin_role = session.scalars(
+            select(RoleModel).where(RoleModel.name == RoleNames.ADMIN)
+        ).one()
+        for name, roles in (("admin", [admin_role]), ("member", [])):
+            session.add(
+                UserModel(
+                    fullname=name,
+                    username=f"{name}@mail.com",
+                    password="x",
+                    roles=roles,
+                    created_at=datetime.utcnow(),
+                )
+            )
+        session.commit()
+        yield session
+
+
+def run(db, username, **batch):
+    current_user = crud.user.get_by_username(db, username=username)
+    return asyncio.run(
+        admin.run_batch(batch=BatchRequest(**batch), current_user=current_user, db=db)
+    )
+
+
+def user(name):
+    return {"fullname": name, "username": f"{name}@mail.com", "roles": []}
+
+
+def test_operations_commit_once_and_fail_alone(db):
+    commits = []
+    event.listen(db.get_bind(), "commit", commits.append)
+
+    response = run(
+        db,
+        "admin@mail.com",
+        operations=[
+            {"op": "create", "user": user("a")},
+            {"op": "create", "user": user("a")},
+            {"op": "delete", "username": "admin@mail.com"},
+            {"op": "revoke_sessions", "username": "nobody@mail.com"},
+            {"op": "revoke_sessions", "username": "a@mail.com"},
+            {"op": "delete", "username": "member@mail.com"},
+        ],
+    )
+
+    assert response.committed
+    assert [result.status_code for result in response.results] == [
+        200,
+        409,
+        409,
+        404,
+        200,
+        200,
+    ]
+    assert response.results[0].user.username == "a@mail.com"
+    assert len(commits) == 1
+    created = crud.user.get_by_username(db, username="a@mail.com")
+    assert created.token_version == 1
+    assert crud.user.get_by_username(db, username="member@mail.com") is None
+
+
+def test_atomic_batches_commit_nothing_on_failure(db):
+    response = run(
+        db,
+        "admin@mail.com",
+        atomic=True,
+        operations=[
+            {"op": "create", "user": user("a")},
+            {"op": "delete", "username": "nobody@mail.com"},
+            {"op": "create", "user": user("b")},
+        ],
+    )
+
+    assert not response.committed
+    assert [result.status_code for result in response.results] == [200, 404]
+    assert crud.user.get_by_username(db, username="a@mail.com") is None
+
+
+def test_batches_need_the_permissions_of_every_operation(db):
+    with pytest.raises(HTTPException) as error:
+        run(db, "member@mail.com", operations=[{"op": "create", "user": user("a")}])
+    assert error.value.status_code == 403
+
+
+def test_passwords_are_hashed_before_the_transaction(db, monkeypatch):
+    hashed_in_transaction = []
+
+    def get_password_hash(password):
+        # sqlite transactions begin at the first write, they hold its lock
+        hashed_in_transaction.append(
+            db.in_transaction()
+            and db.connection().connection.dbapi_connection.in_transaction
+        )
+        return f"hash of {password}"
+
+    monkeypatch.setattr(admin, "get_password_hash", get_password_hash)
+    monkeypatch.setattr(crud_users, "get_password_hash", get_password_hash)
+    db.commit()
+
+    response = run(
+        db,
+        "admin@mail.com",
+        operations=[
+            {"op": "create", "user": {**user("a"), "password": "secret"}},
+            {
+                "op": "update",
+                "username": "member@mail.com",
+                "changes": {"new_password": "new", "new_password_confirm": "new"},
+            },
+            {
+                "op": "update",
+                "username": "member@mail.com",
+                "changes": {"new_password": "new", "new_password_confirm": "other"},
+            },
+        ],
+    )
+
+    assert [result.status_code for result in response.results] == [200, 200, 400]
+    assert hashed_in_transaction == [False, False]
+    assert crud.user.get_by_username(db, username="a@mail.com").password == (
+        "hash of secret"
+    )
+    member = crud.user.get_by_username(db, username="member@mail.com")
+    assert member.password == "hash of new"
+
+
+def change_concurrently(db, username):
+    # another request commits a change of the user loaded by this session
+    with Session(db.get_bind()) as other:
+        user = crud.user.get_by_username(other, username=username)
+        crud.user.revoke_sessions(other, db_obj=user)
+
+
+def test_stale_writes_conflict(db):
+    changes = {"new_password": "new", "new_password_confirm": "new"}
+    member = crud.user.get_by_username(db, username="member@mail.com")
+    change_concurrently(db, "member@mail.com")
+
+    with pytest.raises(HTTPException) as error:
+        admin.update(db, "member@mail.com", UserUpdate(**changes))
+    assert error.value.status_code == 409
+    assert crud.user.get_by_username(db, username="member@mail.com").password == "x"
+
+    assert crud.user.get_by_username(db, username="member@mail.com") is member
+    change_concurrently(db, "member@mail.com")
+    response = run(
+        db,
+        "admin@mail.com",
+        operations=[
+            {"op": "create", "user": user("a")},
+            {"op": "update", "username": "member@mail.com", "changes": changes},
+        ],
+    )
+
+    assert response.committed
+    assert [result.status_code for result in response.results] == [200, 409]
+    assert crud.user.get_by_username(db, username="a@mail.com") is not None
@@ -0,0 +1,146 @@
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from fastapi_user_management import crud
+from fastapi_user_management.core.database import (
+    StorageProfile,
+    create_database_engine,
+    release,
+    storage_profile,
+)
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.user import UserModel
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}", poolclass=QueuePool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def db(engine):
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    session.add(
+        UserModel(
+            fullname="User",
+            username="user@mail.com",
+            password="x",
+            created_at=datetime.utcnow(),
+        )
+    )
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_session_is_lazy(engine, db):
+    assert engine.pool.checkedout() == 0
+    user = crud.user.get_by_username(db, username="user@mail.com")
+    assert engine.pool.checkedout() == 1
+
+    release(db)
+
+    assert engine.pool.checkedout() == 0
+    assert user.fullname == "User"
+
+
+def test_release_keeps_pending_changes(engine, db):
+    user = crud.user.get_by_username(db, username="user@mail.com")
+    user.fullname = "Renamed"
+
+    release(db)
+
+    assert db.in_transaction()
+    assert engine.pool.checkedout() == 1
+    db.commit()
+    assert engine.pool.checkedout() == 0
+
+
+def test_storage_profile_pragmas(tmp_path):
+    profile = storage_profile("balanced")
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}", profile)
+    with engine.connect() as connection:
+        pragma = connection.exec_driver_sql
+        assert pragma("PRAGMA journal_mode").scalar() == "wal"
+        assert pragma("PRAGMA synchronous").scalar() == 1
+        assert pragma("PRAGMA busy_timeout").scalar() == profile.busy_timeout
+        assert pragma("PRAGMA cache_size").scalar() == profile.cache_size
+    assert engine.pool.size() == profile.pool_size
+    engine.dispose()
+
+    memory = create_database_engine("sqlite://", profile)
+    with memory.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "memory"
+
+
+def test_storage_profile_rejects_unknown_values():
+    with pytest.raises(ValueError, match="journal_mode"):
+        StorageProfile(journal_mode="wal; DROP TABLE user_account")
+    with pytest.raises(ValueError, match="storage profile"):
+        storage_profile("missing")
+
+
+def test_concurrent_read_then_write_transactions(tmp_path):
+    engine = create_database_engine(
+        f"sqlite:///{tmp_path / 'db.sqlite3'}", storage_profile("balanced")
+    )
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    errors = []
+
+    def writer(name):
+        for i in range(50):
+            with Session() as session:
+                try:
+                    session.scalar(select(func.count(UserModel.id)))
+                    session.add(
+                        UserModel(
+                            fullname=name,
+                            username=f"{name}{i}@mail.com",
+                            password="x",
+                            created_at=datetime.utcnow(),
+                        )
+                    )
+                    session.commit()
+                except OperationalError as e:
+                    errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(f"u{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with Session() as session:
+        assert session.scalar(select(func.count(UserModel.id))) == 200
+    engine.dispose()
+
+
+def test_savepoint_opened_first_is_rolled_back_with_its_transaction(tmp_path):
+    engine = create_database_engine(
+        f"sqlite:///{tmp_path / 'db.sqlite3'}", storage_profile("balanced")
+    )
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        with session.begin_nested():
+            session.add(
+                UserModel(
+                    fullname="User",
+                    username="user@mail.com",
+                    password="x",
+                    created_at=datetime.utcnow(),
+                )
+            )
+        session.rollback()
+        assert session.scalar(select(func.count(UserModel.id))) == 0
+    engine.dispose()
@@ -0,0 +1,124 @@
+import struct
+
+import pytest
+
+from fastapi_user_management.errors.exceptions import DicomParseError
+from fastapi_user_management.tools.dicom import (
+    DicomHeader,
+    DicomHeaderParser,
+    parse_dicom_header,
+)
+
+EXPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2.1"
+IMPLICIT_VR_LITTLE_ENDIAN = "1.2.840.10008.1.2"
+EXPLICIT_VR_BIG_ENDIAN = "1.2.840.10008.1.2.2"
+LONG_VRS = {"OB", "OW", "SQ", "UN", "UT"}
+
+
+def element(tag, vr, value, *, explicit=True, order="<"):
+    if isinstance(value, str):
+        value = value.encode()
+        if len(value) % 2:
+            value += b" "
+    header = struct.pack(f"{order}HH", tag >> 16, tag & 0xFFFF)
+    if not explicit:
+        return header + struct.pack(f"{order}I", len(value)) + value
+    if vr in LONG_VRS:
+        return (
+            header
+            + vr.encode()
+            + b"\0\0"
+            + struct.pack(f"{order}I", len(value))
+            + value
+        )
+    return header + vr.encode() + struct.pack(f"{order}H", len(value)) + value
+
+
+def dicom_file(transfer_syntax, dataset=b"", pixel_data=b"\0" * 1024):
+    meta = element(0x00020010, "UI", transfer_syntax + "\0")
+    order = ">" if transfer_syntax == EXPLICIT_VR_BIG_ENDIAN else "<"
+    explicit = transfer_syntax != IMPLICIT_VR_LITTLE_ENDIAN
+    pixels = element(0x7FE00010, "OW", pixel_data, explicit=explicit, order=order)
+    return b"\0" * 128 + b"DICM" + meta + dataset + pixels
+
+
+def header_elements(*, explicit=True, order="<"):
+    return b"".join(
+        element(tag, vr, value, explicit=explicit, order=order)
+        for tag, vr, value in [
+            (0x00080060, "CS", "MR"),
+            (0x00100020, "LO", "PAT-1"),
+            (0x00180015, "CS", "HEAD"),
+            (0x0020000D, "UI", "1.2.3"),
+            (0x0020000E, "UI", "1.2.3.4"),
+        ]
+    )
+
+
+EXPECTED = DicomHeader(
+    patient_id="PAT-1",
+    study_instance_uid="1.2.3",
+    series_instance_uid="1.2.3.4",
+    modality="MR",
+    body_part_examined="HEAD",
+)
+
+
+@pytest.mark.parametrize(
+    ("transfer_syntax", "explicit", "order"),
+    [
+        (EXPLICIT_VR_LITTLE_ENDIAN, True, "<"),
+        (IMPLICIT_VR_LITTLE_ENDIAN, False, "<"),
+        (EXPLICIT_VR_BIG_ENDIAN, True, ">"),
+    ],
+)
+def test_parse_transfer_syntaxes(transfer_syntax, explicit, order):
+    data = dicom_file(transfer_syntax, header_elements(explicit=explicit, order=order))
+    assert parse_dicom_header([data]) == EXPECTED
+
+
+def test_parse_byte_by_byte_stops_before_pixel_data():
+    pixel_data = b"\xff" * 4096
+    data = dicom_file(EXPLICIT_VR_LITTLE_ENDIAN, header_elements(), pixel_data)
+    parser = DicomHeaderParser()
+    for i in range(len(data)):
+        if parser.feed(data[i : i + 1]):
+            break
+    assert parser.close() == EXPECTED
+    assert parser.bytes_consumed < len(data) - len(pixel_data)
+
+
+def test_skip_sequences_and_large_elements():
+    item = element(0x00100020, "LO", "NESTED")
+    nested_item = (
+        b"\xfe\xff\x00\xe0" + b"\xff\xff\xff\xff" + item + b"\xfe\xff\x0d\xe0\0\0\0\0"
+    )
+    undefined_sequence = (
+        struct.pack("<HH", 0x0008, 0x1115)
+        + b"SQ\0\0\xff\xff\xff\xff"
+        + nested_item
+        + b"\xfe\xff\xdd\xe0\0\0\0\0"
+    )
+    dataset = (
+        element(0x00080060, "CS", "CT")
+        + element(0x00081030, "OB", b"\0" * 70000)
+        + undefined_sequence
+        + element(0x00100020, "LO", "PAT-2")
+        + element(0x0020000E, "UI", "9.8.7")
+    )
+    header = parse_dicom_header(
+        [
+            dicom_file(EXPLICIT_VR_LITTLE_ENDIAN, dataset)[i : i + 1000]
+            for i in range(0, 80000, 1000)
+        ]
+    )
+    assert header == DicomHeader(
+        patient_id="PAT-2", series_instance_uid="9.8.7", modality="CT"
+    )
+
+
+def test_not_a_dicom_file():
+    with pytest.raises(DicomParseError):
+        parse_dicom_header([b"\0" * 200])
+    with pytest.raises(DicomParseError):
+        parse_dicom_header([b"\0" * 100])
@@ -0,0 +1,112 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+from test_dicom import EXPLICIT_VR_LITTLE_ENDIAN, dicom_file, element
+
+from fastapi_user_management.errors.exceptions import DicomParseError
+from fastapi_user_management.tools.dicom_ingest import DicomIngest
+
+
+class Unseekable(io.RawIOBase):
+    """Force zipfile to write data descriptors, as streaming zip tools do."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+def instance(series):
+    return dicom_file(
+        EXPLICIT_VR_LITTLE_ENDIAN,
+        element(0x00080060, "CS", "CT") + element(0x0020000E, "UI", f"1.2.{series}"),
+        pixel_data=b"\0" * 20000,
+    )
+
+
+def archive(seekable=True, compression=zipfile.ZIP_DEFLATED):
+    out = io.BytesIO() if seekable else Unseekable()
+    with zipfile.ZipFile(out, "w", compression=compression) as zf:
+        for i in range(6):
+            zf.writestr(f"study/{i}.dcm", instance(i % 3))
+        zf.writestr("study/README.txt", "not dicom")
+        zf.writestr("empty/", "")
+    return bytes(out.getvalue() if seekable else out.data)
+
+
+def ingest(content_type, body, chunk_size=997, head_bytes=4096):
+    result = DicomIngest(
+        content_type, executor=None, batch_size=4, head_bytes=head_bytes
+    )
+
+    async def run():
+        for i in range(0, len(body), chunk_size):
+            result.feed(body[i : i + chunk_size])
+            await result.drain(0)
+        await result.close()
+
+    asyncio.run(run())
+    return result
+
+
+@pytest.mark.parametrize(
+    ("seekable", "compression"),
+    [
+        (True, zipfile.ZIP_STORED),
+        (True, zipfile.ZIP_DEFLATED),
+        (False, zipfile.ZIP_DEFLATED),
+    ],
+)
+def test_zip_body(seekable, compression):
+    result = ingest("application/zip", archive(seekable, compression))
+    assert sorted(result.series) == ["1.2.0", "1.2.1", "1.2.2"]
+    assert (result.files, result.instances) == (7, 6)
+    assert [name for name, _ in result.errors] == ["body/study/README.txt"]
+
+
+def test_stored_entry_without_size():
+    with pytest.raises(DicomParseError):
+        ingest("application/zip", archive(False, zipfile.ZIP_STORED))
+
+
+def test_multipart_body():
+    boundary = "xYzZY"
+    parts = [
+        ("archive.zip", "application/zip", archive()),
+        ("single.dcm", "application/dicom", instance(7)),
+        ("broken.zip", "application/zip", b"garbage!"),
+    ]
+    body = (
+        b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="files"; '
+            f'filename="{name}"\r\nContent-Type: {ctype}\r\n\r\n'.encode()
+            + data
+            + b"\r\n"
+            for name, ctype, data in parts
+        )
+        + f"--{boundary}--\r\n".encode()
+    )
+    result = ingest(f"multipart/form-data; boundary={boundary}", body)
+    assert sorted(result.series) == ["1.2.0", "1.2.1", "1.2.2", "1.2.7"]
+    assert sorted(name for name, _ in result.errors) == [
+        "archive.zip/study/README.txt",
+        "broken.zip",
+    ]
+
+
+def test_header_larger_than_head():
+    result = ingest("application/zip", archive(), head_bytes=64)
+    assert result.instances == 0
+    assert "Header is larger than" in result.errors[0][1]
+
+
+def test_unsupported_body():
+    with pytest.raises(DicomParseError):
+        DicomIngest("text/plain", executor=None, batch_size=1, head_bytes=1)
@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from fastapi_user_management import crud
+from fastapi_user_management.schemas.dicom import DicomSeriesCreate
+
+
+@pytest.fixture()
+def db(db):
+    crud.dicom_series.upsert_many(
+        db,
+        objs_in=(
+            DicomSeriesCreate(
+                patient_id=f"PAT-{i % 7}",
+                study_instance_uid=f"1.2.{i % 20}",
+                series_instance_uid=f"1.2.3.{i}",
+                modality=("CT", "MR")[i % 2],
+                body_part_examined=("HEAD", "CHEST", "KNEE")[i % 3],
+            )
+            for i in range(300)
+        ),
+        chunk_size=64,
+    )
+    return db
+
+
+def test_keyset_pages_cover_every_match(db):
+    seen, after = [], None
+    while page := crud.dicom_series.get_page(
+        db, modality="CT", body_part_examined="HEAD", after=after, limit=7
+    ):
+        seen += [row["series_instance_uid"] for row in page]
+        after = page[-1]["id"]
+    assert seen == [f"1.2.3.{i}" for i in range(0, 300, 6)]
+
+
+def test_upsert_many_updates_existing(db):
+    crud.dicom_series.upsert_many(
+        db, objs_in=[DicomSeriesCreate(series_instance_uid="1.2.3.0", modality="US")]
+    )
+    assert crud.dicom_series.get_page(db, modality="US")[0]["id"] == 1
+
+
+def test_upsert_updates_series_stored_by_another_session(db):
+    # inserted after a select of this session would have missed it
+    with Session(db.get_bind()) as other:
+        stored = crud.dicom_series.upsert(
+            other, obj_in=DicomSeriesCreate(series_instance_uid="9.9", modality="CT")
+        )
+        stored_id = stored.id
+
+    series = crud.dicom_series.upsert(
+        db, obj_in=DicomSeriesCreate(series_instance_uid="9.9", modality="MR")
+    )
+    assert (series.id, series.modality) == (stored_id, "MR")
+    assert series.created_at is not None
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"modality": "CT"},
+        {"body_part_examined": "KNEE"},
+        {"modality": "CT", "body_part_examined": "KNEE"},
+    ],
+)
+def test_large_filters_read_pages_from_index(db, filters):
+    where = " AND ".join(f"{column} = :{column}" for column in filters)
+    plan = db.execute(
+        text(
+            f"EXPLAIN QUERY PLAN SELECT id FROM dicom_series WHERE {where}"
+            " AND id > 10 ORDER BY id LIMIT 50"
+        ),
+        filters,
+    ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "INDEX" in details and "rowid>?" in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,117 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from fastapi_user_management import crud
+from fastapi_user_management.core.response_cache import (
+    NullCacheBackend,
+    response_cache,
+)
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.routes import admin
+from fastapi_user_management.tools.etag import etag_matches, weak_etag
+
+
+@pytest.fixture()
+def db(db):
+    db.add_all(
+        UserModel(
+            fullname=f"User {i}",
+            username=f"user{i}@mail.com",
+            password="x",
+            created_at=datetime.utcnow(),
+        )
+        for i in range(3)
+    )
+    db.commit()
+    return db
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", NullCacheBackend())
+
+
+def test_etag_matches():
+    etag = weak_etag(1, 2)
+    assert etag.startswith('W/"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'W/"other", {etag.removeprefix("W/")}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(weak_etag(1, 3), etag)
+
+
+def test_writes_bump_versions(db):
+    assert crud.user.get_table_version(db) == 3
+    user = crud.user.get_by_username(db, username="user0@mail.com")
+    assert crud.user.get_version(db, username="user0@mail.com")[1] == 1
+
+    user.fullname = "Renamed"
+    db.commit()
+
+    user_id, row_version, updated_at = crud.user.get_version(
+        db, username="user0@mail.com"
+    )
+    assert (user_id, row_version) == (user.id, 2)
+    assert updated_at == user.updated_at
+    assert crud.user.get_table_version(db) == 4
+    crud.user.remove_by_username(db, username="user1@mail.com")
+    assert crud.user.get_table_version(db) == 5
+
+
+def statements(db):
+    executed = []
+    event.listen(
+        db.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+    return executed
+
+
+def test_user_profile_not_modified(db):
+    admin_user = db.get(UserModel, 1)
+    response = asyncio.run(
+        admin.user_profile(username="user0@mail.com", current_user=admin_user, db=db)
+    )
+    assert json.loads(response.body)["username"] == "user0@mail.com"
+    db.expunge_all()
+    executed = statements(db)
+
+    cached = asyncio.run(
+        admin.user_profile(
+            username="user0@mail.com",
+            current_user=admin_user,
+            db=db,
+            if_none_match=response.headers["ETag"],
+        )
+    )
+
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == response.headers["ETag"]
+    assert len(executed) == 1
+    assert "user_account.password" not in executed[0]
+    assert not db.identity_map
+
+
+def test_user_list_not_modified_until_write(db):
+    admin_user = db.get(UserModel, 1)
+    response = asyncio.run(admin.read_users(current_user=admin_user, db=db))
+    etag = response.headers["ETag"]
+
+    cached = asyncio.run(
+        admin.read_users(current_user=admin_user, db=db, if_none_match=etag)
+    )
+    assert cached.status_code == 304
+
+    crud.user.get_by_username(db, username="user2@mail.com").fullname = "Renamed"
+    db.commit()
+    response = asyncio.run(
+        admin.read_users(current_user=admin_user, db=db, if_none_match=etag)
+    )
+    assert len(json.loads(response.body)) == 3
+    assert response.headers["ETag"] != etag
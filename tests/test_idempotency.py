@@ -0,0 +1,110 @@
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.pool import StaticPool
+
+from fastapi_user_management.core.idempotency import (
+    IdempotencyMiddleware,
+    IdempotencyStore,
+)
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.idempotency_key import IdempotencyKeyModel
+
+
+@pytest.fixture()
+def store():
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    return IdempotencyStore(engine, ttl=60, max_entries=3, lock_timeout=5)
+
+
+@pytest.fixture()
+def client(store):
+    app = FastAPI()
+    calls = []
+
+    @app.post("/items", status_code=201)
+    async def create_item(request: Request):
+        body = await request.json()
+        calls.append(body)
+        if body.get("fail"):
+            raise HTTPException(status_code=503, detail="try again")
+        return {"number": len(calls), **body}
+
+    app.add_middleware(
+        IdempotencyMiddleware, store=store, paths=["/items"], max_body_bytes=1024
+    )
+    with TestClient(app) as test_client:
+        test_client.calls = calls
+        yield test_client
+
+
+def count(store):
+    with store.bind.connect() as connection:
+        return connection.scalar(select(func.count()).select_from(IdempotencyKeyModel))
+
+
+def test_retries_are_replayed(client):
+    headers = {"Idempotency-Key": "a", "Authorization": "Bearer 1"}
+    first = client.post("/items", json={"name": "x"}, headers=headers)
+    retry = client.post("/items", json={"name": "x"}, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json() == {"number": 1, "name": "x"}
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(client.calls) == 1
+
+    other_caller = {"Idempotency-Key": "a", "Authorization": "Bearer 2"}
+    assert client.post("/items", json={"name": "x"}, headers=other_caller).json() == {
+        "number": 2,
+        "name": "x",
+    }
+    client.post("/items", json={"name": "x"})
+    assert len(client.calls) == 3
+
+
+def test_reused_key_and_running_request_are_refused(client, store):
+    headers = {"Idempotency-Key": "a"}
+    client.post("/items", json={"name": "x"}, headers=headers)
+    assert client.post("/items", json={"name": "y"}, headers=headers).status_code == 422
+
+    anonymous = hashlib.blake2b(b"", digest_size=16).hexdigest()
+    assert store.claim(f"{anonymous} /items", "b") is None
+    running = client.post("/items", json={}, headers={"Idempotency-Key": "b"})
+    assert running.status_code == 409
+    store.release(f"{anonymous} /items", "b")
+    assert client.post("/items", json={}, headers={"Idempotency-Key": "b"}).is_success
+    assert client.post("/items", headers={"Idempotency-Key": ""}).status_code == 400
+
+
+def test_server_errors_release_the_key(client, store):
+    headers = {"Idempotency-Key": "a"}
+    assert client.post("/items", json={"fail": 1}, headers=headers).status_code == 503
+    assert count(store) == 0
+    assert client.post("/items", json={"fail": 1}, headers=headers).status_code == 503
+    assert len(client.calls) == 2
+
+
+def test_keys_expire_and_are_bounded(client, store):
+    for key in "abcde":
+        client.post("/items", json={}, headers={"Idempotency-Key": key})
+    assert count(store) == 5
+    assert store.prune() == 2
+    assert count(store) == 3
+
+    table = IdempotencyKeyModel.__table__
+    with store.bind.begin() as connection:
+        connection.execute(
+            update(table).values(created_at=datetime.utcnow() - timedelta(hours=1))
+        )
+    client.post("/items", json={}, headers={"Idempotency-Key": "e"})
+    assert len(client.calls) == 6
+    assert store.prune() == 2
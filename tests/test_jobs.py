@@ -0,0 +1,207 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from fastapi_user_management import crud
+from fastapi_user_management.core.database import (
+    create_database_engine,
+    storage_profile,
+)
+from fastapi_user_management.core.jobs import JobQueue
+from fastapi_user_management.core.permissions import (
+    DEFAULT_ROLE_PERMISSIONS,
+    PermissionRegistry,
+)
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.job import JobModel, JobStatusValues
+from fastapi_user_management.models.role import RoleModel, RoleNames
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.routes import admin, jobs
+from fastapi_user_management.schemas.job import UserBatchJobRequest
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_database_engine(
+        f"sqlite:///{tmp_path / 'db.sqlite3'}", storage_profile("balanced")
+    )
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture()
+def queue(engine):
+    queue = JobQueue(engine, workers=2, poll_interval=0.05, stale_after=30)
+    steps = []
+
+    @queue.register("count")
+    def count(context, to, cancel_at=None, stop_at=None):
+        for i in range(context.done, to):
+            steps.append(i)
+            if i == cancel_at:
+                queue.cancel(context.job_id)
+            if i == stop_at:
+                queue._stop.set()
+            context.report(i + 1, to, result={"last": i})
+        return {"last": to - 1}
+
+    queue.steps = steps
+    yield queue
+    queue.stop()
+
+
+def submit(queue, kind="count", **params):
+    return queue.submit(kind, params, created_by="admin@mail.com", permission_mask=0)
+
+
+def test_jobs_report_progress_and_results(queue):
+    job = submit(queue, to=3)
+    assert queue.get(job.id).status is JobStatusValues.QUEUED
+
+    assert queue.run_next()
+    assert not queue.run_next()
+    job = queue.get(job.id)
+    assert job.status is JobStatusValues.SUCCEEDED
+    assert (job.done, job.total, job.result) == (3, 3, {"last": 2})
+    assert job.params is None
+    assert job.finished_at is not None
+
+
+def test_cancelled_jobs_stop_at_their_next_report(queue):
+    queued = submit(queue, to=3)
+    assert queue.cancel(queued.id).status is JobStatusValues.CANCELLED
+    assert not queue.run_next()
+
+    running = submit(queue, to=10, cancel_at=4)
+    assert queue.run_next()
+    job = queue.get(running.id)
+    assert job.status is JobStatusValues.CANCELLED
+    assert (job.done, job.result) == (5, {"last": 4})
+    assert queue.steps == [0, 1, 2, 3, 4]
+
+
+def test_interrupted_jobs_resume_where_they_stopped(queue):
+    job = submit(queue, to=5, stop_at=1)
+    assert queue.run_next()
+    job = queue.get(job.id)
+    assert (job.status, job.done) == (JobStatusValues.QUEUED, 2)
+
+    queue._stop.clear()
+    assert queue.run_next()
+    job = queue.get(job.id)
+    assert job.status is JobStatusValues.SUCCEEDED
+    assert job.attempts == 2
+    assert queue.steps == [0, 1, 2, 3, 4]
+
+
+def test_jobs_of_dead_processes_are_queued_again(queue, engine):
+    job = submit(queue, to=2)
+    with engine.begin() as connection:
+        connection.execute(
+            update(JobModel)
+            .where(JobModel.id == job.id)
+            .values(
+                status=JobStatusValues.RUNNING,
+                heartbeat_at=datetime.utcnow() - timedelta(minutes=5),
+            )
+        )
+    assert not queue.run_next()
+    assert queue.requeue_stale() == 1
+    assert queue.run_next()
+    assert queue.get(job.id).status is JobStatusValues.SUCCEEDED
+
+
+def test_workers_run_jobs_in_the_background(queue):
+    queue.start()
+    job = submit(queue, to=3)
+    deadline = time.monotonic() + 10
+    while queue.get(job.id).status is not JobStatusValues.SUCCEEDED:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    queue.stop()
+    assert queue._threads == []
+
+
+def test_user_batch_jobs_commit_chunks(engine, queue, monkeypatch):
+    with Session(engine, expire_on_commit=False) as db:
+        crud.permission.sync(db, grants=DEFAULT_ROLE_PERMISSIONS)
+        registry = PermissionRegistry()
+        registry.load(db)
+        admin_role = db.scalars(
+            select(RoleModel).where(RoleModel.name == RoleNames.ADMIN)
+        ).one()
+        current_user = UserModel(
+            fullname="admin",
+            username="admin@mail.com",
+            password="x",
+            roles=[admin_role],
+            created_at=datetime.utcnow(),
+        )
+        db.add(current_user)
+        db.commit()
+    for module in (admin, jobs):
+        monkeypatch.setattr(module, "permission_registry", registry)
+    queue.register(jobs.USER_BATCH_JOB)(jobs.run_user_batch)
+    monkeypatch.setattr(jobs, "job_queue", queue)
+    monkeypatch.setattr(
+        jobs, "SessionLocal", sessionmaker(engine, expire_on_commit=False)
+    )
+    monkeypatch.setattr(jobs.SETTINGS, "JOBS_CHUNK_SIZE", 2)
+    monkeypatch.setattr(admin, "get_password_hash", lambda p: p[::-1])
+    operations = [
+        {
+            "op": "create",
+            "user": {"fullname": n, "username": f"{n}@mail.com", "roles": []},
+        }
+        for n in "abc"
+    ] + [
+        {"op": "delete", "username": "admin@mail.com"},
+        {
+            "op": "update",
+            "username": "a@mail.com",
+            "changes": {"new_password": "secret", "new_password_confirm": "secret"},
+        },
+        {
+            "op": "update",
+            "username": "b@mail.com",
+            "changes": {"new_password": "secret", "new_password_confirm": "other"},
+        },
+    ]
+
+    job = asyncio.run(
+        jobs.submit_user_batch(
+            batch=UserBatchJobRequest(operations=operations), current_user=current_user
+        )
+    )
+    assert job.status is JobStatusValues.QUEUED
+    assert "secret" not in json.dumps(queue.get(job.id).params)
+    assert queue.run_next()
+
+    job = asyncio.run(jobs.read_job(job_id=job.id, current_user=current_user))
+    assert job.status is JobStatusValues.SUCCEEDED
+    assert (job.done, job.total) == (6, 6)
+    assert job.result == {
+        "succeeded": 4,
+        "failed": 2,
+        "errors": [
+            {
+                "index": 3,
+                "status_code": 409,
+                "detail": "Can't delete user with admin role!",
+            },
+            {
+                "index": 5,
+                "status_code": 400,
+                "detail": "Password doesn't match!",
+            },
+        ],
+    }
+    with Session(engine) as db:
+        assert crud.user.get_by_username(db, username="c@mail.com") is not None
+        user = crud.user.get_by_username(db, username="a@mail.com")
+        assert user.password == "terces"
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from fastapi_user_management.core.loop_monitor import (
+    LoopMonitor,
+    LoopMonitorMiddleware,
+)
+
+
+def monitored_app(monitor: LoopMonitor) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def blocking_route(item_id: int):
+        time.sleep(0.3)
+        return {"id": item_id}
+
+    @app.get("/fast")
+    async def fast_route():
+        await asyncio.sleep(0.1)
+        return {}
+
+    app.add_middleware(LoopMonitorMiddleware, monitor=monitor)
+    return app
+
+
+async def request(monitor: LoopMonitor, path: str) -> None:
+    transport = httpx.ASGITransport(app=monitored_app(monitor))
+    await monitor.start()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            await asyncio.sleep(0.05)
+            (await c.get(path)).raise_for_status()
+            await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+
+def test_stall_is_attributed_to_blocking_route():
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    asyncio.run(request(monitor, "/items/7"))
+
+    (stall,) = monitor.stalls
+    assert stall.route == "GET /items/{item_id}"
+    assert stall.stack[-1].endswith("in blocking_route")
+    assert stall.lag >= 0.25
+    assert monitor.percentiles()["max_ms"] >= 250
+    assert not monitor.active
+    assert not monitor.running
+
+
+def test_awaiting_route_does_not_stall():
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    asyncio.run(request(monitor, "/fast"))
+
+    assert not monitor.stalls
+    assert monitor.percentiles()["samples"] > 5
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import BackgroundTasks
+from fastapi.security import OAuth2PasswordRequestForm
+from passlib.hash import bcrypt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from fastapi_user_management import crud
+from fastapi_user_management.crud import crud_users
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.routes import auth
+from fastapi_user_management.tools import encryption
+
+
+def rounds(password_hash):
+    return bcrypt.from_string(password_hash).rounds
+
+
+@pytest.fixture(autouse=True)
+def pwd_context():
+    settings = encryption.pwd_context.to_dict()
+    yield encryption.pwd_context
+    encryption.pwd_context.load(settings)
+
+
+@pytest.fixture()
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'db.sqlite3'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(crud_users, "username_filter", None)
+    monkeypatch.setattr(auth, "SessionLocal", sessionmaker(engine))
+    return engine
+
+
+def add_user(engine, password_hash):
+    with Session(engine) as db:
+        db.add(
+            UserModel(
+                fullname="User",
+                username="user@mail.com",
+                password=password_hash,
+                created_at=datetime.utcnow(),
+            )
+        )
+        db.commit()
+
+
+def login(engine, password):
+    tasks = BackgroundTasks()
+    form = OAuth2PasswordRequestForm(username="user@mail.com", password=password)
+    with Session(engine) as db:
+        token = asyncio.run(
+            auth.login_for_access_token(form_data=form, background_tasks=tasks, db=db)
+        )
+    asyncio.run(tasks())
+    return token
+
+
+def stored_hash(engine):
+    with Session(engine) as db:
+        return crud.user.get_by_username(db, username="user@mail.com").password
+
+
+def test_calibration_picks_the_largest_work_factor_within_budget(monkeypatch):
+    monkeypatch.setattr(encryption, "measure_hash", lambda rounds: 0.01)
+
+    assert encryption.calibrate(0.25, min_rounds=10, max_rounds=20) == 14
+    assert encryption.calibrate(0.25, min_rounds=10, max_rounds=12) == 12
+    assert encryption.calibrate(0.001, min_rounds=10, max_rounds=20) == 10
+    assert encryption.calibrate(0.25, min_rounds=1, max_rounds=20) == 8
+
+
+def test_hashes_outside_the_configured_work_factors_need_update():
+    encryption.configure(5, max_rounds=6)
+
+    assert rounds(encryption.get_password_hash("secret")) == 5
+    assert encryption.needs_rehash(bcrypt.using(rounds=4).hash("secret"))
+    assert not encryption.needs_rehash(bcrypt.using(rounds=6).hash("secret"))
+    assert encryption.needs_rehash(bcrypt.using(rounds=7).hash("secret"))
+
+
+def test_outdated_hashes_are_replaced_after_login(engine):
+    add_user(engine, bcrypt.using(rounds=4).hash("secret"))
+    encryption.configure(5, max_rounds=6)
+
+    assert login(engine, "secret")["token_type"] == "bearer"
+    new_hash = stored_hash(engine)
+    assert rounds(new_hash) == 5
+    assert encryption.verify_password("secret", new_hash)
+
+    login(engine, "secret")
+    assert stored_hash(engine) == new_hash
+
+
+def test_passwords_changed_meanwhile_are_kept(engine):
+    old_hash = bcrypt.using(rounds=4).hash("secret")
+    add_user(engine, old_hash)
+    changed = bcrypt.using(rounds=4).hash("changed")
+    with Session(engine) as db:
+        crud.user.get_by_username(db, username="user@mail.com").password = changed
+        db.commit()
+
+        assert not crud.user.replace_password_hash(
+            db, username="user@mail.com", old_hash=old_hash, new_hash="new"
+        )
+    assert stored_hash(engine) == changed
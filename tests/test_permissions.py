@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from fastapi_user_management import crud
+from fastapi_user_management.core.permissions import (
+    DEFAULT_ROLE_PERMISSIONS,
+    PermissionRegistry,
+    permission_mask,
+    permission_registry,
+)
+from fastapi_user_management.models.permission import PermissionNames
+from fastapi_user_management.models.role import RoleModel, RoleNames
+from fastapi_user_management.models.role_permission import RolePermissionModel
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.routes.auth import require_permission
+
+
+@pytest.fixture()
+def db(db):
+    crud.permission.sync(db, grants=DEFAULT_ROLE_PERMISSIONS)
+    return db
+
+
+def role(db, name: RoleNames) -> RoleModel:
+    return db.execute(select(RoleModel).where(RoleModel.name == name)).scalar_one()
+
+
+def test_sync_compiles_default_grants(db):
+    masks = crud.permission.get_role_masks(db)
+    assert masks == {RoleNames.ADMIN: permission_mask(*PermissionNames)}
+
+
+def test_sync_keeps_changed_grants(db):
+    admin = role(db, RoleNames.ADMIN)
+    db.query(RolePermissionModel).filter_by(role_id=admin.id).delete()
+    crud.permission.grant(db, role=admin, permissions=[PermissionNames.USER_READ])
+    crud.permission.sync(db, grants=DEFAULT_ROLE_PERMISSIONS)
+
+    assert db.scalar(select(func.count()).select_from(RolePermissionModel)) == 1
+    assert crud.permission.get_role_masks(db) == {RoleNames.ADMIN: 1}
+
+
+def test_user_mask_is_union_of_role_masks(db):
+    user = role(db, RoleNames.USER)
+    crud.permission.grant(db, role=user, permissions=[PermissionNames.USER_READ])
+    registry = PermissionRegistry()
+    registry.load(db)
+
+    member = UserModel(username="u@mail.com", roles=[user])
+    read = permission_mask(PermissionNames.USER_READ)
+    delete = permission_mask(PermissionNames.USER_DELETE)
+    assert registry.has_permissions(member, read)
+    assert not registry.has_permissions(member, read | delete)
+    member.roles.append(role(db, RoleNames.ADMIN))
+    assert registry.has_permissions(member, read | delete)
+
+
+def test_require_permission(db, monkeypatch):
+    monkeypatch.setattr(permission_registry, "role_masks", {})
+    permission_registry.load(db)
+    check = require_permission(PermissionNames.USER_DELETE)
+    admin = UserModel(username="a@mail.com", roles=[role(db, RoleNames.ADMIN)])
+    user = UserModel(username="u@mail.com", roles=[role(db, RoleNames.USER)])
+
+    assert asyncio.run(check(current_user=admin)) is admin
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(check(current_user=user))
+    assert e.value.status_code == 403
@@ -0,0 +1,151 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from fastapi_user_management.core import profiling
+from fastapi_user_management.core.profiling import (
+    FILE_HEADER,
+    SUMMARY_HEADER,
+    ProfilingMiddleware,
+    is_admin_token,
+)
+from fastapi_user_management.core.revocation import TokenRevocations
+from fastapi_user_management.models.role import RoleModel, RoleNames
+from fastapi_user_management.models.user import UserModel, UserStatusValues
+from fastapi_user_management.tools.token import create_access_token
+
+
+def busy_wait(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def client(tmp_path, **kwargs) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        busy_wait(0.05)
+        return {"ok": True}
+
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=tmp_path,
+        authorize=lambda authorization: authorization == "Bearer admin",
+        **kwargs,
+    )
+    return TestClient(app)
+
+
+ADMIN = {"Authorization": "Bearer admin"}
+
+
+def test_not_requested_is_not_profiled(tmp_path):
+    response = client(tmp_path).get("/slow", headers=ADMIN)
+    assert SUMMARY_HEADER not in response.headers
+    assert FILE_HEADER not in response.headers
+
+
+def test_non_admin_is_not_profiled(tmp_path):
+    response = client(tmp_path).get(
+        "/slow", headers={"Authorization": "Bearer user", "X-Profile": "summary"}
+    )
+    assert SUMMARY_HEADER not in response.headers
+
+
+@pytest.mark.parametrize("mode", ["sampling", "deterministic"])
+def test_summary_header_names_hot_function(tmp_path, mode):
+    response = client(tmp_path, mode=mode).get(
+        "/slow", headers={**ADMIN, "X-Profile": "summary"}
+    )
+    assert response.json() == {"ok": True}
+    assert "busy_wait" in response.headers[SUMMARY_HEADER]
+
+
+def test_query_flag_writes_collapsed_stacks(tmp_path):
+    response = client(tmp_path).get("/slow?profile=file", headers=ADMIN)
+    path = tmp_path / response.headers[FILE_HEADER]
+    assert path.suffix == ".folded"
+    lines = path.read_text().splitlines()
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    assert any("busy_wait" in line for line in lines)
+
+
+def test_sampled_requests_write_pstats(tmp_path):
+    response = client(tmp_path, mode="deterministic", sample_rate=1.0).get("/slow")
+    assert (tmp_path / response.headers[FILE_HEADER]).suffix == ".pstats"
+
+
+def test_authorization_runs_off_the_event_loop(tmp_path):
+    threads = []
+
+    def authorize(authorization):
+        threads.append(threading.current_thread())
+        return True
+
+    app = FastAPI()
+
+    @app.get("/thread")
+    async def thread():
+        threads.append(threading.current_thread())
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware, output_dir=tmp_path, authorize=authorize)
+    response = TestClient(app).get("/thread", headers={"X-Profile": "summary"})
+
+    assert SUMMARY_HEADER in response.headers
+    assert threads[0] is not threads[1]
+
+
+def test_admin_tokens_are_checked_like_access_tokens(db, monkeypatch):
+    revocations = TokenRevocations(rebuild_interval=60, error_rate=0.001)
+    monkeypatch.setattr(profiling, "token_revocations", revocations)
+    monkeypatch.setattr(
+        profiling, "SessionLocal", sessionmaker(db.get_bind(), expire_on_commit=False)
+    )
+    admin_role = RoleModel(name=RoleNames.ADMIN)
+    for name, roles in (("admin", [admin_role]), ("user", [])):
+        db.add(
+            UserModel(
+                fullname=name,
+                username=f"{name}@mail.com",
+                password="x",
+                roles=roles,
+                status=UserStatusValues.ACTIVE,
+                created_at=datetime.utcnow(),
+            )
+        )
+    db.commit()
+
+    def bearer(username, version=0):
+        return f"Bearer {create_access_token({'sub': username, 'ver': version})}"
+
+    assert is_admin_token(bearer("admin@mail.com"))
+    assert not is_admin_token(bearer("user@mail.com"))
+    assert not is_admin_token(bearer("nobody@mail.com"))
+    assert not is_admin_token("Bearer invalid")
+
+    revoked = bearer("admin@mail.com")
+    claims = jwt.get_unverified_claims(revoked[len("Bearer ") :])
+    revocations.revoke(db, jti=claims["jti"], expires_at=datetime.utcnow())
+    assert not is_admin_token(revoked)
+
+    admin = db.scalars(
+        select(UserModel).where(UserModel.username == "admin@mail.com")
+    ).one()
+    admin.token_version += 1
+    db.commit()
+    assert not is_admin_token(bearer("admin@mail.com"))
+    assert is_admin_token(bearer("admin@mail.com", version=1))
+
+    admin.status = UserStatusValues.DEACTIVATE
+    db.commit()
+    assert not is_admin_token(bearer("admin@mail.com", version=1))
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from fastapi_user_management import crud
+from fastapi_user_management.core.database import (
+    RoutingSession,
+    reader_uris,
+    use_writer,
+)
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.user import UserModel
+
+
+@pytest.fixture()
+def engines(tmp_path):
+    writer = create_engine(f"sqlite+pysqlite:///{tmp_path / 'db.sqlite3'}")
+    Base.metadata.create_all(writer)
+    (uri,) = reader_uris(str(writer.url), [])
+    reader = create_engine(uri)
+    yield writer, reader
+    writer.dispose()
+    reader.dispose()
+
+
+@pytest.fixture()
+def db(engines):
+    writer, reader = engines
+    Session = sessionmaker(
+        class_=RoutingSession, bind=writer, readers=[reader], expire_on_commit=False
+    )
+    with Session() as session:
+        session.add(
+            UserModel(
+                fullname="User",
+                username="user@mail.com",
+                password="x",
+                created_at=datetime.utcnow(),
+            )
+        )
+        session.commit()
+    with Session() as session:
+        yield session
+
+
+def test_reader_uris():
+    assert reader_uris("sqlite+pysqlite:///db.sqlite3", []) == [
+        "sqlite+pysqlite:///file:db.sqlite3?mode=ro&uri=true"
+    ]
+    assert reader_uris("sqlite+pysqlite:///:memory:", []) == []
+    assert reader_uris("postgresql://h/db", ["postgresql://r/db"]) == [
+        "postgresql://r/db"
+    ]
+
+
+def test_reads_use_reader(engines, db):
+    writer, reader = engines
+    assert crud.user.get_by_username(db, username="user@mail.com")
+    assert db.get_bind(clause=select(UserModel)) is reader
+    assert db.get_bind(clause=select(UserModel).with_for_update()) is writer
+    with reader.connect() as conn, pytest.raises(OperationalError, match="readonly"):
+        conn.exec_driver_sql("DELETE FROM user_account")
+
+
+def test_writes_pin_session_to_writer(engines, db):
+    writer, _ = engines
+    user = crud.user.get_by_username(db, username="user@mail.com")
+    user.fullname = "Renamed"
+    db.commit()
+
+    assert db.get_bind(clause=select(UserModel)) is writer
+    assert db.scalar(select(UserModel.fullname)) == "Renamed"
+
+
+def test_dml_and_use_writer_pin_session(engines, db):
+    writer, _ = engines
+    db.execute(update(UserModel).values(fullname="Renamed"))
+    assert db.get_bind(clause=select(UserModel)) is writer
+    db.rollback()
+
+    db.info.clear()
+    use_writer(db)
+    assert db.get_bind(clause=select(UserModel)) is writer
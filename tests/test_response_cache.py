@@ -0,0 +1,169 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from fastapi_user_management import crud
+from fastapi_user_management.core import response_cache as response_cache_module
+from fastapi_user_management.core.response_cache import (
+    USERS_TAG,
+    MemoryCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+    response_cache,
+    user_tag,
+)
+from fastapi_user_management.core.shared_cache import GENERATIONS
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.routes import admin
+
+
+@pytest.fixture()
+def db(db):
+    db.add_all(
+        UserModel(
+            fullname=f"User {i}",
+            username=f"user{i}@mail.com",
+            password="x",
+            created_at=datetime.utcnow(),
+        )
+        for i in range(3)
+    )
+    db.commit()
+    return db
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    backend = MemoryCacheBackend(max_entries=16, max_bytes=1 << 20, ttl=60)
+    monkeypatch.setattr(response_cache, "backend", backend)
+    return backend
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2, max_bytes=10, ttl=60)
+    backend.set("a", b"1")
+    backend.set("b", b"2")
+    assert backend.get("a") == b"1"
+    backend.set("c", b"3")
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+
+    backend.set("d", b"1234567890")
+    assert (backend.get("a"), backend.get("c")) == (None, None)
+    assert backend.size == 10
+    backend.set("e", b"x" * 11)
+    assert backend.get("e") is None
+
+
+def test_memory_backend_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(response_cache_module.time, "monotonic", lambda: now[0])
+    backend = MemoryCacheBackend(max_entries=2, max_bytes=10, ttl=5)
+    backend.set("a", b"1")
+    now[0] += 4
+    assert backend.get("a") == b"1"
+    now[0] += 1
+    assert backend.get("a") is None
+    assert backend.size == 0
+
+
+def test_memory_backend_generations_are_bounded():
+    backend = MemoryCacheBackend(max_entries=2, max_bytes=10, ttl=5)
+    tags = [user_tag(f"user{i}@mail.com") for i in range(3 * GENERATIONS)]
+    backend.bump(tags)
+    assert len(backend._generations) == GENERATIONS
+    assert all(generation >= 1 for generation in backend.generations(tags))
+
+    before = backend.generations([USERS_TAG])[0]
+    backend.bump([USERS_TAG, USERS_TAG])
+    assert backend.generations([USERS_TAG]) == [before + 1]
+
+
+def test_sqlite_backend_is_shared(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = ResponseCache(SQLiteCacheBackend(path, max_entries=2))
+    second = ResponseCache(SQLiteCacheBackend(path, max_entries=2))
+    key = first.key("list", tags=[USERS_TAG], scope=1, params={"b": 2, "a": 1})
+    assert key == second.key("list", tags=[USERS_TAG], scope=1, params={"a": 1, "b": 2})
+
+    first.set(key, 'W/"1"', b'{"a": 1}')
+    assert second.get(key) == ('W/"1"', b'{"a": 1}')
+    second.invalidate(USERS_TAG)
+    assert first.key("list", tags=[USERS_TAG], scope=1, params={"a": 1}) != key
+
+    first.set("x", "", b"")
+    first.set("y", "", b"")
+    assert second.get(key) is None
+
+
+def test_commits_invalidate_written_users(db):
+    def keys():
+        return [
+            response_cache.key("e", tags=[tag], scope=0, params={})
+            for tag in (
+                USERS_TAG,
+                user_tag("user0@mail.com"),
+                user_tag("user1@mail.com"),
+            )
+        ]
+
+    before = keys()
+    user = crud.user.get_by_username(db, username="user0@mail.com")
+    user.fullname = "Rolled back"
+    db.flush()
+    db.rollback()
+    assert keys() == before
+
+    user.fullname = "Renamed"
+    db.commit()
+    after = keys()
+    assert after[0] != before[0]
+    assert after[1] != before[1]
+    assert after[2] == before[2]
+
+
+def statements(db):
+    executed = []
+    event.listen(
+        db.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+    return executed
+
+
+def test_hits_skip_the_database(db):
+    admin_user = db.get(UserModel, 1)
+    first = asyncio.run(admin.read_users(current_user=admin_user, db=db, limit=2))
+    profile = asyncio.run(
+        admin.user_profile(username="user2@mail.com", current_user=admin_user, db=db)
+    )
+    executed = statements(db)
+
+    cached = asyncio.run(admin.read_users(current_user=admin_user, db=db, limit=2))
+    assert (cached.body, cached.headers["ETag"]) == (first.body, first.headers["ETag"])
+    assert len(json.loads(cached.body)) == 2
+    not_modified = asyncio.run(
+        admin.user_profile(
+            username="user2@mail.com",
+            current_user=admin_user,
+            db=db,
+            if_none_match=profile.headers["ETag"],
+        )
+    )
+    assert not_modified.status_code == 304
+    assert executed == []
+
+    crud.user.get_by_username(db, username="user1@mail.com").fullname = "Renamed"
+    db.commit()
+    executed.clear()
+    refreshed = asyncio.run(admin.read_users(current_user=admin_user, db=db, limit=2))
+    assert json.loads(refreshed.body)[1]["fullname"] == "Renamed"
+    assert executed
+    cached = asyncio.run(
+        admin.user_profile(username="user2@mail.com", current_user=admin_user, db=db)
+    )
+    assert cached.body == profile.body
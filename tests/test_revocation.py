@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from fastapi_user_management import crud
+from fastapi_user_management.core.response_cache import (
+    MemoryCacheBackend,
+    response_cache,
+)
+from fastapi_user_management.core.revocation import TokenRevocations
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.revoked_token import RevokedTokenModel
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.routes import auth
+from fastapi_user_management.tools.bloom import BloomFilter
+from fastapi_user_management.tools.token import create_access_token
+
+
+@pytest.fixture()
+def db(db):
+    db.add(
+        UserModel(
+            fullname="User",
+            username="user@mail.com",
+            password="x",
+            created_at=datetime.utcnow(),
+        )
+    )
+    db.commit()
+    return db
+
+
+@pytest.fixture()
+def revocations(monkeypatch):
+    revocations = TokenRevocations(rebuild_interval=60, error_rate=0.001)
+    monkeypatch.setattr(auth, "token_revocations", revocations)
+    return revocations
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    backend = MemoryCacheBackend(max_entries=16, max_bytes=1 << 20, ttl=60)
+    monkeypatch.setattr(response_cache, "backend", backend)
+    return backend
+
+
+def statements(db):
+    executed = []
+    event.listen(
+        db.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+    return executed
+
+
+def test_bloom_filter():
+    values = [f"token{i}" for i in range(1000)]
+    bloom = BloomFilter.from_values(values, capacity=1000, error_rate=0.01)
+
+    assert all(value in bloom for value in values)
+    false_positives = sum(f"other{i}" in bloom for i in range(10000))
+    assert false_positives < 200
+    assert bloom.error_rate == pytest.approx(0.01, rel=0.2)
+
+
+def test_unrevoked_tokens_skip_the_table(db, revocations):
+    revocations.revoke(
+        db, jti="revoked", expires_at=datetime.utcnow() + timedelta(hours=1)
+    )
+    revocations.rebuild(db)
+    executed = statements(db)
+
+    assert not any(revocations.is_revoked(db, jti=f"jti{i}") for i in range(100))
+    assert revocations.is_revoked(db, jti="revoked")
+    assert len(executed) == revocations.stats.table_lookups
+    assert revocations.stats.checks == 101
+
+
+def test_rebuild_prunes_expired_revocations(db, revocations):
+    revocations.revoke(db, jti="old", expires_at=datetime.utcnow() - timedelta(1))
+    revocations.revoke(db, jti="new", expires_at=datetime.utcnow() + timedelta(1))
+
+    revocations.rebuild(db)
+
+    assert db.scalars(select(RevokedTokenModel.jti)).all() == ["new"]
+    assert "old" not in revocations.filter
+    assert revocations.filter.count == 1
+
+
+def test_stale_filters_are_rebuilt_in_the_background(tmp_path):
+    url = f"sqlite+pysqlite:///{tmp_path / 'db.sqlite3'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    # statements of the request session only
+    rebuild_sessions = sessionmaker(create_engine(url))
+    revocations = TokenRevocations(
+        rebuild_interval=60, error_rate=0.001, session_factory=rebuild_sessions
+    )
+    with Session(engine) as db:
+        revocations.revoke(db, jti="old", expires_at=datetime.utcnow() - timedelta(1))
+        revocations.revoke(db, jti="new", expires_at=datetime.utcnow() + timedelta(1))
+        executed = statements(db)
+
+        # no filter yet, the table answers
+        assert revocations.is_revoked(db, jti="new")
+        revocations._rebuilding.join()
+        # pruned by the rebuild, not by the request
+        assert len(executed) == 1 and executed[0].startswith("SELECT")
+        assert db.scalars(select(RevokedTokenModel.jti)).all() == ["new"]
+
+        executed.clear()
+        assert not revocations.is_revoked(db, jti="other")
+        assert executed == []
+
+
+def current_user(db, token):
+    return asyncio.run(auth.get_current_user(token=token, db=db))
+
+
+def test_logout_and_revoked_sessions_reject_tokens(db, revocations):
+    user = crud.user.get_by_username(db, username="user@mail.com")
+    token = create_access_token({"sub": user.username, "ver": 0})
+    other = create_access_token({"sub": user.username, "ver": 0})
+    assert current_user(db, token) is user
+
+    asyncio.run(auth.logout(token=token, current_user=user, db=db))
+
+    with pytest.raises(HTTPException):
+        current_user(db, token)
+    # served by the principal cache from now on
+    assert current_user(db, other).id == user.id
+
+    crud.user.revoke_sessions(db, db_obj=user)
+    with pytest.raises(HTTPException):
+        current_user(db, other)
+    assert current_user(db, create_access_token({"sub": user.username, "ver": 1}))
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import inspect, select, update
+
+from fastapi_user_management import crud
+from fastapi_user_management.models.role import RoleModel, RoleNames
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.schemas.role import RoleBase
+from fastapi_user_management.schemas.user import (
+    USER_LIST,
+    BaseUserCreate,
+    UserBase,
+    UserProfile,
+)
+
+ADMIN, USER = 1 << RoleNames.ADMIN.bit, 1 << RoleNames.USER.bit
+
+
+@pytest.fixture()
+def db(db):
+    admin, user = RoleModel(name=RoleNames.ADMIN), RoleModel(name=RoleNames.USER)
+    db.add_all(
+        [
+            UserModel(
+                fullname=f"User {i}",
+                username=f"user{i}@mail.com",
+                password="x",
+                created_at=datetime.utcnow(),
+                roles=[admin, user] if i % 3 == 0 else [user],
+            )
+            for i in range(9)
+        ]
+    )
+    db.commit()
+    return db
+
+
+def test_create_sets_role_mask(db):
+    user = crud.user.create(
+        db,
+        obj_in=BaseUserCreate(
+            fullname="New",
+            username="new@mail.com",
+            roles=[RoleBase(name=RoleNames.ADMIN)],
+        ),
+    )
+    assert user.role_mask == ADMIN
+    user.roles.append(db.scalars(select(RoleModel).filter_by(name="USER")).one())
+    user.roles.pop(0)
+    db.commit()
+    assert user.role_mask == USER
+
+
+def test_serialization_reads_role_mask(db):
+    db.expunge_all()
+    user = crud.user.get_by_username(db, username="user0@mail.com")
+
+    schema = UserBase.model_validate(user)
+
+    assert [role.name for role in schema.roles] == [RoleNames.ADMIN, RoleNames.USER]
+    assert "roles" in inspect(user).unloaded
+
+
+def test_from_row_matches_validation(db):
+    users = crud.user.get_multi(db)
+
+    fast = USER_LIST.dump_json([UserBase.from_row(user) for user in users])
+
+    assert fast == USER_LIST.dump_json(USER_LIST.validate_python(users))
+    assert (
+        UserProfile.from_row(users[0]).model_dump()
+        == UserProfile.model_validate(users[0]).model_dump()
+    )
+
+
+def test_get_multi_filters_by_role(db):
+    admins = crud.user.get_multi(db, role=RoleNames.ADMIN)
+    assert [user.username for user in admins] == [
+        "user0@mail.com",
+        "user3@mail.com",
+        "user6@mail.com",
+    ]
+
+
+def test_reconcile_repairs_masks(db):
+    db.execute(update(UserModel).where(UserModel.id > 6).values(role_mask=7))
+    db.commit()
+
+    assert crud.user.reconcile_role_masks(db) == 3
+    assert crud.user.reconcile_role_masks(db) == 0
+    masks = db.scalars(select(UserModel.role_mask).order_by(UserModel.username))
+    assert list(masks) == [ADMIN | USER if i % 3 == 0 else USER for i in range(9)]
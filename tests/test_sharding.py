@@ -0,0 +1,160 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from fastapi_user_management import crud
+from fastapi_user_management.core.permissions import DEFAULT_ROLE_PERMISSIONS
+from fastapi_user_management.core.sharding import (
+    UserShardedSession,
+    pin_shard,
+    shard_for,
+)
+from fastapi_user_management.errors.exceptions import UsernameShardError
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.role import RoleModel, RoleNames
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.models.user_role import UserRoleModel
+from fastapi_user_management.schemas.role import RoleBase
+from fastapi_user_management.schemas.user import BaseUserCreate
+from fastapi_user_management.tools.reshard import reshard
+
+USERNAMES = [f"user{i}@mail.com" for i in range(12)]
+
+
+def database(path):
+    engine = create_engine(f"sqlite+pysqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        crud.permission.sync(session, grants=DEFAULT_ROLE_PERMISSIONS)
+    return engine
+
+
+def add_users(db, usernames):
+    for name in usernames:
+        pin_shard(db, name)
+        roles = db.scalars(select(RoleModel)).all()
+        db.add(
+            UserModel(
+                fullname=name,
+                username=name,
+                password="x",
+                created_at=datetime.utcnow(),
+                roles=[r for r in roles if r.name is RoleNames.USER or name < "user2"],
+            )
+        )
+        db.commit()
+
+
+def count(engine, model):
+    with engine.connect() as connection:
+        return connection.scalar(select(func.count()).select_from(model))
+
+
+@pytest.fixture()
+def shards(tmp_path):
+    engines = {str(i): database(tmp_path / f"shard{i}.sqlite3") for i in range(3)}
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+@pytest.fixture()
+def db(shards):
+    with sessionmaker(class_=UserShardedSession, shards=shards)() as session:
+        add_users(session, USERNAMES)
+        yield session
+
+
+def test_shard_for_is_stable():
+    assert shard_for("user0@mail.com", 3) == shard_for("user0@mail.com", 3)
+    assert {shard_for(name, 3) for name in USERNAMES} == {"0", "1", "2"}
+
+
+def test_users_are_stored_on_their_shard(shards, db):
+    for shard, engine in shards.items():
+        with engine.connect() as connection:
+            names = connection.scalars(select(UserModel.username)).all()
+        assert names
+        assert {shard_for(name, 3) for name in names} == {shard}
+        assert count(engine, UserRoleModel) == len(names) + sum(
+            name < "user2" for name in names
+        )
+    db.expunge_all()
+
+    user = crud.user.get_by_username(db, username="user1@mail.com")
+    assert inspect(user).identity_token == shard_for("user1@mail.com", 3)
+    assert {role.name for role in user.roles} == {RoleNames.ADMIN, RoleNames.USER}
+
+
+def test_create_and_remove_use_the_user_shard(shards, db):
+    shard = shards[shard_for("new@mail.com", 3)]
+    before = count(shard, UserModel), count(shard, UserRoleModel)
+    created = crud.user.create(
+        db,
+        obj_in=BaseUserCreate(
+            fullname="New",
+            username="new@mail.com",
+            roles=[RoleBase(name=RoleNames.USER)],
+        ),
+    )
+    assert inspect(created).identity_token == shard_for("new@mail.com", 3)
+    assert (count(shard, UserModel), count(shard, UserRoleModel)) == (
+        before[0] + 1,
+        before[1] + 1,
+    )
+
+    crud.user.remove_by_username(db, username="new@mail.com")
+    assert crud.user.get_by_username(db, username="new@mail.com") is None
+    assert (count(shard, UserModel), count(shard, UserRoleModel)) == before
+
+
+def test_renames_stay_on_the_user_shard(db):
+    home = shard_for("user1@mail.com", 3)
+    names = [f"renamed{i}@mail.com" for i in range(20)]
+    away = next(name for name in names if shard_for(name, 3) != home)
+    same = next(name for name in names if shard_for(name, 3) == home)
+    user = crud.user.get_by_username(db, username="user1@mail.com")
+    password = {"new_password": "secret", "new_password_confirm": "secret"}
+
+    with pytest.raises(UsernameShardError):
+        crud.user.update(db, db_obj=user, obj_in={"username": away, **password})
+    assert crud.user.get_by_username(db, username="user1@mail.com") is not None
+    assert crud.user.get_by_username(db, username=away) is None
+
+    crud.user.update(db, db_obj=user, obj_in={"username": same, **password})
+    renamed = crud.user.get_by_username(db, username=same)
+    assert renamed is not None
+    assert inspect(renamed).identity_token == home
+
+
+def test_listing_merges_shards(db):
+    ordered = sorted(USERNAMES)
+    page = crud.user.get_page(db, limit=5)
+    assert [user.username for user in page] == ordered[:5]
+    page = crud.user.get_page(db, after=page[-1].username, limit=5)
+    assert [user.username for user in page] == ordered[5:10]
+
+    users = crud.user.get_multi(db, skip=3, limit=4)
+    assert [user.username for user in users] == ordered[3:7]
+    admins = crud.user.get_page(db, role=RoleNames.ADMIN)
+    assert [user.username for user in admins] == [n for n in ordered if n < "user2"]
+
+
+def test_reshard(tmp_path, shards, db):
+    targets = [database(tmp_path / f"target{i}.sqlite3") for i in range(2)]
+
+    counts = reshard(list(shards.values()), targets, batch_size=2)
+
+    assert sum(counts) == len(USERNAMES)
+    target_shards = {str(i): engine for i, engine in enumerate(targets)}
+    with sessionmaker(class_=UserShardedSession, shards=target_shards)() as session:
+        for name in USERNAMES:
+            user = crud.user.get_by_username(session, username=name)
+            assert inspect(user).identity_token == shard_for(name, 2)
+            assert user.role_names == [
+                role.name for role in sorted(user.roles, key=lambda r: r.name.bit)
+            ]
+    with pytest.raises(ValueError, match="already has users"):
+        reshard(list(shards.values()), targets)
@@ -0,0 +1,143 @@
+import asyncio
+import multiprocessing
+import os
+import struct
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from fastapi_user_management.core.principal_cache import PrincipalCache
+from fastapi_user_management.core.response_cache import ResponseCache, user_tag
+from fastapi_user_management.core.shared_cache import MmapCacheBackend
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.user import UserModel, UserStatusValues
+from fastapi_user_management.routes import auth
+from fastapi_user_management.tools.token import create_access_token
+
+
+@pytest.fixture()
+def path(tmp_path):
+    return str(tmp_path / "cache.mmap")
+
+
+def test_entries_and_generations_are_shared(path):
+    first = MmapCacheBackend(path, slots=8, slot_size=128)
+    second = MmapCacheBackend(path, slots=8, slot_size=128)
+
+    first.set("a", b"1")
+    first.set("a", b"2")
+    assert second.get("a") == b"2"
+    assert second.get("b") is None
+
+    assert second.generations(["users", "roles"]) == [0, 0]
+    first.bump(["users"])
+    assert second.generations(["users", "roles"]) == [1, 0]
+
+    second.clear()
+    assert first.get("a") is None
+    assert first.generations(["users"]) == [1]
+
+
+def bump(path):
+    MmapCacheBackend(path, slots=8, slot_size=128).bump(["users"])
+
+
+def test_generations_are_shared_across_processes(path):
+    backend = MmapCacheBackend(path, slots=8, slot_size=128)
+    processes = [
+        multiprocessing.get_context("fork").Process(target=bump, args=(path,))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert backend.generations(["users"]) == [4]
+
+
+def test_full_slots_are_replaced_oldest_first(path):
+    backend = MmapCacheBackend(path, slots=4, slot_size=64)
+    for i in range(5):
+        backend.set(f"key{i}", b"x")
+
+    assert backend.get("key0") is None
+    assert all(backend.get(f"key{i}") == b"x" for i in range(1, 5))
+
+    backend.set("big", b"x" * 64)
+    assert backend.get("big") is None
+
+
+def test_slots_being_written_miss(path):
+    backend = MmapCacheBackend(path, slots=1, slot_size=64)
+    backend.set("a", b"1")
+    offset = backend._slot_offsets(0)[0]
+    (version,) = struct.unpack_from("<I", backend._map, offset)
+    struct.pack_into("<I", backend._map, offset, version + 1)
+
+    assert backend.get("a") is None
+    struct.pack_into("<I", backend._map, offset, version)
+    assert backend.get("a") == b"1"
+
+
+def test_other_geometries_map_other_files(path):
+    backend = MmapCacheBackend(path, slots=1, slot_size=64)
+    backend.set("a", b"1")
+
+    other = MmapCacheBackend(path, slots=2, slot_size=64)
+    assert other.path != backend.path
+    assert other.get("a") is None
+    # the first mapping is left intact
+    assert backend.get("a") == b"1"
+    assert os.path.getsize(backend.path) == backend._size
+
+    with open(other.path, "r+b") as file:
+        file.write(b"GARBAGE!")
+    with pytest.raises(ValueError):
+        MmapCacheBackend(path, slots=2, slot_size=64)
+
+
+def test_cached_principals_skip_the_lookup_until_written(path, monkeypatch):
+    engine = create_engine("sqlite+pysqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    cache = ResponseCache(MmapCacheBackend(path, slots=8, slot_size=512))
+    monkeypatch.setattr(auth, "principal_cache", PrincipalCache(cache, ttl=60))
+    executed = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+    token = create_access_token({"sub": "user@mail.com"})
+    with Session(engine, expire_on_commit=False) as db:
+        db.add(
+            UserModel(
+                fullname="User",
+                username="user@mail.com",
+                password="x",
+                status=UserStatusValues.ACTIVE,
+                role_mask=3,
+                created_at=datetime.utcnow(),
+            )
+        )
+        db.commit()
+        monkeypatch.setattr(
+            auth.token_revocations, "is_revoked", lambda *args, **kwargs: False
+        )
+
+        asyncio.run(auth.get_current_user(token=token, db=db))
+        lookups = len(executed)
+        user = asyncio.run(auth.get_current_user(token=token, db=db))
+        assert len(executed) == lookups
+        assert (user.username, user.status, user.role_mask) == (
+            "user@mail.com",
+            UserStatusValues.ACTIVE,
+            3,
+        )
+
+        # another worker's write to the user
+        MmapCacheBackend(path, slots=8, slot_size=512).bump([user_tag("user@mail.com")])
+        asyncio.run(auth.get_current_user(token=token, db=db))
+        assert len(executed) > lookups
@@ -0,0 +1,177 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from fastapi_user_management.core.database import get_db
+from fastapi_user_management.core.jobs import JobQueue
+from fastapi_user_management.core.permissions import (
+    permission_mask,
+    permission_registry,
+)
+from fastapi_user_management.core.principal_cache import PrincipalCache
+from fastapi_user_management.core.response_cache import (
+    NullCacheBackend,
+    ResponseCache,
+)
+from fastapi_user_management.core.user_directory import (
+    UserDirectory,
+    read_users,
+    username_hash,
+    write_snapshot,
+)
+from fastapi_user_management.models.permission import PermissionNames
+from fastapi_user_management.models.role import RoleNames
+from fastapi_user_management.models.user import UserModel, UserStatusValues
+from fastapi_user_management.routes import admin, auth, jobs
+from fastapi_user_management.tools.token import create_access_token
+
+
+@pytest.fixture()
+def engine(engine):
+    with Session(engine) as session:
+        session.add_all(
+            UserModel(
+                fullname=f"User {i}",
+                username=f"user{i}@mail.com",
+                password="x",
+                status=UserStatusValues.ACTIVE if i % 2 else UserStatusValues.PENDING,
+                role_mask=i,
+                created_at=datetime.utcnow(),
+            )
+            for i in range(100)
+        )
+        session.commit()
+    return engine
+
+
+@pytest.fixture()
+def directory(tmp_path):
+    return UserDirectory(str(tmp_path / "users.bin"), refresh_interval=0, max_age=60)
+
+
+def test_lookups_find_every_user(engine, directory):
+    assert write_snapshot(directory.path, read_users([engine])) == 100
+
+    for i in range(100):
+        entry = directory.lookup(f"user{i}@mail.com")
+        assert entry.role_mask == i
+        assert entry.status is (
+            UserStatusValues.ACTIVE if i % 2 else UserStatusValues.PENDING
+        )
+        assert entry.token_version == 0
+    assert directory.lookup("other@mail.com") is None
+
+
+def test_newer_snapshots_replace_older_ones(directory):
+    assert directory.lookup("a@mail.com") is None
+    write_snapshot(directory.path, [(username_hash("a@mail.com"), 1, 0, 1, 0)])
+    assert directory.lookup("a@mail.com").role_mask == 1
+
+    collision = (username_hash("b@mail.com"), 2, 0, 2, 0)
+    assert write_snapshot(directory.path, [collision, collision]) == 0
+    assert directory.lookup("a@mail.com") is None
+    assert directory.lookup("b@mail.com") is None
+
+    write_snapshot(directory.path, [(username_hash("a@mail.com"), 1, 0, 1, 0)])
+    directory.max_age = 0
+    assert directory.lookup("a@mail.com") is None
+
+
+def test_tokens_are_resolved_without_the_database(engine, directory, monkeypatch):
+    write_snapshot(directory.path, read_users([engine]))
+    monkeypatch.setattr(auth, "user_directory", directory)
+    monkeypatch.setattr(
+        auth,
+        "principal_cache",
+        PrincipalCache(ResponseCache(NullCacheBackend()), ttl=0),
+    )
+    monkeypatch.setattr(
+        auth.token_revocations, "is_revoked", lambda *args, **kwargs: False
+    )
+    executed = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+
+    with Session(engine) as db:
+        token = create_access_token({"sub": "user3@mail.com", "ver": 0})
+        user = asyncio.run(auth.get_current_user(token=token, db=db))
+        assert (user.username, user.role_mask) == ("user3@mail.com", 3)
+        assert executed == []
+
+        # issued after the snapshot was built: the database decides
+        token = create_access_token({"sub": "user3@mail.com", "ver": 1})
+        with pytest.raises(auth.HTTPException):
+            asyncio.run(auth.get_current_user(token=token, db=db))
+        assert executed
+
+
+def test_permission_checks_look_snapshot_users_up_again(engine, directory, monkeypatch):
+    write_snapshot(directory.path, read_users([engine]))
+    monkeypatch.setattr(auth, "user_directory", directory)
+    monkeypatch.setattr(
+        auth,
+        "principal_cache",
+        PrincipalCache(ResponseCache(NullCacheBackend()), ttl=0),
+    )
+    monkeypatch.setattr(
+        auth.token_revocations, "is_revoked", lambda *args, **kwargs: False
+    )
+    monkeypatch.setattr(
+        permission_registry,
+        "role_masks",
+        {RoleNames.ADMIN: permission_mask(*PermissionNames)},
+    )
+    monkeypatch.setattr(permission_registry, "_by_role_mask", {})
+    queue = JobQueue(engine, workers=0, poll_interval=60, stale_after=30)
+    queue.register(jobs.USER_BATCH_JOB)(jobs.run_user_batch)
+    monkeypatch.setattr(jobs, "job_queue", queue)
+    app = FastAPI()
+    app.include_router(admin.router)
+    app.include_router(jobs.router)
+
+    async def get_test_db():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_test_db
+    client = TestClient(app)
+    batch = {"operations": [{"op": "revoke_sessions", "username": "user1@mail.com"}]}
+
+    def requests(username, job_id=None):
+        headers = {
+            "Authorization": "Bearer "
+            + create_access_token({"sub": username, "ver": 0})
+        }
+        submitted = client.post("/admin/jobs/user-batch", json=batch, headers=headers)
+        job_id = job_id or submitted.json()["id"]
+        return job_id, [
+            client.get("/admin/user-page", headers=headers).status_code,
+            client.post("/admin/batch", json=batch, headers=headers).status_code,
+            submitted.status_code,
+            client.get(f"/admin/jobs/{job_id}", headers=headers).status_code,
+            client.delete(f"/admin/jobs/{job_id}", headers=headers).status_code,
+        ]
+
+    demoted_job, statuses = requests("user3@mail.com")
+    assert statuses == [200, 200, 202, 200, 200]
+    deactivated_job, statuses = requests("user5@mail.com")
+    assert statuses == [200, 200, 202, 200, 200]
+
+    with Session(engine) as db:
+        db.get(UserModel, 4).role_mask = 2
+        db.get(UserModel, 6).status = UserStatusValues.DEACTIVATE
+        db.commit()
+    # both still have their old fields in the snapshot
+    assert directory.principal("user3@mail.com", token_version=0).role_mask == 3
+    assert directory.principal("user5@mail.com", token_version=0).status == "active"
+
+    assert requests("user3@mail.com", demoted_job)[1] == [403] * 5
+    assert requests("user5@mail.com", deactivated_job)[1] == [400] * 5
@@ -0,0 +1,175 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, delete, event, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from fastapi_user_management import crud
+from fastapi_user_management.core import username_filter
+from fastapi_user_management.core.username_filter import (
+    SYNC_OVERLAP,
+    UsernameFilter,
+)
+from fastapi_user_management.crud import crud_users
+from fastapi_user_management.errors.exceptions import UserExistError
+from fastapi_user_management.models.base import Base
+from fastapi_user_management.models.user import UserModel
+from fastapi_user_management.schemas.user import BaseUserCreate
+
+
+@pytest.fixture()
+def usernames(monkeypatch):
+    usernames = UsernameFilter(sync_interval=60, rebuild_interval=600, error_rate=0.01)
+    monkeypatch.setattr(crud_users, "username_filter", usernames)
+    return usernames
+
+
+def insert_user(db, username):
+    # written around the ORM, like another worker would
+    db.execute(
+        insert(UserModel).values(
+            fullname="Other",
+            username=username,
+            password="x",
+            status="active",
+            created_at=datetime.utcnow(),
+        )
+    )
+    db.commit()
+
+
+def test_unknown_logins_skip_the_lookup(db, usernames):
+    crud.user.create(
+        db, obj_in=BaseUserCreate(username="a@mail.com", fullname="A", roles=[])
+    )
+    executed = []
+    event.listen(
+        db.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+
+    for i in range(100):
+        assert (
+            crud.user.authenticate(db, username=f"u{i}@mail.com", password="x") is None
+        )
+    assert len(executed) == usernames.stats.false_positives
+    # the check of the create was a miss too
+    assert usernames.stats.checks == 101
+    assert usernames.stats.definite_misses + usernames.stats.false_positives == 101
+
+    assert crud.user.authenticate(db, username="a@mail.com", password="x") is None
+    assert executed
+
+
+def test_users_of_other_workers_are_synced(db, usernames):
+    usernames.rebuild(db)
+    insert_user(db, "other@mail.com")
+    assert not usernames.might_exist(db, username="other@mail.com")
+
+    usernames.sync_interval = 0
+    assert usernames.might_exist(db, username="other@mail.com")
+
+
+def test_unseen_duplicates_are_still_refused(db, usernames):
+    usernames.rebuild(db)
+    insert_user(db, "other@mail.com")
+
+    with pytest.raises(UserExistError):
+        crud.user.create(
+            db, obj_in=BaseUserCreate(username="other@mail.com", fullname="O", roles=[])
+        )
+    assert usernames.stats.definite_misses == 1
+
+
+def test_deletions_trigger_a_rebuild(db, usernames):
+    for name in "abc":
+        crud.user.create(
+            db,
+            obj_in=BaseUserCreate(username=f"{name}@mail.com", fullname=name, roles=[]),
+        )
+    crud.user.remove_by_username(db, username="a@mail.com")
+
+    assert not usernames.might_exist(db, username="a@mail.com")
+    assert usernames.filter.count == 2
+
+
+def test_users_created_after_deletions_are_synced(db, usernames):
+    for i in range(2 * SYNC_OVERLAP):
+        insert_user(db, f"u{i}@mail.com")
+    usernames.rebuild(db)
+    db.execute(delete(UserModel).where(UserModel.id > SYNC_OVERLAP // 2))
+    db.commit()
+
+    # ids of the deleted users aren't reused, the new user is above the range
+    insert_user(db, "new@mail.com")
+    usernames.sync_interval = 0
+    assert usernames.might_exist(db, username="new@mail.com")
+
+
+def test_users_added_during_a_rebuild_are_kept(db, usernames, monkeypatch):
+    insert_user(db, "a@mail.com")
+
+    def add_during_scan(conn, cursor, statement, *args):
+        if statement.startswith("SELECT user_account.id, user_account.username"):
+            usernames.add("late@mail.com")
+
+    event.listen(db.get_bind(), "before_cursor_execute", add_during_scan)
+    usernames.rebuild(db)
+    event.remove(db.get_bind(), "before_cursor_execute", add_during_scan)
+
+    assert "late@mail.com" in usernames.filter
+    assert usernames._pending is None
+    usernames.add("later@mail.com")
+    assert "later@mail.com" in usernames.filter
+
+    def fail(db):
+        raise RuntimeError("database is gone")
+
+    monkeypatch.setattr(username_filter, "shard_bind_arguments", fail)
+    with pytest.raises(RuntimeError):
+        usernames.rebuild(db)
+    assert usernames._pending is None
+
+
+def test_renamed_users_can_log_in(db, usernames):
+    insert_user(db, "old@mail.com")
+    for i in range(2 * SYNC_OVERLAP):
+        insert_user(db, f"u{i}@mail.com")
+    usernames.rebuild(db)
+
+    user = crud.user.get_by_username(db, username="old@mail.com")
+    crud.user.update(
+        db,
+        db_obj=user,
+        obj_in={
+            "username": "new@mail.com",
+            "new_password": "secret",
+            "new_password_confirm": "secret",
+        },
+    )
+    assert crud.user.authenticate(db, username="new@mail.com", password="secret")
+    assert usernames.stats.definite_misses == 0
+
+
+def test_stale_filters_are_rebuilt_in_the_background(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'db.sqlite3'}")
+    Base.metadata.create_all(engine)
+    usernames = UsernameFilter(
+        sync_interval=60,
+        rebuild_interval=600,
+        error_rate=0.01,
+        session_factory=sessionmaker(engine),
+    )
+    # checks don't query: the filter is built, or rebuilt, by another thread
+    assert usernames.might_exist(None, username="a@mail.com")
+    usernames._rebuilding.join()
+    assert not usernames.might_exist(None, username="a@mail.com")
+
+    with Session(engine) as db:
+        insert_user(db, "a@mail.com")
+    usernames.rebuild_interval = 0
+    usernames.might_exist(None, username="a@mail.com")
+    usernames._rebuilding.join()
+    usernames.rebuild_interval = 600
+    assert usernames.might_exist(None, username="a@mail.com")